@@ -2,6 +2,7 @@ from django.contrib import admin
 
 from blocks.models import (
     ActiveParkRate,
+    ActiveParkRateRange,
     Address,
     Block,
     CustodianVote,
@@ -15,6 +16,7 @@ from blocks.models import (
     TxOutput,
     WatchAddress,
     ParkRate,
+    ParkRateSchedule,
 )
 
 
@@ -59,7 +61,7 @@ admin.site.register(TxOutput, TxOutputAdmin)
 
 
 class AddressAdmin(admin.ModelAdmin):
-    list_display = ("address", "balance", "network_owned", "coin")
+    list_display = ("address", "current_balance", "network_owned", "coin")
     search_fields = ("address",)
     ordering = ["-network_owned"]
     raw_id_fields = ("coin",)
@@ -130,6 +132,22 @@ class ActiveParkRateAdmin(admin.ModelAdmin):
 admin.site.register(ActiveParkRate, ActiveParkRateAdmin)
 
 
+class ParkRateScheduleAdmin(admin.ModelAdmin):
+    list_display = ("hash",)
+    search_fields = ("hash",)
+
+
+admin.site.register(ParkRateSchedule, ParkRateScheduleAdmin)
+
+
+class ActiveParkRateRangeAdmin(admin.ModelAdmin):
+    list_display = ("coin", "valid_from", "valid_to", "schedule")
+    raw_id_fields = ("coin", "schedule")
+
+
+admin.site.register(ActiveParkRateRange, ActiveParkRateRangeAdmin)
+
+
 class ExchangeBalanceAdmin(admin.ModelAdmin):
     list_display = ("coin", "exchange")
     raw_id_fields = ("coin",)
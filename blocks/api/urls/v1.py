@@ -14,6 +14,11 @@ urlpatterns = [
         v1.AddressUnspent.as_view(),
         name="v1.address_unspent",
     ),
+    url(
+        r"address/(?P<address>.*)/history$",
+        v1.AddressHistory.as_view(),
+        name="v1.address_history",
+    ),
     # Transaction API
     url(r"tx/broadcast$", v1.TransactionBroadcast.as_view(), name="v1.tx_broadcast"),
     url(
@@ -21,6 +26,11 @@ urlpatterns = [
         v1.TransactionOutputs.as_view(),
         name="v1.tx_outputs",
     ),
+    url(
+        r"tx/(?P<transaction>.*)/proof$",
+        v1.TransactionProof.as_view(),
+        name="v1.tx_proof",
+    ),
     # Coin API
     url(
         r"coin/(?P<coin>.*)/supply/total$",
@@ -52,4 +62,7 @@ urlpatterns = [
         v1.ParkRateData.as_view(),
         name="v1.active_park_rates",
     ),
+    # Monitoring
+    url(r"repairs$", v1.RepairMetrics.as_view(), name="v1.repair_metrics"),
+    url(r"health$", v1.Health.as_view(), name="v1.health"),
 ]
@@ -1,18 +1,22 @@
-import codecs
 import logging
 from datetime import timedelta
-from decimal import Decimal
 
 from django.db import connection
-from django.db.models import Sum
-from django.http import HttpResponse, JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 
-from blocks.models import Address, Block, Info, NetworkFund, Peer, Transaction
-from blocks.utils.exchange_balances import get_exchange_balances
+from blocks.models import Address, Block, Info, Peer, Transaction
+from blocks.utils.address_history import get_address_history
+from blocks.utils.health import get_health_snapshot
+from blocks.utils.info import get_latest_infos
+from blocks.utils.merkle import merkle_proof
+from blocks.utils.park_rates import get_active_ranges
+from blocks.utils.repair import get_repair_metrics
 from blocks.utils.rpc import send_rpc
+from blocks.utils.supply import get_supply_snapshot
+from blocks.utils.valid_hashes import get_valid_hashes
 from daio.models import Chain, Coin
 
 logger = logging.getLogger(__name__)
@@ -49,15 +53,13 @@ class AddressUnspent(View):
                 "data": {
                     "unspent": [
                         {
-                            "tx": output.transaction.tx_id,
-                            "n": output.index,
-                            "script": output.script_pub_key_hex,
-                            "amount": output.display_value,
+                            "tx": unspent.output.transaction.tx_id,
+                            "n": unspent.output.index,
+                            "script": unspent.output.script_pub_key_hex,
+                            "amount": unspent.output.display_value,
                         }
-                        for output in address_object.outputs.filter(
-                            input__isnull=True,
-                            transaction__block__isnull=False,
-                            transaction__block__height__isnull=False,
+                        for unspent in address_object.unspent_outputs.select_related(
+                            "output__transaction"
                         )
                     ]
                 },
@@ -65,6 +67,47 @@ class AddressUnspent(View):
         )
 
 
+class AddressHistory(View):
+    """
+    Give a page of the transactions for a passed address, newest first.
+    Pass the returned next cursor to get the following page
+    """
+
+    @staticmethod
+    def get(request, address):
+        address_object = get_object_or_404(Address, address=address)
+
+        try:
+            history, next_cursor = get_address_history(
+                address_object,
+                cursor=request.GET.get("cursor"),
+                limit=request.GET.get("limit"),
+            )
+        except ValueError:
+            return JsonResponse(
+                {"status": "failure", "data": "Invalid cursor or limit"}
+            )
+
+        return JsonResponse(
+            {
+                "status": "success",
+                "data": {
+                    "transactions": [
+                        {
+                            "tx": tx.tx_id,
+                            "height": tx.block_height,
+                            "index": tx.index,
+                            "time": tx.time,
+                            "delta": delta / 10000,
+                        }
+                        for tx, delta in history
+                    ],
+                    "next": next_cursor,
+                },
+            }
+        )
+
+
 class TransactionBroadcast(View):
     """
     Broadcast the raw hex transaction passed in POST
@@ -120,11 +163,46 @@ class TransactionOutputs(View):
         )
 
 
+class TransactionProof(View):
+    """
+    Return a merkle proof that the transaction is included in its block
+    """
+
+    @staticmethod
+    def get(request, transaction):
+        tx = get_object_or_404(
+            Transaction.objects.select_related("block"),
+            tx_id=transaction,
+            block__height__isnull=False,
+        )
+        tx_ids = list(
+            tx.block.transactions.order_by("index").values_list("tx_id", flat=True)
+        )
+        return JsonResponse(
+            {
+                "tx_id": tx.tx_id,
+                "block_hash": tx.block.hash,
+                "height": tx.block.height,
+                "merkle_root": tx.block.merkle_root,
+                "proof": merkle_proof(tx_ids, tx_ids.index(tx.tx_id)),
+            }
+        )
+
+
 #
 # MarketCap
 #
 
 
+def _get_supply(coin_object):
+    supply = get_supply_snapshot(coin_object)
+
+    if supply is None:
+        raise Http404("No supply has been calculated for {}".format(coin_object))
+
+    return supply
+
+
 class TotalSupply(View):
     """
     Return A coins Total Supply (as received from the Coin Daemon)
@@ -138,12 +216,8 @@ class TotalSupply(View):
             code=coin.upper(),
             chain=Chain.objects.get(schema_name=connection.schema_name),
         )
-        latest_info = (
-            Info.objects.filter(unit=coin_object.unit_code)
-            .order_by("-time_added")
-            .first()
-        )
-        return HttpResponse(latest_info.money_supply)
+        supply = _get_supply(coin_object)
+        return HttpResponse(supply["total_supply"])
 
 
 class ParkedSupply(View):
@@ -158,12 +232,8 @@ class ParkedSupply(View):
             code=coin.upper(),
             chain=Chain.objects.get(schema_name=connection.schema_name),
         )
-        latest_info = (
-            Info.objects.filter(unit=coin_object.unit_code)
-            .order_by("-time_added")
-            .first()
-        )
-        return HttpResponse(latest_info.total_parked if latest_info.total_parked else 0)
+        supply = _get_supply(coin_object)
+        return HttpResponse(supply["parked"])
 
 
 class CirculatingSupply(View):
@@ -174,41 +244,9 @@ class CirculatingSupply(View):
             code=coin.upper(),
             chain=Chain.objects.get(schema_name=connection.schema_name),
         )
-        latest_info = (
-            Info.objects.filter(unit=coin_object.unit_code)
-            .order_by("-time_added")
-            .first()
-        )
-
-        total_supply = latest_info.money_supply
-        parked = latest_info.total_parked if latest_info.total_parked else 0
-
-        # funds at network addresses
-        network_owned_addresses = Address.objects.filter(
-            network_owned=True, coin=coin_object
-        )
-        total_network_owned_funds = 0
-
-        for address in network_owned_addresses:
-            total_network_owned_funds += Decimal(address.balance / 10000)
-
-        # other network owned funds
-        other_funds = NetworkFund.objects.filter(coin=coin_object).aggregate(
-            Sum("value")
-        )
-        total_network_owned_funds += (
-            other_funds["value__sum"] if other_funds["value__sum"] else 0
-        )
-
-        # exchange balances
-        for exchange_balance in get_exchange_balances(coin_object):
-            total_network_owned_funds += Decimal(exchange_balance.get("balance"))
-
+        supply = _get_supply(coin_object)
         return HttpResponse(
-            round(
-                total_supply - (parked + total_network_owned_funds),
-                coin_object.decimal_places,
-            )
+            round(supply["circulating_supply"], coin_object.decimal_places)
         )
 
 
@@ -220,39 +258,12 @@ class NetworkFunds(View):
             code=coin.upper(),
             chain=Chain.objects.get(schema_name=connection.schema_name),
         )
-
+        supply = _get_supply(coin_object)
         return JsonResponse(
             {
-                "network_owned_addresses": [
-                    {
-                        "address": address.address,
-                        "balance": float(
-                            round(
-                                Decimal(address.balance / 10000),
-                                coin_object.decimal_places,
-                            )
-                        ),
-                    }
-                    for address in Address.objects.filter(
-                        network_owned=True, coin=coin_object
-                    )
-                ],
-                "other_network_funds": [
-                    {
-                        "name": fund.name,
-                        "value": float(round(fund.value, coin_object.decimal_places)),
-                    }
-                    for fund in NetworkFund.objects.filter(coin=coin_object)
-                ],
-                "network_funds_on_exchange": [
-                    {
-                        "exchange": balance.get("exchange"),
-                        "balance": float(
-                            round(balance.get("balance"), coin_object.decimal_places)
-                        ),
-                    }
-                    for balance in get_exchange_balances(coin_object)
-                ],
+                "network_owned_addresses": supply["network_owned_addresses"],
+                "other_network_funds": supply["other_network_funds"],
+                "network_funds_on_exchange": supply["network_funds_on_exchange"],
             }
         )
 
@@ -266,44 +277,7 @@ class GetValidHashes(View):
     def post(request):
         # data arrives in request.body
         logger.debug("getvalidhashes")
-        sent_hashes = codecs.encode(request.body, "hex")
-        hash_list = [sent_hashes[i : i + 64] for i in range(0, len(sent_hashes), 64)]
-        start_height = None
-        return_hash = b""
-
-        # loop through the data to check the sent hashes
-        for sent_hash in hash_list:
-            try_hash = codecs.encode(
-                codecs.decode(sent_hash, "hex")[::-1], "hex"
-            ).decode()  # noqa
-
-            try:
-                block = Block.objects.get(hash=try_hash)
-
-                if block.height is None:
-                    logger.error("Found Block has no height")
-                    continue
-
-                start_height = block.height
-                break
-
-            except Block.DoesNotExist as e:
-                logger.error(e)
-                continue
-
-        if start_height is None:
-            logger.warning("No hashes found when searching for valid hashes")
-            logger.warning(hash_list)
-            return HttpResponse(return_hash)
-
-        # get hashes starting form the first one recognised
-        logger.info("getting validhashes starting at {}".format(start_height))
-        for block in Block.objects.filter(height__gte=start_height).order_by("height")[
-            :50000
-        ]:
-            return_hash += codecs.decode(block.hash.encode(), "hex")[::-1][:16]
-
-        return HttpResponse(return_hash)
+        return HttpResponse(bytes(get_valid_hashes(request.body)))
 
 
 class ActivePeers(View):
@@ -311,7 +285,7 @@ class ActivePeers(View):
     def get(request):
         active_peers = {"active_peers": [connection.tenant.rpc_host]}
 
-        latest_info = Info.objects.all().order_by("-time_added").first()
+        latest_info = max(get_latest_infos().values(), key=lambda info: info.time_added)
 
         for peer in Peer.objects.filter(
             inbound=True,
@@ -336,7 +310,7 @@ class ActivePeers(View):
 class ParkRateData(View):
     def get(self, request, block_height):
         block = get_object_or_404(Block, height=block_height)
-        active_rates = block.activeparkrate_set.all().prefetch_related("rates")
+        active_rates = get_active_ranges(block.height)
         response = {
             "parked_amounts_info": {},
             "parked_amounts_calculated": block.amount_parked,
@@ -349,26 +323,22 @@ class ParkRateData(View):
         chain = connection.tenant
 
         for coin in chain.coins.all():
+            # compaction leaves gaps in the heights so use the closest info below
             info = (
-                Info.objects.filter(max_height=block.height, unit=coin.unit_code)
-                .order_by("-total_parked")
+                Info.objects.filter(max_height__lte=block.height, unit=coin.unit_code)
+                .order_by("-max_height", "-total_parked")
                 .first()
             )
 
             if info:
-                response["parked_amounts"][coin.unit_code] = (
+                response["parked_amounts_info"][coin.unit_code] = (
                     float(info.total_parked) if info.total_parked is not None else 0
                 )
             else:
-                response["parked_amounts"][coin.unit_code] = 0
+                response["parked_amounts_info"][coin.unit_code] = 0
 
         for active_rate in active_rates:
-            if active_rate.coin.unit_code not in response["rates"]:
-                response["rates"][active_rate.coin.unit_code] = []
-            for rate in active_rate.rates.all():
-                response["rates"][active_rate.coin.unit_code].append(
-                    {"blocks": rate.blocks, "rate": rate.rate}
-                )
+            response["rates"][active_rate.coin.unit_code] = list(active_rate.rate_list)
 
         for unit in response["rates"]:
             response["rates"][unit] = sorted(
@@ -376,3 +346,28 @@ class ParkRateData(View):
             )
 
         return JsonResponse(response, json_dumps_params={"sort_keys": True})
+
+
+#
+# Monitoring
+#
+
+
+class RepairMetrics(View):
+    """
+    Return the repair scheduler's in flight count and counters for the chain
+    """
+
+    @staticmethod
+    def get(request):
+        return JsonResponse(get_repair_metrics())
+
+
+class Health(View):
+    """
+    Return the health snapshot: top block, peers and the daily network series
+    """
+
+    @staticmethod
+    def get(request):
+        return JsonResponse(get_health_snapshot())
@@ -4,7 +4,7 @@ import logging
 from channels import Group
 from tenant_schemas.utils import schema_context
 
-from blocks.models import Info
+from blocks.utils.info import get_latest_info
 from daio.models import Chain
 
 logger = logging.getLogger(__name__)
@@ -34,9 +34,7 @@ def display_info(message):
         connections = 0
 
         for coin in chain.coins.all():
-            info = (
-                Info.objects.filter(unit=coin.unit_code).order_by("-max_height").first()
-            )
+            info = get_latest_info(coin.unit_code)
             if not info:
                 continue
             update_info(
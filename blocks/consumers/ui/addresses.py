@@ -3,6 +3,8 @@ import logging
 
 from django.template.loader import render_to_string
 
+from blocks.utils.address_history import get_address_history
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,21 +22,41 @@ def get_address_balance(address_object, message):
     )
 
 
-def get_address_details(address_object, message):
-    message.reply_channel.send(
-        {"text": json.dumps({"message_type": "clear_address_transactions"})}
-    )
-    for tx in address_object.transactions():
-        tx.save()
+def get_address_details(address_object, message, cursor=None):
+    """
+    Send a page of the address transactions.
+    The client asks for the next page by sending back the cursor
+    """
+    try:
+        history, next_cursor = get_address_history(address_object, cursor=cursor)
+    except ValueError:
+        logger.warning(f"Invalid address history cursor {cursor}")
+        return
+
+    if not cursor:
+        message.reply_channel.send(
+            {"text": json.dumps({"message_type": "clear_address_transactions"})}
+        )
+
+    for tx, delta in history:
         message.reply_channel.send(
             {
                 "text": json.dumps(
                     {
                         "message_type": "address_transaction",
                         "html": render_to_string(
-                            "explorer/fragments/address_transaction.html", {"tx": tx}
+                            "explorer/fragments/address_transaction.html",
+                            {"tx": tx, "delta": delta / 10000},
                         ),
                     }
                 )
             }
         )
+
+    message.reply_channel.send(
+        {
+            "text": json.dumps(
+                {"message_type": "address_transactions_next", "cursor": next_cursor}
+            )
+        }
+    )
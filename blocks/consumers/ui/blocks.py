@@ -1,43 +1,31 @@
 import json
 
+from channels import Group
+from django.core.cache import cache
+from django.db import connection
 from django.template.loader import render_to_string
 
 from blocks.models import Block, TxOutput
+from blocks.utils.channels import send_to_reply_channel
+from blocks.utils.summary import with_summaries
+from blocks.utils.transaction_views import render_transactions
 
 
-def send_transactions(block, message):
-    # send the block transactions
-    transactions = block.transactions.all()
+def get_transaction_messages(block):
+    # the block transactions
+    fragments = render_transactions(block.transactions.select_related("block", "coin"))
+    messages = [{"message_type": "has_transactions"}] if fragments else []
 
-    if transactions.count() > 0:
-        message.reply_channel.send(
-            {"text": json.dumps({"message_type": "has_transactions"})}, immediately=True
-        )
+    for html in fragments:
+        messages.append({"message_type": "block_transaction", "html": html})
 
-    for tx in transactions:
-        message.reply_channel.send(
-            {
-                "text": json.dumps(
-                    {
-                        "message_type": "block_transaction",
-                        "html": render_to_string(
-                            "explorer/fragments/transaction.html", {"tx": tx}
-                        ),
-                    }
-                )
-            },
-            immediately=True,
-        )
+    return messages
 
 
-def send_custodial_grant_votes(block, message):
-    # send the block custodial grants
-    custodian_votes = block.custodianvote_set.all()
-
-    if custodian_votes.count() > 0:
-        message.reply_channel.send(
-            {"text": json.dumps({"message_type": "has_grants"})}, immediately=True
-        )
+def get_custodial_grant_vote_messages(block):
+    # the block custodial grants
+    custodian_votes = list(block.custodianvote_set.select_related("address"))
+    messages = [{"message_type": "has_grants"}] if custodian_votes else []
 
     for grant in custodian_votes:
         granted = None
@@ -51,100 +39,102 @@ def send_custodial_grant_votes(block, message):
                 if not tx_input.previous_output:
                     granted = tx_input.transaction.block
 
-        message.reply_channel.send(
+        messages.append(
             {
-                "text": json.dumps(
+                "message_type": "block_grant",
+                "html": render_to_string(
+                    "explorer/fragments/block_grant.html",
                     {
-                        "message_type": "block_grant",
-                        "html": render_to_string(
-                            "explorer/fragments/block_grant.html",
-                            {
-                                "grant": {
-                                    "address": grant.address.address,
-                                    "amount": grant.amount,
-                                    "granted": granted,
-                                }
-                            },
-                        ),
-                    }
-                )
-            },
-            immediately=True,
+                        "grant": {
+                            "address": grant.address.address,
+                            "amount": grant.amount,
+                            "granted": granted,
+                        }
+                    },
+                ),
+            }
         )
 
+    return messages
 
-def send_motion_votes(block, message):
-    motion_votes = block.motionvote_set.all()
 
-    if motion_votes.count() > 0:
-        message.reply_channel.send(
-            {"text": json.dumps({"message_type": "has_motions"})}, immediately=True
-        )
+def get_motion_vote_messages(block):
+    motion_votes = list(block.motionvote_set.all())
+    messages = [{"message_type": "has_motions"}] if motion_votes else []
 
     for motion in motion_votes:
-        message.reply_channel.send(
+        messages.append(
             {
-                "text": json.dumps(
-                    {
-                        "message_type": "block_motion",
-                        "html": render_to_string(
-                            "explorer/fragments/block_motion.html",
-                            {"motion": {"hash": motion.hash,}},
-                        ),
-                    }
-                )
-            },
-            immediately=True,
+                "message_type": "block_motion",
+                "html": render_to_string(
+                    "explorer/fragments/block_motion.html",
+                    {"motion": {"hash": motion.hash,}},
+                ),
+            }
         )
 
+    return messages
 
-def send_park_rate_votes(block, message):
-    park_rate_votes = block.parkratevote_set.all().order_by("coin__index")
 
-    if park_rate_votes.count() > 0:
-        message.reply_channel.send(
-            {"text": json.dumps({"message_type": "has_park_rates"})}, immediately=True
+def get_park_rate_vote_messages(block):
+    park_rate_votes = list(
+        block.parkratevote_set.select_related("coin", "schedule").order_by(
+            "coin__index"
         )
+    )
+    messages = [{"message_type": "has_park_rates"}] if park_rate_votes else []
 
     for park_rate_vote in park_rate_votes:
-        message.reply_channel.send(
+        messages.append(
             {
-                "text": json.dumps(
-                    {
-                        "message_type": "block_park_rate",
-                        "html": render_to_string(
-                            "explorer/fragments/block_park_rate.html",
-                            {"park_rate": park_rate_vote,},
-                        ),
-                    }
-                )
-            },
-            immediately=True,
+                "message_type": "block_park_rate",
+                "html": render_to_string(
+                    "explorer/fragments/block_park_rate.html",
+                    {"park_rate": park_rate_vote,},
+                ),
+            }
         )
 
+    return messages
 
-def send_fees_votes(block, message):
-    fees_votes = block.feesvote_set.all().order_by("coin__index")
 
-    if fees_votes.count() > 0:
-        message.reply_channel.send(
-            {"text": json.dumps({"message_type": "has_fees"})}, immediately=True
-        )
+def get_fees_vote_messages(block):
+    fees_votes = list(block.feesvote_set.all().order_by("coin__index"))
+    messages = [{"message_type": "has_fees"}] if fees_votes else []
 
     for fees in fees_votes:
-        message.reply_channel.send(
+        messages.append(
             {
-                "text": json.dumps(
-                    {
-                        "message_type": "block_fees",
-                        "html": render_to_string(
-                            "explorer/fragments/block_fees.html", {"fees": fees}
-                        ),
-                    }
-                )
-            },
-            immediately=True,
+                "message_type": "block_fees",
+                "html": render_to_string(
+                    "explorer/fragments/block_fees.html", {"fees": fees}
+                ),
+            }
+        )
+
+    return messages
+
+
+def get_block_details_messages(block):
+    """
+    The messages that make up the block details, rendered once per block version
+    """
+    cache_key = "{}_details".format(block.cache_key)
+    messages = cache.get(cache_key)
+
+    if messages is None:
+        # clear the existing details first
+        messages = (
+            [{"message_type": "clear_block_details"}]
+            + get_transaction_messages(block)
+            + get_custodial_grant_vote_messages(block)
+            + get_motion_vote_messages(block)
+            + get_park_rate_vote_messages(block)
+            + get_fees_vote_messages(block)
         )
+        cache.set(cache_key, messages)
+
+    return messages
 
 
 def get_block_details(message_dict, message):
@@ -155,46 +145,77 @@ def get_block_details(message_dict, message):
     except Block.DoesNotExist:
         return
 
-    # clear the existing details
-    message.reply_channel.send(
-        {"text": json.dumps({"message_type": "clear_block_details"})}, immediately=True
-    )
+    for block_message in get_block_details_messages(block):
+        if not send_to_reply_channel(message, block_message):
+            return
 
-    send_transactions(block, message)
-    send_custodial_grant_votes(block, message)
-    send_motion_votes(block, message)
-    send_park_rate_votes(block, message)
-    send_fees_votes(block, message)
 
+def get_next_blocks_messages(last_height):
+    cache_key = "{}_next_blocks_{}".format(connection.schema_name, last_height)
+    messages = cache.get(cache_key)
 
-def get_next_blocks(message, last_height):
-    for block in Block.objects.filter(
-        height__lt=last_height, height__gte=last_height - 50
-    ).order_by("-height"):
-        message.reply_channel.send(
+    if messages is None:
+        messages = [
             {
-                "text": json.dumps(
-                    {
-                        "message_type": "new_block",
-                        "html": render_to_string(
-                            "explorer/fragments/full_block.html", {"block": block}
-                        ),
-                    }
-                )
+                "message_type": "new_block",
+                "html": render_to_string(
+                    "explorer/fragments/full_block.html", {"block": block}
+                ),
             }
+            for block in with_summaries(
+                Block.objects.filter(
+                    height__lt=last_height, height__gte=last_height - 50
+                )
+                .select_related("solver")
+                .order_by("-height")
+            )
+        ]
+        # short lived as the rows show the block age
+        cache.set(cache_key, messages, 60)
+
+    return messages
+
+
+def get_next_blocks(message, last_height):
+    for block_message in get_next_blocks_messages(last_height):
+        if not send_to_reply_channel(message, block_message):
+            return
+
+
+def get_latest_blocks_message():
+    """
+    The serialized latest blocks. Built once per tip by refresh_latest_blocks
+    """
+    latest_blocks_message = cache.get("{}_latest_blocks".format(connection.schema_name))
+
+    if latest_blocks_message is None:
+        latest_blocks_message = refresh_latest_blocks(broadcast=False)
+
+    return latest_blocks_message
+
+
+def refresh_latest_blocks(broadcast=True):
+    """
+    Serialize the latest blocks, cache them and send them to every subscriber
+    """
+    latest_blocks = with_summaries(
+        Block.objects.exclude(height__isnull=True)
+        .select_related("previous_block", "next_block", "solver")
+        .order_by("-height")[:50]
+    )
+    latest_blocks_message = {
+        "message_type": "latest_blocks",
+        "message": [block.serialize() for block in latest_blocks],
+    }
+    cache.set("{}_latest_blocks".format(connection.schema_name), latest_blocks_message)
+
+    if broadcast:
+        Group("{}_latest_blocks".format(connection.schema_name)).send(
+            {"text": json.dumps(latest_blocks_message)}
         )
 
+    return latest_blocks_message
+
 
 def get_latest_blocks(message):
-    latest_blocks = Block.objects.exclude(height__isnull=True).order_by("-height")[:50]
-
-    message.reply_channel.send(
-        {
-            "text": json.dumps(
-                {
-                    "message_type": "latest_blocks",
-                    "message": [block.serialize() for block in latest_blocks],
-                }
-            )
-        }
-    )
+    send_to_reply_channel(message, get_latest_blocks_message())
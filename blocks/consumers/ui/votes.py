@@ -1,35 +1,33 @@
 import json
 import logging
 
-from django.db.models import Max, Min, Sum
+from django.conf import settings
+from django.db.models import Max
 from django.template.loader import render_to_string
 
-from blocks.models import Block, CustodianVote, MotionVote, TxOutput
+from blocks.models import Block, MotionVote, TxOutput, VoteTally
+from blocks.utils.vote_tally import get_vote_window
 
 logger = logging.getLogger(__name__)
 
 
+def get_percentage(value, total):
+    if not total:
+        return 0
+    return round((value / total) * 100, 2)
+
+
 def get_current_grants(message):
     message.reply_channel.send(
         {"text": json.dumps({"message_type": "loading"})}, immediately=True
     )
-    # get the block height 10000 blocks ago
     max_height = Block.objects.all().aggregate(Max("height"))["height__max"]
-    vote_window_min = max_height - 10000
 
-    # get the distinct grants that have been voted for in the last 10000 blocks
-    grants = (
-        CustodianVote.objects.filter(
-            block__height__gte=vote_window_min, block__height__lte=max_height
-        )
-        .exclude(block__isnull=True)
-        .distinct("address", "amount")
-    )
-
-    # get the total number of sharedays destroyed in the current period
-    sharedays_destroyed = Block.objects.filter(
-        height__gte=vote_window_min, height__lte=max_height
-    ).aggregate(Sum("coinage_destroyed"))["coinage_destroyed__sum"]
+    # the tallies of the grants voted for in the current vote window
+    vote_window = get_vote_window(max_height)
+    grants = VoteTally.objects.filter(
+        vote_type=VoteTally.CUSTODIAN, number_of_votes__gt=0
+    ).select_related("address")
 
     for grant in grants:
         granted = None
@@ -43,18 +41,6 @@ def get_current_grants(message):
                 if not tx_input.previous_output:
                     granted = tx_input.transaction.block
 
-        # lets see how many blocks in the last 10000 this grant exists in
-        votes = CustodianVote.objects.filter(
-            block__height__gte=vote_window_min,
-            block__height__lte=max_height,
-            address=grant.address,
-            amount=grant.amount,
-        )
-        votes_count = votes.count()
-        grant_sharedays = votes.aggregate(Sum("block__coinage_destroyed"))[
-            "block__coinage_destroyed__sum"
-        ]
-
         message.reply_channel.send(
             {
                 "text": json.dumps(
@@ -66,18 +52,17 @@ def get_current_grants(message):
                                 "grant": {
                                     "address": grant.address.address,
                                     "amount": grant.amount,
-                                    "number_of_votes": votes_count,
+                                    "number_of_votes": grant.number_of_votes,
                                     "vote_percentage": round(
-                                        (votes_count / 10000) * 100, 2
+                                        (grant.number_of_votes / settings.VOTE_WINDOW)
+                                        * 100,
+                                        2,
                                     ),
-                                    "first_seen": CustodianVote.objects.filter(
-                                        address=grant.address, amount=grant.amount
-                                    ).aggregate(Min("block__height"))[
-                                        "block__height__min"
-                                    ],
-                                    "sharedays_destroyed": grant_sharedays,
-                                    "sharedays_percentage": round(
-                                        (grant_sharedays / sharedays_destroyed) * 100, 2
+                                    "first_seen": grant.first_seen,
+                                    "sharedays_destroyed": grant.sharedays_destroyed,
+                                    "sharedays_percentage": get_percentage(
+                                        grant.sharedays_destroyed,
+                                        vote_window.sharedays_destroyed,
                                     ),
                                     "granted": granted,
                                 }
@@ -98,43 +83,23 @@ def get_current_motions(message):
     message.reply_channel.send(
         {"text": json.dumps({"message_type": "loading"})}, immediately=True
     )
-    # get the block height 10000 blocks ago
     max_height = Block.objects.all().aggregate(Max("height"))["height__max"]
-    vote_window_min = max_height - 10000
 
-    # get the distinct grants that have been voted for in the last 10000 blocks
-    motions = (
-        MotionVote.objects.filter(
-            block__height__gte=vote_window_min, block__height__lte=max_height
-        )
-        .exclude(block__isnull=True)
-        .distinct("hash")
+    # the tallies of the motions voted for in the current vote window
+    vote_window = get_vote_window(max_height)
+    motions = VoteTally.objects.filter(
+        vote_type=VoteTally.MOTION, number_of_votes__gt=0
     )
 
-    # get the total number of sharedays destroyed in the current period
-    sharedays_destroyed = Block.objects.filter(
-        height__gte=vote_window_min, height__lte=max_height
-    ).aggregate(Sum("coinage_destroyed"))["coinage_destroyed__sum"]
-
     for motion in motions:
         # lets see if this has passed
-        try:
-            granted = MotionVote.objects.get(
+        granted = (
+            MotionVote.objects.filter(
                 hash=motion.hash, block_percentage__gte=50, sdd_percentage__gte=50
             )
-        except MotionVote.DoesNotExist:
-            granted = False
-
-        # lets see how many blocks in the last 10000 this grant exists in
-        votes = MotionVote.objects.filter(
-            block__height__gte=vote_window_min,
-            block__height__lte=max_height,
-            hash=motion.hash,
-        )
-        votes_count = votes.count()
-        motion_sharedays = votes.aggregate(Sum("block__coinage_destroyed"))[
-            "block__coinage_destroyed__sum"
-        ]
+            .select_related("block")
+            .first()
+        ) or False
 
         message.reply_channel.send(
             {
@@ -146,20 +111,18 @@ def get_current_motions(message):
                             {
                                 "motion": {
                                     "hash": motion.hash,
-                                    "number_of_votes": votes_count,
+                                    "number_of_votes": motion.number_of_votes,
                                     "vote_percentage": round(
-                                        (votes_count / 10000) * 100, 2
-                                    ),
-                                    "first_seen": MotionVote.objects.filter(
-                                        hash=motion.hash
-                                    ).aggregate(Min("block__height"))[
-                                        "block__height__min"
-                                    ],
-                                    "sharedays_destroyed": motion_sharedays,
-                                    "sharedays_percentage": round(
-                                        (motion_sharedays / sharedays_destroyed) * 100,
+                                        (motion.number_of_votes / settings.VOTE_WINDOW)
+                                        * 100,
                                         2,
                                     ),
+                                    "first_seen": motion.first_seen,
+                                    "sharedays_destroyed": motion.sharedays_destroyed,
+                                    "sharedays_percentage": get_percentage(
+                                        motion.sharedays_destroyed,
+                                        vote_window.sharedays_destroyed,
+                                    ),
                                     "granted": granted,
                                 }
                             },
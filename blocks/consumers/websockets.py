@@ -65,8 +65,12 @@ def ws_receive(message):
         if message["path"] == "/get_address_details/":
             try:
                 address_object = Address.objects.get(address=message_dict.get("stream"))
-                get_address_balance(address_object, message)
-                get_address_details(address_object, message)
+                cursor = message_dict["payload"].get("cursor")
+
+                if not cursor:
+                    get_address_balance(address_object, message)
+
+                get_address_details(address_object, message, cursor=cursor)
             except Address.DoesNotExist:
                 pass
 
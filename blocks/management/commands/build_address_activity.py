@@ -0,0 +1,55 @@
+import logging
+
+from django.core.management import BaseCommand
+from django.db.models import Max
+
+from blocks.models import AddressActivity, Block, Transaction
+from blocks.utils.activity import add_activity
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-s",
+            "--start-height",
+            help="The block height to start the backfill from",
+            dest="start_height",
+            default=0,
+        )
+        parser.add_argument(
+            "-b",
+            "--batch-size",
+            help="The number of blocks indexed per batch",
+            dest="batch_size",
+            default=1000,
+        )
+
+    def handle(self, *args, **options):
+        """
+        Backfill the AddressActivity index from the main chain transactions
+        """
+        start_height = int(options["start_height"])
+        batch_size = int(options["batch_size"])
+        top_height = Block.objects.aggregate(Max("height"))["height__max"]
+
+        if top_height is None:
+            return
+
+        if start_height == 0:
+            deleted = AddressActivity.objects.all().delete()
+            logger.info("Removed address activity: {}".format(deleted))
+
+        for min_height in range(start_height, top_height + 1, batch_size):
+            max_height = min(min_height + batch_size - 1, top_height)
+            add_activity(
+                Transaction.objects.filter(
+                    block__height__gte=min_height, block__height__lte=max_height
+                )
+            )
+            logger.info(
+                "Indexed address activity for blocks {} to {}".format(
+                    min_height, max_height
+                )
+            )
@@ -0,0 +1,45 @@
+import logging
+
+from django.core.management import BaseCommand
+from django.db.models import Max
+
+from blocks.models import Block
+from blocks.utils.summary import summarize_blocks
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-s",
+            "--start-height",
+            help="The block height to start the backfill from",
+            dest="start_height",
+            default=0,
+        )
+        parser.add_argument(
+            "-b",
+            "--batch-size",
+            help="The number of blocks summarized per batch",
+            dest="batch_size",
+            default=1000,
+        )
+
+    def handle(self, *args, **options):
+        """
+        Backfill the transaction count, solver and totals of the main chain blocks
+        """
+        start_height = int(options["start_height"])
+        batch_size = int(options["batch_size"])
+        top_height = Block.objects.aggregate(Max("height"))["height__max"]
+
+        if top_height is None:
+            return
+
+        for min_height in range(start_height, top_height + 1, batch_size):
+            max_height = min(min_height + batch_size - 1, top_height)
+            summarize_blocks(
+                Block.objects.filter(height__gte=min_height, height__lte=max_height)
+            )
+            logger.info("Summarized blocks {} to {}".format(min_height, max_height))
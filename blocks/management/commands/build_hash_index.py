@@ -0,0 +1,25 @@
+import logging
+
+from django.core.management import BaseCommand
+
+from blocks.utils.valid_hashes import update_hash_index
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-s",
+            "--start-height",
+            help="The block height to rewrite the index from",
+            dest="start_height",
+            default=0,
+        )
+
+    def handle(self, *args, **options):
+        """
+        Rebuild the packed block hash prefixes served by getvalidhashes
+        """
+        count = update_hash_index(int(options["start_height"]))
+        logger.info("Hash index covers {} heights".format(count))
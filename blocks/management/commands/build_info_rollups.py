@@ -0,0 +1,28 @@
+import datetime
+import logging
+
+from django.core.management import BaseCommand
+from django.utils.timezone import now
+
+from blocks.utils.rollups import rollup_info
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-d",
+            "--days",
+            help="The number of days of info to roll up",
+            dest="days",
+            default=30,
+        )
+
+    def handle(self, *args, **options):
+        """
+        Backfill the hourly and daily info rollups
+        """
+        since = now() - datetime.timedelta(days=int(options["days"]))
+        rollup_info(since)
+        logger.info("Rolled up info since {}".format(since))
@@ -0,0 +1,30 @@
+import logging
+
+from django.core.management import BaseCommand
+from django.db import connection
+
+from blocks.utils.park_rates import build_active_ranges, convert_park_rate_votes
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--delete",
+            help="Delete the legacy park rate rows once converted",
+            dest="delete",
+            action="store_true",
+            default=False,
+        )
+
+    def handle(self, *args, **options):
+        """
+        Convert park rate votes and active park rates to schedules and height ranges
+        """
+        converted = convert_park_rate_votes(delete=options["delete"])
+        logger.info("Converted {} park rate votes".format(converted))
+
+        for coin in connection.tenant.coins.all():
+            created = build_active_ranges(coin, delete=options["delete"])
+            logger.info("Built {} park rate ranges for {}".format(created, coin))
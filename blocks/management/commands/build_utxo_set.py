@@ -0,0 +1,59 @@
+import logging
+
+from django.core.management import BaseCommand
+from django.db.transaction import atomic
+
+from blocks.models import TxOutput, UnspentOutput
+from blocks.utils.utxo import refresh_balances
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-b",
+            "--batch-size",
+            help="The number of UTXO rows inserted per statement",
+            dest="batch_size",
+            default=5000,
+        )
+
+    @atomic
+    def handle(self, *args, **options):
+        """
+        Rebuild the UTXO set and address balances from the outputs table
+        """
+        batch_size = int(options["batch_size"])
+        deleted = UnspentOutput.objects.all().delete()
+        logger.info("Removed UTXOs: {}".format(deleted))
+
+        unspent = (
+            TxOutput.objects.filter(
+                input__isnull=True,
+                address__isnull=False,
+                transaction__block__height__isnull=False,
+            )
+            .values_list("id", "address_id", "value")
+            .iterator(chunk_size=batch_size)
+        )
+        rows = []
+        total = 0
+
+        for output_id, address_id, value in unspent:
+            rows.append(
+                UnspentOutput(output_id=output_id, address_id=address_id, value=value)
+            )
+
+            if len(rows) == batch_size:
+                UnspentOutput.objects.bulk_create(rows)
+                total += len(rows)
+                rows = []
+                logger.info("Inserted {} UTXOs".format(total))
+
+        UnspentOutput.objects.bulk_create(rows)
+        total += len(rows)
+        logger.info("Inserted {} UTXOs".format(total))
+
+        refresh_balances()
+        logger.info("Refreshed address balances")
@@ -0,0 +1,17 @@
+import logging
+
+from django.core.management import BaseCommand
+from django.utils.timezone import now
+
+from blocks.utils.info import apply_info_retention
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    def handle(self, *args, **options):
+        """
+        Compact all of the Info rows older than each INFO_RETENTION age
+        """
+        removed = apply_info_retention(now())
+        logger.info("Removed {} info rows".format(removed))
@@ -11,7 +11,8 @@ from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.timezone import make_aware
 
-from blocks.models import Info, Block, Peer
+from blocks.models import Block, Peer
+from blocks.utils.info import record_info
 from blocks.utils.rpc import send_rpc
 
 logger = logging.getLogger(__name__)
@@ -33,15 +34,7 @@ class Command(BaseCommand):
             if not rpc:
                 continue
 
-            info = Info.objects.create(
-                unit=rpc["walletunit"],
-                max_height=rpc["blocks"],
-                money_supply=rpc["moneysupply"],
-                total_parked=rpc.get("totalparked"),
-                connections=rpc["connections"],
-                difficulty=rpc["difficulty"],
-                pay_tx_fee=rpc["paytxfee"],
-            )
+            info = record_info(rpc)
 
             logger.info("saved {}".format(info))
 
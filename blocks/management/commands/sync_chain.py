@@ -0,0 +1,72 @@
+import logging
+
+from django.core.management import BaseCommand
+from django.db.models import Max
+
+from blocks.models import Block
+from blocks.utils.info import get_latest_infos
+from blocks.utils.sync import RangeSync
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-s",
+            "--start-height",
+            help="The block height to start the sync from. Defaults to the highest block + 1",
+            dest="start_height",
+            default=None,
+        )
+        parser.add_argument(
+            "-e",
+            "--end-height",
+            help="The block height to sync to. Defaults to the latest daemon height",
+            dest="end_height",
+            default=None,
+        )
+        parser.add_argument(
+            "-c",
+            "--chunk-size",
+            help="The number of blocks fetched per chunk",
+            dest="chunk_size",
+            default=None,
+        )
+        parser.add_argument(
+            "-w",
+            "--workers",
+            help="The number of concurrent rpc workers",
+            dest="workers",
+            default=None,
+        )
+        parser.add_argument(
+            "-n",
+            "--name",
+            help="The checkpoint name. Re-use a name to resume an interrupted sync",
+            dest="name",
+            default="range_sync",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Download a range of blocks in height order, resuming from the last checkpoint
+        """
+        start_height = options["start_height"]
+
+        if start_height is None:
+            top_height = Block.objects.aggregate(Max("height"))["height__max"]
+            start_height = top_height + 1 if top_height is not None else 0
+
+        end_height = options["end_height"]
+
+        if end_height is None:
+            end_height = max(info.max_height for info in get_latest_infos().values())
+
+        RangeSync(
+            int(start_height),
+            int(end_height),
+            name=options["name"],
+            chunk_size=int(options["chunk_size"]) if options["chunk_size"] else None,
+            workers=int(options["workers"]) if options["workers"] else None,
+        ).run()
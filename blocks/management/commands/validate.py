@@ -1,19 +1,13 @@
 import logging
-import time
 
-from channels import Channel
 from django.core.management import BaseCommand
-from django.core.paginator import Paginator
-from django.db import connection
-from django.db.models import Min
-from django.utils import timezone
+from django.db.models import Max
 
 from blocks.models import Block
+from blocks.utils.validation import RangeValidator, send_for_repair
 
 logger = logging.getLogger(__name__)
 
-tz = timezone.get_current_timezone()
-
 
 class Command(BaseCommand):
     def add_arguments(self, parser):
@@ -37,83 +31,65 @@ class Command(BaseCommand):
         parser.add_argument(
             "-la", "--last", help="use the last x blocks", dest="last", default=None
         )
+        parser.add_argument(
+            "-p",
+            "--processes",
+            help="number of processes used to hash block headers",
+            dest="processes",
+            default=None,
+        )
+        parser.add_argument(
+            "-m",
+            "--merkle",
+            help="check the merkle root of each block's transactions too",
+            dest="merkle",
+            action="store_true",
+        )
+        parser.add_argument(
+            "-r",
+            "--repair",
+            help="send the failing blocks for repair",
+            dest="repair",
+            action="store_true",
+        )
 
     def handle(self, *args, **options):
         """
-        Parse the block chain
+        Validate the headers and linkage of a range of blocks
         """
+        top_height = Block.objects.aggregate(Max("height"))["height__max"]
+
+        if top_height is None:
+            logger.info("no blocks to validate")
+            return
+
+        start_height = int(options["start_height"])
+        end_height = top_height
+
         if options["block"]:
-            blocks = Block.objects.filter(height=options["block"]).order_by("height")
-        else:
-            # no block specified so validate all blocks starting from start_height
-            blocks = (
-                Block.objects.filter(height__gte=options["start_height"])
-                .exclude(height__isnull=True)
-                .order_by("height")
-            )
+            start_height = end_height = int(options["block"])
 
         if options["last"]:
-            blocks = blocks[blocks.count() - int(options["last"]) :]
+            start_height = max(top_height - int(options["last"]) + 1, 0)
 
         if options["limit"]:
-            blocks = blocks[: int(options["limit"])]
+            end_height = min(start_height + int(options["limit"]) - 1, top_height)
+
+        failing_heights = RangeValidator(
+            start_height,
+            end_height,
+            processes=int(options["processes"]) if options["processes"] else None,
+            merkle=options["merkle"],
+        ).run()
+
+        for height in failing_heights:
+            self.stdout.write(str(height))
 
         logger.info(
-            "validating {} blocks starting from {}".format(
-                blocks.count(), blocks.aggregate(Min("height"))["height__min"]
+            "({} of {} blocks invalid)".format(
+                len(failing_heights), end_height - start_height + 1
             )
         )
 
-        # paginate to speed the initial load up a bit
-        paginator = Paginator(blocks, 1000)
-
-        invalid_blocks = []
-        total_blocks = 0
-
-        try:
-            for page_num in paginator.page_range:
-                page_invalid_blocks = []
-
-                for block in paginator.page(page_num):
-                    total_blocks += 1
-
-                    if block.height == 0:
-                        continue
-
-                    if not block.is_valid:
-                        page_invalid_blocks.append(block)
-                        block.validate_block_height()
-                        new_block = block.set_existing_block_height_if_found()
-
-                        if new_block:
-                            block = new_block
-
-                        block.check_validity()
-
-                    for tx in block.transactions.all():
-                        if not tx.is_valid:
-                            if block not in page_invalid_blocks:
-                                page_invalid_blocks.append(block)
-                            Channel("repair_transaction").send(
-                                {
-                                    "chain": connection.tenant.schema_name,
-                                    "tx_id": tx.tx_id,
-                                }
-                            )
-
-                logger.info(
-                    f"({total_blocks} blocks validated with {len(page_invalid_blocks)} invalid blocks found this round)"
-                )
-
-                if len(page_invalid_blocks) > 0:
-                    # sleep to let the channel empty a bit
-                    # maximum of 600 seconds
-                    sleep_time = 10 * len(page_invalid_blocks)
-                    time.sleep(sleep_time if sleep_time <= 600 else 600)
-
-                invalid_blocks += page_invalid_blocks
-
-        except KeyboardInterrupt:
-            pass
-
-        logger.info("({} invalid blocks)".format(len(invalid_blocks)))
+        if options["repair"]:
+            send_for_repair(failing_heights)
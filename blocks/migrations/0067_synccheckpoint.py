@@ -0,0 +1,32 @@
+# Generated by Django 2.2.28 on 2026-10-17 21:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blocks", "0066_auto_20200929_1304"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("start_height", models.BigIntegerField()),
+                ("end_height", models.BigIntegerField()),
+                ("height", models.BigIntegerField(blank=True, null=True)),
+                ("time_updated", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
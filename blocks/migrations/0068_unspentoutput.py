@@ -0,0 +1,44 @@
+# Generated by Django 2.2.28 on 2026-10-17 21:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blocks", "0067_synccheckpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="address",
+            name="current_balance",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="UnspentOutput",
+            fields=[
+                (
+                    "output",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="unspent",
+                        serialize=False,
+                        to="blocks.TxOutput",
+                    ),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+                (
+                    "address",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="unspent_outputs",
+                        related_query_name="unspent_output",
+                        to="blocks.Address",
+                    ),
+                ),
+            ],
+        ),
+    ]
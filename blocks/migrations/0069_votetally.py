@@ -0,0 +1,75 @@
+# Generated by Django 2.2.28 on 2026-10-17 21:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blocks", "0068_unspentoutput"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VoteWindow",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("height", models.BigIntegerField(blank=True, null=True)),
+                ("sharedays_destroyed", models.BigIntegerField(default=0)),
+                ("time_updated", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="VoteTally",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "vote_type",
+                    models.CharField(
+                        choices=[("motion", "Motion"), ("custodian", "Custodian")],
+                        max_length=20,
+                    ),
+                ),
+                ("hash", models.CharField(blank=True, max_length=255, null=True)),
+                (
+                    "amount",
+                    models.DecimalField(
+                        blank=True, decimal_places=8, max_digits=25, null=True
+                    ),
+                ),
+                ("number_of_votes", models.BigIntegerField(default=0)),
+                ("sharedays_destroyed", models.BigIntegerField(default=0)),
+                ("first_seen", models.BigIntegerField(blank=True, null=True)),
+                (
+                    "address",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="blocks.Address",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("vote_type", "hash", "address", "amount")},
+                "index_together": {("vote_type", "number_of_votes")},
+            },
+        ),
+    ]
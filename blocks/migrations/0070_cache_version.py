@@ -0,0 +1,23 @@
+# Generated by Django 2.2.28 on 2026-10-17 22:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blocks", "0069_votetally"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="block",
+            name="cache_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="cache_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
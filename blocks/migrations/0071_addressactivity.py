@@ -0,0 +1,76 @@
+# Generated by Django 2.2.28 on 2026-10-17 22:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blocks", "0070_cache_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AddressActivity",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("height", models.BigIntegerField()),
+                ("tx_index", models.BigIntegerField()),
+                ("delta", models.BigIntegerField(default=0)),
+                (
+                    "direction",
+                    models.CharField(
+                        choices=[
+                            ("received", "Received"),
+                            ("sent", "Sent"),
+                            ("both", "Both"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "address",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="activity",
+                        related_query_name="activity",
+                        to="blocks.Address",
+                    ),
+                ),
+                (
+                    "block",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="blocks.Block"
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="address_activity",
+                        related_query_name="address_activity",
+                        to="blocks.Transaction",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="addressactivity",
+            index=models.Index(
+                fields=["address", "-height", "-tx_index"],
+                name="blocks_addr_address_76d5b0_idx",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="addressactivity", unique_together={("address", "transaction")},
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.28 on 2026-10-17 22:16
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blocks", "0071_addressactivity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="block",
+            name="number_of_transactions",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="block",
+            name="solver",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="solved_blocks",
+                to="blocks.Address",
+            ),
+        ),
+        migrations.AddField(
+            model_name="block",
+            name="totals_transacted",
+            field=django.contrib.postgres.fields.jsonb.JSONField(
+                blank=True, default=list
+            ),
+        ),
+    ]
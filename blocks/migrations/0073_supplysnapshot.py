@@ -0,0 +1,66 @@
+# Generated by Django 2.2.28 on 2026-10-17 22:20
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("daio", "0013_chain_rpc_active"),
+        ("blocks", "0072_block_summary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SupplySnapshot",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.PositiveIntegerField(default=0)),
+                (
+                    "total_supply",
+                    models.DecimalField(decimal_places=4, default=0, max_digits=16),
+                ),
+                (
+                    "parked",
+                    models.DecimalField(decimal_places=4, default=0, max_digits=16),
+                ),
+                (
+                    "network_owned",
+                    models.DecimalField(decimal_places=8, default=0, max_digits=25),
+                ),
+                (
+                    "circulating_supply",
+                    models.DecimalField(decimal_places=8, default=0, max_digits=25),
+                ),
+                (
+                    "network_addresses",
+                    django.contrib.postgres.fields.jsonb.JSONField(default=list),
+                ),
+                (
+                    "network_funds",
+                    django.contrib.postgres.fields.jsonb.JSONField(default=list),
+                ),
+                (
+                    "exchange_balances",
+                    django.contrib.postgres.fields.jsonb.JSONField(default=list),
+                ),
+                ("time_updated", models.DateTimeField(auto_now=True)),
+                (
+                    "coin",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE, to="daio.Coin"
+                    ),
+                ),
+            ],
+        ),
+    ]
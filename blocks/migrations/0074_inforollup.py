@@ -0,0 +1,52 @@
+# Generated by Django 2.2.28 on 2026-10-17 22:42
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blocks", "0073_supplysnapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InfoRollup",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("hour", "Hour"), ("day", "Day")],
+                        db_index=True,
+                        max_length=10,
+                    ),
+                ),
+                ("start", models.DateTimeField(db_index=True)),
+                (
+                    "difficulty",
+                    models.DecimalField(
+                        blank=True, decimal_places=10, max_digits=16, null=True
+                    ),
+                ),
+                ("connections", models.BigIntegerField(blank=True, null=True)),
+                ("max_height", models.BigIntegerField(blank=True, null=True)),
+                (
+                    "supply",
+                    django.contrib.postgres.fields.jsonb.JSONField(default=dict),
+                ),
+                ("orphans", models.IntegerField(default=0)),
+                ("samples", models.IntegerField(default=0)),
+            ],
+            options={"ordering": ["start"], "unique_together": {("period", "start")},},
+        ),
+    ]
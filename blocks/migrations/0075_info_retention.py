@@ -0,0 +1,59 @@
+# Generated by Django 2.2.28 on 2026-10-17 22:45
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def set_latest_infos(apps, schema_editor):
+    Info = apps.get_model("blocks", "Info")
+    LatestInfo = apps.get_model("blocks", "LatestInfo")
+    # the most recent info of each unit
+    LatestInfo.objects.bulk_create(
+        [
+            LatestInfo(unit=info.unit, info=info)
+            for info in Info.objects.order_by("unit", "-time_added").distinct("unit")
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blocks", "0074_inforollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="info",
+            name="ranges",
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="info", name="samples", field=models.IntegerField(default=1),
+        ),
+        migrations.CreateModel(
+            name="LatestInfo",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("unit", models.CharField(max_length=255, unique=True)),
+                (
+                    "info",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="latest",
+                        to="blocks.Info",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(set_latest_infos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 2.2.28 on 2026-10-17 22:53
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("daio", "0013_chain_rpc_active"),
+        ("blocks", "0075_info_retention"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ParkRateSchedule",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hash", models.CharField(max_length=64, unique=True)),
+                ("rates", django.contrib.postgres.fields.jsonb.JSONField(default=list)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ActiveParkRateRange",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("valid_from", models.BigIntegerField()),
+                ("valid_to", models.BigIntegerField(blank=True, null=True)),
+                (
+                    "coin",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="daio.Coin"
+                    ),
+                ),
+                (
+                    "schedule",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="blocks.ParkRateSchedule",
+                    ),
+                ),
+            ],
+            options={"ordering": ["valid_from"],},
+        ),
+        migrations.AddField(
+            model_name="parkratevote",
+            name="schedule",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="blocks.ParkRateSchedule",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="activeparkraterange",
+            index=models.Index(
+                fields=["coin", "valid_from"], name="blocks_acti_coin_id_a6b0cf_idx"
+            ),
+        ),
+    ]
@@ -1,19 +1,35 @@
 from .block import Block
 from .network import (
     ActiveParkRate,
+    ActiveParkRateRange,
     ExchangeBalance,
     Info,
+    InfoRollup,
+    LatestInfo,
     NetworkFund,
     Orphan,
     Peer,
+    SupplySnapshot,
+    SyncCheckpoint,
+)
+from .transaction import (
+    Transaction,
+    TxInput,
+    TxOutput,
+    Address,
+    UnspentOutput,
+    AddressActivity,
+    WatchAddress,
 )
-from .transaction import Transaction, TxInput, TxOutput, Address, WatchAddress
 from .votes import (
     CustodianVote,
     FeesVote,
     MotionVote,
     ParkRate,
+    ParkRateSchedule,
     ParkRateVote,
+    VoteTally,
+    VoteWindow,
 )
 
 __all__ = [
@@ -22,16 +38,26 @@ __all__ = [
     "TxInput",
     "TxOutput",
     "Address",
+    "UnspentOutput",
+    "AddressActivity",
     "WatchAddress",
     "CustodianVote",
     "MotionVote",
     "ParkRateVote",
     "FeesVote",
     "ParkRate",
+    "ParkRateSchedule",
+    "VoteTally",
+    "VoteWindow",
     "ActiveParkRate",
+    "ActiveParkRateRange",
     "Info",
+    "InfoRollup",
+    "LatestInfo",
     "Peer",
     "Orphan",
     "NetworkFund",
     "ExchangeBalance",
+    "SyncCheckpoint",
+    "SupplySnapshot",
 ]
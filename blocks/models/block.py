@@ -2,21 +2,40 @@ import codecs
 import hashlib
 import logging
 import time
+from collections import Counter
 from datetime import datetime
 from decimal import Decimal
 
 
 from django.contrib.postgres.fields import JSONField, ArrayField
-from django.core.cache import cache
+from django.conf import settings
 from django.db import connection, models
-from django.db.models import Max, Sum
+from django.db.models import Sum
+from django.db.transaction import atomic
 from django.db.utils import IntegrityError
 from django.utils.timezone import make_aware
 
-from .network import ActiveParkRate, Orphan
-from .transaction import Transaction, TxInput, TxOutput, Address
-from .votes import CustodianVote, FeesVote, MotionVote, ParkRate, ParkRateVote
-from daio.celery import app
+from .network import Orphan
+from .transaction import TxInput, TxOutput, Address
+from .votes import (
+    CustodianVote,
+    FeesVote,
+    MotionVote,
+    ParkRateVote,
+    VoteTally,
+)
+from blocks.utils.cache import serialized_cache
+from blocks.utils.ingest import ingest_rpc_transactions
+from blocks.utils import merkle
+from blocks.utils.park_rates import (
+    get_active_ranges,
+    get_schedule,
+    set_active_schedule,
+)
+from blocks.utils.repair import schedule_repair
+from blocks.utils.summary import summarize_block
+from blocks.utils.utxo import connect_block
+from blocks.utils.vote_tally import get_vote_window, invalidate_vote_window
 
 from daio.models import Chain, Coin
 
@@ -61,73 +80,101 @@ class Block(models.Model):
     validity_errors = ArrayField(
         base_field=models.CharField(max_length=150), blank=True, null=True
     )
+    # bumped on every save. cached serializations are keyed on it
+    cache_version = models.PositiveIntegerField(default=0)
+    # aggregates over the transactions, stored by blocks.utils.summary.
+    # number_of_transactions is None until the block has been summarized
+    number_of_transactions = models.IntegerField(blank=True, null=True)
+    solver = models.ForeignKey(
+        Address,
+        related_name="solved_blocks",
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+    totals_transacted = JSONField(default=list, blank=True)
 
     def __str__(self):
         return "{}:{}".format(self.height, self.hash[:8])
 
+    def save(self, *args, **kwargs):
+        if self.pk and self.is_valid:
+            # this version's cached payload is about to be out of date
+            serialized_cache.delete(self.cache_key)
+
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+
+        # bumped in the database as ingest and orphaning bump it behind our back
+        self.cache_version = models.F("cache_version") + 1
+
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = list(kwargs["update_fields"]) + ["cache_version"]
+
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=["cache_version"])
+
+    @property
+    def cache_key(self):
+        return "{}_{}_{}".format(connection.schema_name, self.hash, self.cache_version)
+
     @property
     def class_type(self):
         return "Block"
 
     def send_for_repair(self):
-        app.send_task(
-            "blocks.tasks.blocks.validate_block",
-            kwargs={"block_hash": self.hash},
-            queue="high_priority",
-        )
+        schedule_repair("validate_block", queue="high_priority", block_hash=self.hash)
 
     def serialize(self):
-        serialized_block = None
-        self.validate()
-
-        if self.is_valid:
-            serialized_block = cache.get(
-                "{}_{}".format(connection.tenant.schema_name, self.hash)
-            )
-        else:
+        """
+        Valid blocks are served from the cache if this version has been serialized.
+        Invalid blocks are sent to be validated and repaired by the workers
+        """
+        if not self.is_valid:
             self.send_for_repair()
+        else:
+            serialized_block = serialized_cache.get(self.cache_key)
+
+            if serialized_block is not None:
+                return serialized_block
+
+        serialized_block = {
+            "hash": self.hash,
+            "height": self.height,
+            "size": self.size,
+            "version": self.version,
+            "merkleroot": self.merkle_root,
+            "time": (
+                datetime.strftime(self.time, "%Y-%m-%d %H:%M:%S %Z")
+                if self.time
+                else None
+            ),
+            "nonce": self.nonce,
+            "bits": self.bits,
+            "difficulty": self.difficulty,
+            "mint": self.mint,
+            "flags": self.flags,
+            "proofhash": self.proof_hash,
+            "entropybit": self.entropy_bit,
+            "modifier": self.modifier,
+            "modifierchecksum": self.modifier_checksum,
+            "coinagedestroyed": self.coinage_destroyed,
+            "previousblockhash": (
+                self.previous_block.hash if self.previous_block else None
+            ),
+            "nextblockhash": (self.next_block.hash if self.next_block else None),
+            "valid": self.is_valid,
+            "number_of_transactions": self.transaction_count,
+            "solved_by": self.solved_by,
+        }
 
-        if serialized_block is None:
-            serialized_block = {
-                "hash": self.hash,
-                "height": self.height,
-                "size": self.size,
-                "version": self.version,
-                "merkleroot": self.merkle_root,
-                "time": (
-                    datetime.strftime(self.time, "%Y-%m-%d %H:%M:%S %Z")
-                    if self.time
-                    else None
-                ),
-                "nonce": self.nonce,
-                "bits": self.bits,
-                "difficulty": self.difficulty,
-                "mint": self.mint,
-                "flags": self.flags,
-                "proofhash": self.proof_hash,
-                "entropybit": self.entropy_bit,
-                "modifier": self.modifier,
-                "modifierchecksum": self.modifier_checksum,
-                "coinagedestroyed": self.coinage_destroyed,
-                "previousblockhash": (
-                    self.previous_block.hash if self.previous_block else None
-                ),
-                "nextblockhash": (self.next_block.hash if self.next_block else None),
-                "valid": self.is_valid,
-                "number_of_transactions": self.transactions.all().count(),
-                "solved_by": self.solved_by if self.solved_by else "",
-            }
-
-            self.validate()
-
-            if self.is_valid:
-                cache.set(
-                    "{}_{}".format(connection.tenant.schema_name, self.hash),
-                    serialized_block,
-                )
+        if self.is_valid:
+            serialized_cache.set(self.cache_key, serialized_block, height=self.height)
 
         return serialized_block
 
+    @atomic
     def parse_rpc_block(self, rpc_block):
         self.height = rpc_block.get("height")
         logger.info(f"parsing block {self}")
@@ -179,6 +226,12 @@ class Block(models.Model):
         # now we do the transactions
         self.parse_rpc_transactions(rpc_block.get("tx", []))
 
+        # and apply them to the UTXO set
+        if self.height is not None:
+            connect_block(self)
+
+        summarize_block(self)
+
         # save the votes too
         self.parse_rpc_votes(rpc_block.get("vote", {}))
 
@@ -189,33 +242,15 @@ class Block(models.Model):
 
     def parse_rpc_transactions(self, txs):
         logger.info(f"Parsing rpc transactions for block {self}")
-
-        tx_index = 0
-
-        for rpc_tx in txs:
-            tx, _ = Transaction.objects.get_or_create(tx_id=rpc_tx.get("txid"))
-
-            tx.block = self
-            tx.index = tx_index
-            tx.version = rpc_tx.get("version")
-            tx.lock_time = rpc_tx.get("lock_time")
-
-            tx.save()
-
-            input_index = 0
-
-            for rpc_input in rpc_tx.get("vin", []):
-                tx.parse_input(rpc_input, input_index)
-                input_index += 1
-
-            for rpc_output in rpc_tx.get("vout", []):
-                tx.parse_output(rpc_output)
-
-            tx.save()
+        return ingest_rpc_transactions(self, txs)
 
     def parse_rpc_votes(self, votes):
         logger.info(f"Parsing rpc votes for block {self}")
 
+        # the vote window tallies need recounting if they already include this block
+        if self.height is not None:
+            invalidate_vote_window(self.height)
+
         # custodian votes
         for custodian_vote in votes.get("custodians", []):
             custodian_address = custodian_vote.get("address")
@@ -239,6 +274,8 @@ class Block(models.Model):
                 continue
 
         # motion votes
+        motion_objects = []
+
         for motion_vote in votes.get("motions", []):
             try:
                 motion_object, _ = MotionVote.objects.get_or_create(
@@ -248,26 +285,39 @@ class Block(models.Model):
                 logger.warning(e)
                 continue
 
-            # calculate block percentage
-            motion_votes = MotionVote.objects.filter(
-                block__height__gte=max(self.height - 10000, 0),
-                block__height__lte=self.height,
-                hash=motion_vote,
-            )
+            motion_objects.append(motion_object)
 
-            motion_object.blocks_percentage = (motion_votes.count() / 10000) * 100
+        if self.height is not None:
+            # move the vote window up to this block now its votes are saved
+            vote_window = get_vote_window(self.height)
+            tallies = {
+                tally.hash: tally
+                for tally in VoteTally.objects.filter(
+                    vote_type=VoteTally.MOTION,
+                    hash__in=[motion.hash for motion in motion_objects],
+                )
+            }
 
-            # calculate the ShareDays Destroyed percentage
-            total_sdd = Block.objects.filter(
-                height__gte=max(self.height - 10000, 0), height__lte=self.height
-            ).aggregate(Sum("coinage_destroyed"))["coinage_destroyed__sum"]
+            for motion_object in motion_objects:
+                tally = tallies.get(motion_object.hash)
 
-            voted_sdd = motion_votes.aggregate(Sum("block__coinage_destroyed"))[
-                "block__coinage_destroyed__sum"
-            ]
+                if not tally:
+                    continue
 
-            motion_object.sdd_percentage = (voted_sdd / total_sdd) * 100
-            motion_object.save()
+                # calculate block percentage
+                motion_object.block_percentage = (
+                    tally.number_of_votes / settings.VOTE_WINDOW
+                ) * 100
+
+                # calculate the ShareDays Destroyed percentage
+                if vote_window.sharedays_destroyed:
+                    motion_object.sdd_percentage = (
+                        tally.sharedays_destroyed / vote_window.sharedays_destroyed
+                    ) * 100
+
+            MotionVote.objects.bulk_update(
+                motion_objects, ["block_percentage", "sdd_percentage"]
+            )
 
         # fees votes
         fee_votes = votes.get("fees", {})
@@ -299,42 +349,29 @@ class Block(models.Model):
             except Coin.DoesNotExist:
                 continue
 
-            try:
-                vote, _ = ParkRateVote.objects.get_or_create(block=self, coin=coin)
-            except (ParkRateVote.DoesNotExist, IntegrityError) as e:
-                logger.warning(e)
-                continue
-
-            for rate in park_rate_vote.get("rates", []):
-                blocks = rate.get("blocks")
+            rates = park_rate_vote.get("rates", [])
 
-                if blocks is None:
+            for rate in rates:
+                if rate.get("blocks") is None:
                     logger.error(
                         "Got blocks = None when parsing Park Rate Votes for {}".format(
                             self
                         )
                     )
 
-                this_rate = rate.get("rate")
-
-                if this_rate is None:
+                if rate.get("rate") is None:
                     logger.error(
                         "Got rate = None when parsing Park Rate Votes for {}".format(
                             self
                         )
                     )
-                try:
-                    park_rate, _ = ParkRate.objects.get_or_create(
-                        blocks=blocks, rate=this_rate
-                    )
-                except (ParkRate.DoesNotExist, IntegrityError) as e:
-                    logger.warning(e)
-                    continue
 
-                try:
-                    vote.rates.add(park_rate)
-                except IntegrityError as e:
-                    logger.warning(e)
+            try:
+                ParkRateVote.objects.update_or_create(
+                    block=self, coin=coin, defaults={"schedule": get_schedule(rates)}
+                )
+            except (ParkRateVote.DoesNotExist, IntegrityError) as e:
+                logger.warning(e)
 
     def parse_rpc_parkrates(self, rates):
         logger.info(f"Parsing rpc park rates for block {self}")
@@ -347,302 +384,251 @@ class Block(models.Model):
             except Coin.DoesNotExist:
                 continue
 
-            try:
-                active_rate, _ = ActiveParkRate.objects.get_or_create(
-                    block=self, coin=coin
-                )
-            except (ActiveParkRate.DoesNotExist, IntegrityError) as e:
-                logger.warning(e)
+            if self.height is None:
                 continue
 
-            for rate in park_rate.get("rates", []):
-                try:
-                    park_rate, _ = ParkRate.objects.get_or_create(
-                        blocks=rate.get("blocks", 0), rate=rate.get("rate")
-                    )
-                except (ParkRate.DoesNotExist, IntegrityError) as e:
-                    logger.warning(e)
-                    continue
-
-                try:
-                    active_rate.rates.add(park_rate)
-                except IntegrityError as e:
-                    logger.warning(e)
+            set_active_schedule(
+                coin, self.height, get_schedule(park_rate.get("rates", []))
+            )
 
     def validate(self):
         logger.info(f"Validating block {self}")
 
         if self.height == 0:
-            self.is_valid = True
-            self.validity_errors = None
-            self.save()
+            self._set_validity([])
             return
 
         validation_errors = []
-        check_header = True
+        validation_errors += self._validate_header()
+        validation_errors += self._validate_chain()
+        validation_errors += self._validate_transactions()
+        validation_errors += self._validate_votes()
 
-        # first check the header attributes
-        for attribute in [
-            "self.height",
-            "self.version",
-            "self.previous_block",
-            "self.merkle_root",
-            "self.time",
-            "self.bits",
-            "self.nonce",
-        ]:
-            if eval(attribute) is None:
-                check_header = False
+        if validation_errors:
+            logger.warning(f"Found validation errors: {', '.join(validation_errors)}")
 
-        # check if height is None
-        if self.height is None:
-            validation_errors.append("height is None")
+        self._set_validity(validation_errors)
+
+    def _set_validity(self, validation_errors):
+        """
+        Save the validation result, only touching the database if it has changed
+        """
+        is_valid = not validation_errors
+        validity_errors = list(set(validation_errors)) if validation_errors else None
+
+        if is_valid == self.is_valid and set(validity_errors or []) == set(
+            self.validity_errors or []
+        ):
+            return
+
+        if not is_valid:
+            logger.info(f"Setting {self}.is_valid to False")
+
+        self.is_valid = is_valid
+        self.validity_errors = validity_errors
+
+        if self.pk:
+            self.save(update_fields=["is_valid", "validity_errors"])
         else:
-            top_height = Block.objects.all().aggregate(Max("height"))
+            self.save()
+
+    def _validate_header(self):
+        validation_errors = []
 
-            if (top_height["height__max"] > self.height) and not self.next_block:
-                validation_errors.append("missing next block")
+        for attribute in [
+            "height",
+            "version",
+            "previous_block_id",
+            "merkle_root",
+            "time",
+            "bits",
+            "nonce",
+        ]:
+            if getattr(self, attribute) is None:
+                return ["missing header attribute"]
 
         # calculate the header in bytes (little endian)
-        if check_header:
-            header_bytes = (
-                self.version.to_bytes(4, "little")
-                + codecs.decode(self.previous_block.hash, "hex")[::-1]
-                + codecs.decode(self.merkle_root, "hex")[::-1]
-                + int(time.mktime(self.time.timetuple())).to_bytes(4, "little")
-                + codecs.decode(self.bits, "hex")[::-1]
-                + self.nonce.to_bytes(4, "little")
-            )
+        header_bytes = (
+            self.version.to_bytes(4, "little")
+            + codecs.decode(self.previous_block.hash, "hex")[::-1]
+            + codecs.decode(self.merkle_root, "hex")[::-1]
+            + int(time.mktime(self.time.timetuple())).to_bytes(4, "little")
+            + codecs.decode(self.bits, "hex")[::-1]
+            + self.nonce.to_bytes(4, "little")
+        )
 
-            # hash the header and fail if it doesn't match the one on record
-            header_hash = hashlib.sha256(hashlib.sha256(header_bytes).digest()).digest()
-            calc_hash = codecs.encode(header_hash[::-1], "hex")
+        # hash the header and fail if it doesn't match the one on record
+        header_hash = hashlib.sha256(hashlib.sha256(header_bytes).digest()).digest()
+        calc_hash = codecs.encode(header_hash[::-1], "hex")
 
-            if str.encode(self.hash) != calc_hash:
-                validation_errors.append("incorrect block hash")
-        else:
-            validation_errors.append(f"missing header attribute")
+        if str.encode(self.hash) != calc_hash:
+            validation_errors.append("incorrect block hash")
+
+        return validation_errors
+
+    def _validate_chain(self):
+        validation_errors = []
+
+        # check if height is None
+        if self.height is None:
+            validation_errors.append("height is None")
+        elif (
+            not self.next_block_id
+            and Block.objects.filter(height__gt=self.height).exists()
+        ):
+            validation_errors.append("missing next block")
 
         # check the previous block
-        if not self.previous_block:
+        if not self.previous_block_id:
             validation_errors.append("no previous block")
         else:
-            if not self.previous_block.hash:
+            previous_block = self.previous_block
+
+            if not previous_block.hash:
                 validation_errors.append("no previous block hash")
 
             # check that previous block height has height and is this height - 1
-            if self.previous_block.height is None:
+            if previous_block.height is None:
                 validation_errors.append("Previous block height is None")
-            else:
-                if self.height:
-                    if self.previous_block.height != (self.height - 1):
-                        validation_errors.append("incorrect previous height")
-
-                    if self.height > 2:
-                        if self.previous_block.previous_block is None:
-                            validation_errors.append(
-                                "previous block has no previous block"
-                            )
-                        else:
-                            if self.previous_block.previous_block.height is None:
-                                validation_errors.append(
-                                    "previous blocks previous block height is None"
-                                )
+            elif self.height:
+                if previous_block.height != (self.height - 1):
+                    validation_errors.append("incorrect previous height")
+
+                if self.height > 2:
+                    if previous_block.previous_block_id is None:
+                        validation_errors.append("previous block has no previous block")
+                    elif previous_block.previous_block.height is None:
+                        validation_errors.append(
+                            "previous blocks previous block height is None"
+                        )
 
             # check the previous block next block is this block
-            if self.previous_block.next_block != self:
+            if previous_block.next_block_id != self.pk:
                 validation_errors.append("previous block does not point to this block")
 
         # check the next block
-        if self.next_block:
+        if self.next_block_id:
+            next_block = self.next_block
+
             if self.height:
-                if self.next_block.height != (self.height + 1):
+                if next_block.height != (self.height + 1):
                     validation_errors.append("incorrect next height")
 
             # check the next block has this block as it's previous block
-            if self.next_block.previous_block != self:
+            if next_block.previous_block_id != self.pk:
                 validation_errors.append("next block does not lead on from this block")
 
-        # calculate merkle root of transactions
+        return validation_errors
+
+    def _validate_transactions(self):
+        validation_errors = []
         transactions = list(
-            self.transactions.all().order_by("index").values_list("tx_id", flat=True)
+            self.transactions.all().order_by("index").values_list("index", "tx_id")
         )
-        merkle_root = self._calculate_merkle_root(transactions)
 
-        if isinstance(merkle_root, bytes):
-            merkle_root = merkle_root.decode()
-
-        if merkle_root != self.merkle_root:
+        # calculate merkle root of transactions
+        if merkle.merkle_root([tx_id for _, tx_id in transactions]) != self.merkle_root:
             validation_errors.append("merkle root incorrect")
 
         # check the indexes on transactions are incremental
-        for x in range(self.transactions.all().count()):
-            if self.transactions.filter(index=x).count() != 1:
-                validation_errors.append("incorrect tx indexing")
+        indexes = Counter(index for index, _ in transactions)
 
-        # check that the serialized votes match the saved raw votes
-        # custodian votes
-        custodians = []
-
-        for custodian_vote in self.custodianvote_set.all():
-            custodians.append(
-                {
-                    "address": custodian_vote.address.address,
-                    "amount": float(custodian_vote.amount),
-                }
-            )
+        if any(indexes[x] != 1 for x in range(len(transactions))):
+            validation_errors.append("incorrect tx indexing")
 
-        if [c for c in custodians if c not in self.vote.get("custodians", [])]:
-            validation_errors.append("custodian votes do not match")
+        return validation_errors
 
-        # park rate votes
-        park_rate_votes = []
+    def _validate_votes(self):
+        """
+        check that the saved votes and park rates match the raw ones from the daemon
+        """
+        validation_errors = []
+        vote = self.vote or {}
 
-        for park_rate_coin in self.parkratevote_set.all().distinct("coin"):
-            coin_park_rates = {"unit": park_rate_coin.coin.unit_code, "rates": []}
+        # custodian votes
+        custodians = [
+            {"address": address, "amount": float(amount)}
+            for address, amount in self.custodianvote_set.values_list(
+                "address__address", "amount"
+            )
+        ]
 
-            for park_rate_vote in self.parkratevote_set.filter(
-                coin=park_rate_coin.coin
-            ):
-                for rate in park_rate_vote.rates.all():
-                    coin_park_rates["rates"].append(
-                        {"blocks": rate.blocks, "rate": rate.rate}
-                    )
-                park_rate_votes.append(coin_park_rates)
+        if [c for c in custodians if c not in vote.get("custodians", [])]:
+            validation_errors.append("custodian votes do not match")
 
-        for rate_vote in self.vote.get("parkrates", []):
-            raw_rate_vote = next(
-                (r for r in park_rate_votes if r["unit"] == rate_vote["unit"]), {}
-            )
+        # park rate votes. Votes not yet converted to a schedule load their rates
+        park_rate_votes = self._get_park_rates(
+            self.parkratevote_set.select_related("coin", "schedule")
+        )
 
+        for rate_vote in vote.get("parkrates", []):
             if [
                 r
                 for r in rate_vote.get("rates", [])
-                if r not in raw_rate_vote.get("rates", [])
+                if r not in park_rate_votes.get(rate_vote["unit"], [])
             ]:
                 validation_errors.append("park rate votes do not match")
 
         # motion votes
-        motions = []
+        motions = set(self.motionvote_set.values_list("hash", flat=True))
 
-        for motion in self.motionvote_set.all():
-            motions.append(motion.hash)
-
-        if [m for m in set(motions) if m not in set(self.vote.get("motions", []))]:
+        if motions - set(vote.get("motions", [])):
             validation_errors.append("motion votes do not match")
 
         # fee votes
-        fees = {}
-
-        for fee_vote in self.feesvote_set.all():
-            fees[fee_vote.coin.unit_code] = fee_vote.fee
+        fees = set(self.feesvote_set.values_list("coin__unit_code", flat=True))
 
-        if [f for f in fees if f not in self.vote.get("fees", {})]:
+        if [f for f in fees if f not in vote.get("fees", {})]:
             validation_errors.append("fee votes do not match")
 
         # check active park rates against raw
-        active_park_rates = []
-
-        for apr in self.activeparkrate_set.all().distinct("coin"):
-            coin_park_rates = {"unit": apr.coin.unit_code, "rates": []}
-
-            for park_rate in self.activeparkrate_set.filter(coin=apr.coin):
-                for rate in park_rate.rates.all():
-                    coin_park_rates["rates"].append(
-                        {"blocks": rate.blocks, "rate": rate.rate}
-                    )
-                active_park_rates.append(coin_park_rates)
-
-        raw_park_rates = self.park_rates if self.park_rates is not None else []
-
-        for park_rate in raw_park_rates:
-            raw_rate = next(
-                (r for r in active_park_rates if r["unit"] == park_rate["unit"]), {}
-            )
+        active_park_rates = self._get_park_rates(
+            get_active_ranges(self.height) if self.height is not None else []
+        )
 
+        for park_rate in self.park_rates if self.park_rates is not None else []:
             if [
                 p
                 for p in park_rate.get("rates", [])
-                if p not in raw_rate.get("rates", [])
+                if p not in active_park_rates.get(park_rate["unit"], [])
             ]:
                 validation_errors.append("active park rates do not match")
 
-        if validation_errors:
-            logger.warning(f"Found validation errors: {', '.join(validation_errors)}")
-            logger.info(f"Setting {self}.is_valid to False")
-            self.is_valid = False
-            self.validity_errors = list(set(validation_errors))
-            self.save()
-        else:
-            self.is_valid = True
-            self.validity_errors = None
-            self.save()
+        return validation_errors
 
-    def _calculate_merkle_root(self, hash_list):
-        def merkle_hash(a, b):
-            # Reverse inputs before and after hashing
-            # due to big-endian / little-endian nonsense
-            a1 = codecs.decode(a, "hex")[::-1]
-            b1 = codecs.decode(b, "hex")[::-1]
-            h = hashlib.sha256(hashlib.sha256(a1 + b1).digest()).digest()
-            return codecs.encode(h[::-1], "hex")
-
-        if not hash_list:
-            return "".encode()
-        if len(hash_list) == 1:
-            return hash_list[0]
-        new_hash_list = []
-        # Process pairs. For odd length, the last is skipped
-        for i in range(0, len(hash_list) - 1, 2):
-            new_hash_list.append(merkle_hash(hash_list[i], hash_list[i + 1]))
-        if len(hash_list) % 2 == 1:  # odd, hash last item twice
-            new_hash_list.append(merkle_hash(hash_list[-1], hash_list[-1]))
-        return self._calculate_merkle_root(new_hash_list)
+    @staticmethod
+    def _get_park_rates(park_rate_sets):
+        """
+        Return a dict of unit code: list of rates for ParkRateVote or
+        ActiveParkRateRange
+        """
+        park_rates = {}
 
-    @property
-    def solved_by(self):
-        index = 1
+        for park_rate_set in park_rate_sets:
+            park_rates.setdefault(park_rate_set.coin.unit_code, []).extend(
+                park_rate_set.rate_list
+            )
 
-        if self.flags == "proof-of-work":
-            index = 0
+        return park_rates
 
-        for tx in self.transactions.all():
-            if tx.index == index:
-                for tx_out in tx.outputs.all():
-                    if tx_out.index == index:
-                        if not tx_out.address:
-                            return ""
-                        return tx_out.address.address
-        return ""
+    def summarize(self):
+        if self.number_of_transactions is None:
+            summarize_block(self)
 
     @property
-    def solved_by_address(self):
-        index = 1
+    def transaction_count(self):
+        self.summarize()
+        return self.number_of_transactions
 
-        if self.flags == "proof-of-work":
-            index = 0
-
-        for tx in self.transactions.all():
-            if tx.index == index:
-                for tx_out in tx.outputs.all():
-                    if tx_out.index == index:
-                        if not tx_out.address:
-                            return None
-                        return tx_out.address
-        return None
+    @property
+    def solved_by(self):
+        solver = self.solved_by_address
+        return solver.address if solver else ""
 
     @property
-    def totals_transacted(self):
-        chain = connection.tenant
-        totals = []
-        for coin in chain.coins.all():
-            coin_total = {"name": coin.code, "value": 0}
-            for tx in self.transactions.all():
-                if tx.coin != coin:
-                    continue
-                coin_total["value"] += tx.balance
-            totals.append(coin_total)
-        return totals
+    def solved_by_address(self):
+        self.summarize()
+        return self.solver
 
     @property
     def outputs(self):
@@ -1,3 +1,4 @@
+from django.contrib.postgres.fields import JSONField
 from django.db import models
 from django.utils.timezone import now
 
@@ -42,6 +43,10 @@ class Info(models.Model):
     difficulty = models.DecimalField(max_digits=16, decimal_places=10)
     pay_tx_fee = models.DecimalField(max_digits=16, decimal_places=4)
     time_added = models.DateTimeField(auto_now_add=True, db_index=True)
+    # rows compacted by blocks.utils.info keep the last values of the rows they
+    # replace, how many there were and {field: [min, max]} across them
+    samples = models.IntegerField(default=1)
+    ranges = JSONField(blank=True, null=True)
 
     objects = InfoManager()
 
@@ -49,6 +54,51 @@ class Info(models.Model):
         return "{}:{}@{}".format(self.unit, self.max_height, self.time_added)
 
 
+class LatestInfo(models.Model):
+    """
+    Points at the most recent Info of each unit so it can be read without
+    searching the Info table
+    """
+
+    unit = models.CharField(max_length=255, unique=True)
+    info = models.OneToOneField(Info, related_name="latest", on_delete=models.CASCADE)
+
+    def __str__(self):
+        return "{}:{}".format(self.unit, self.info_id)
+
+
+class InfoRollup(models.Model):
+    """
+    The network info and orphan count over an hour or a day.
+    Built from Info and Orphan rows by blocks.utils.rollups
+    """
+
+    HOUR = "hour"
+    DAY = "day"
+
+    period = models.CharField(
+        max_length=10, choices=((HOUR, "Hour"), (DAY, "Day")), db_index=True
+    )
+    start = models.DateTimeField(db_index=True)
+    # the last values reported in the period
+    difficulty = models.DecimalField(
+        max_digits=16, decimal_places=10, blank=True, null=True
+    )
+    connections = models.BigIntegerField(blank=True, null=True)
+    max_height = models.BigIntegerField(blank=True, null=True)
+    # unit: {"money_supply": float, "total_parked": float}
+    supply = JSONField(default=dict)
+    orphans = models.IntegerField(default=0)
+    samples = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("period", "start")
+        ordering = ["start"]
+
+    def __str__(self):
+        return "{}@{}".format(self.period, self.start)
+
+
 class Peer(models.Model):
     address = models.GenericIPAddressField(unique=True)
     port = models.IntegerField()
@@ -72,6 +122,27 @@ class Orphan(models.Model):
     date_time = models.DateTimeField(default=now, db_index=True)
 
 
+class SyncCheckpoint(models.Model):
+    """
+    Progress of a range sync so an interrupted sync can resume where it stopped
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    start_height = models.BigIntegerField()
+    end_height = models.BigIntegerField()
+    height = models.BigIntegerField(blank=True, null=True)
+    time_updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return "{}:{}@{}-{}".format(
+            self.name, self.height, self.start_height, self.end_height
+        )
+
+    @property
+    def complete(self):
+        return self.height is not None and self.height >= self.end_height
+
+
 class ActiveParkRate(models.Model):
     block = models.ForeignKey("Block", blank=True, null=True, on_delete=models.CASCADE)
     coin = models.ForeignKey(Coin, blank=True, null=True, on_delete=models.CASCADE)
@@ -81,6 +152,36 @@ class ActiveParkRate(models.Model):
         unique_together = ("block", "coin")
 
 
+class ActiveParkRateRange(models.Model):
+    """
+    The park rate schedule active for a coin from valid_from to valid_to inclusive.
+    The latest range is open ended. Ranges of a coin never overlap.
+    Maintained by blocks.utils.park_rates
+    """
+
+    coin = models.ForeignKey(Coin, on_delete=models.CASCADE)
+    schedule = models.ForeignKey("ParkRateSchedule", on_delete=models.PROTECT)
+    valid_from = models.BigIntegerField()
+    valid_to = models.BigIntegerField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["valid_from"]
+        indexes = [models.Index(fields=["coin", "valid_from"])]
+
+    def __str__(self):
+        return "{}:{}@{}-{}".format(
+            self.coin_id, self.schedule_id, self.valid_from, self.valid_to
+        )
+
+    @property
+    def park_rates(self):
+        return self.schedule.park_rates
+
+    @property
+    def rate_list(self):
+        return self.schedule.rates
+
+
 class NetworkFund(models.Model):
     """ "
     Network owned funds that should be removed from the Circulating currency calculation
@@ -100,3 +201,24 @@ class ExchangeBalance(models.Model):
     exchange = models.CharField(max_length=255, blank=True, null=True)
     api_url = models.URLField(max_length=255, blank=True, null=True)
     api_token = models.CharField(max_length=255, blank=True, null=True)
+
+
+class SupplySnapshot(models.Model):
+    """
+    The components of a coin's circulating supply.
+    Refreshed by blocks.utils.supply with version bumped each time
+    """
+
+    coin = models.OneToOneField(Coin, on_delete=models.CASCADE)
+    version = models.PositiveIntegerField(default=0)
+    total_supply = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    parked = models.DecimalField(max_digits=16, decimal_places=4, default=0)
+    network_owned = models.DecimalField(max_digits=25, decimal_places=8, default=0)
+    circulating_supply = models.DecimalField(max_digits=25, decimal_places=8, default=0)
+    network_addresses = JSONField(default=list)
+    network_funds = JSONField(default=list)
+    exchange_balances = JSONField(default=list)
+    time_updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return "{}:{}@{}".format(self.coin, self.version, self.time_updated)
@@ -1,18 +1,23 @@
-import codecs
-import hashlib
 import logging
 import time
 from datetime import datetime
 
 
 from django.contrib.postgres.fields import ArrayField
-from django.core.cache import cache
 from django.db import connection, models
-from django.db.models import Sum
 from django.utils.timezone import make_aware
 
-from blocks.utils.numbers import convert_to_satoshis, get_var_int_bytes
-from daio.celery import app
+from blocks.utils.cache import serialized_cache
+from blocks.utils.codec import (
+    COINBASE_INDEX,
+    NULL_HASH,
+    RawTransaction,
+    TxIn,
+    TxOut,
+    get_tx_id,
+)
+from blocks.utils.numbers import convert_to_satoshis
+from blocks.utils.repair import schedule_repair
 from daio.models import Chain, Coin
 
 logger = logging.getLogger(__name__)
@@ -49,6 +54,8 @@ class Transaction(models.Model):
     validity_errors = ArrayField(
         base_field=models.CharField(max_length=150), blank=True, null=True
     )
+    # bumped whenever the transaction or the outputs it spends change
+    cache_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return "{}:{}@{}".format(self.index, self.tx_id[:8], self.block)
@@ -56,54 +63,68 @@ class Transaction(models.Model):
     class Meta:
         ordering = ["index"]
 
+    def save(self, *args, **kwargs):
+        if self.pk and self.is_valid:
+            # this version's cached payload is about to be out of date
+            serialized_cache.delete(self.cache_key)
+
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+
+        # bumped in the database as ingest and orphaning bump it behind our back
+        self.cache_version = models.F("cache_version") + 1
+
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = list(kwargs["update_fields"]) + ["cache_version"]
+
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=["cache_version"])
+
+    @property
+    def cache_key(self):
+        return "{}_{}_{}".format(connection.schema_name, self.tx_id, self.cache_version)
+
     def send_for_repair(self):
-        app.send_task(
-            "blocks.tasks.transactions.validate_transaction",
-            kwargs={"tx_id": self.tx_id},
-            queue="high_priority",
-        )
+        schedule_repair("validate_transaction", queue="high_priority", tx_id=self.tx_id)
 
     def serialize(self):
-        serialized_tx = None
-        self.validate()
+        if not self.is_valid:
+            self.send_for_repair()
+        else:
+            serialized_tx = serialized_cache.get(self.cache_key)
+
+            if serialized_tx is not None:
+                return serialized_tx
+
+        serialized_tx = {
+            "tx_id": self.tx_id,
+            "index": self.index,
+            "version": self.version,
+            "time": (
+                datetime.strftime(self.time, "%Y-%m-%d %H:%M:%S %Z")
+                if self.time
+                else None
+            ),
+            "lock_time": self.lock_time,
+            "coin": self.coin.code if self.coin else None,
+            "inputs": [tx_input.serialize() for tx_input in self.inputs.all()],
+            "outputs": [tx_output.serialize() for tx_output in self.outputs.all()],
+            "valid": self.is_valid,
+            "total_input": self.total_input,
+            "total_output": self.total_output,
+            "address_inputs": self.address_inputs,
+            "address_outputs": self.address_outputs,
+            "balance": self.balance,
+            "coinbase": self.is_coinbase,
+        }
 
         if self.is_valid:
-            serialized_tx = cache.get(
-                "{}_{}".format(connection.tenant.schema_name, self.tx_id)
+            serialized_cache.set(
+                self.cache_key,
+                serialized_tx,
+                height=self.block.height if self.block else None,
             )
-        else:
-            self.send_for_repair()
-
-        if serialized_tx is None:
-            serialized_tx = {
-                "tx_id": self.tx_id,
-                "index": self.index,
-                "version": self.version,
-                "time": (
-                    datetime.strftime(self.time, "%Y-%m-%d %H:%M:%S %Z")
-                    if self.time
-                    else None
-                ),
-                "lock_time": self.lock_time,
-                "coin": self.coin.code if self.coin else None,
-                "inputs": [tx_input.serialize() for tx_input in self.inputs.all()],
-                "outputs": [tx_output.serialize() for tx_output in self.outputs.all()],
-                "valid": self.is_valid,
-                "total_input": self.total_input,
-                "total_output": self.total_output,
-                "address_inputs": self.address_inputs,
-                "address_outputs": self.address_outputs,
-                "balance": self.balance,
-                "coinbase": self.is_coinbase,
-            }
-
-            self.validate()
-
-            if self.is_valid:
-                cache.set(
-                    "{}_{}".format(connection.tenant.schema_name, self.tx_id),
-                    serialized_tx,
-                )
 
         return serialized_tx
 
@@ -250,17 +271,62 @@ class Transaction(models.Model):
             self.parse_output(vout)
 
         self.save()
+
+        if block.height is not None:
+            from blocks.utils.utxo import connect_transactions
+
+            connect_transactions(Transaction.objects.filter(pk=self.pk))
+
         logger.info("saved tx {}".format(self))
         return
 
+    def get_raw_transaction(self):
+        inputs = []
+
+        for tx_input in self.inputs.select_related(
+            "previous_output__transaction"
+        ).order_by("index"):
+            if tx_input.previous_output:
+                previous_tx_id = tx_input.previous_output.transaction.tx_id
+                previous_index = tx_input.previous_output.index
+                script_sig = tx_input.script_sig_hex
+            elif tx_input.coin_base:
+                previous_tx_id = NULL_HASH
+                previous_index = COINBASE_INDEX
+                script_sig = tx_input.coin_base
+            else:  # custodial grant
+                previous_tx_id = NULL_HASH
+                previous_index = int(self.coin.vout_n_value, 16)
+                script_sig = tx_input.coin_base
+
+            inputs.append(
+                TxIn(
+                    previous_tx_id,
+                    previous_index,
+                    bytes.fromhex(script_sig),
+                    tx_input.sequence,
+                )
+            )
+
+        return RawTransaction(
+            tx_id=self.tx_id,
+            version=self.version,
+            time=int(time.mktime(self.time.timetuple())),
+            inputs=inputs,
+            outputs=[
+                TxOut(tx_output.value, bytes.fromhex(tx_output.script_pub_key_hex))
+                for tx_output in self.outputs.order_by("index")
+            ],
+            lock_time=self.lock_time,
+            unit=self.coin.unit_code,
+        )
+
     def validate(self):
         logger.info(f"Validating transaction {self}")
 
         if self.block:
             if self.block.height == 0:
-                self.is_valid = True
-                self.validity_errors = None
-                self.save()
+                self._set_validity([])
                 return
 
         validation_errors = []
@@ -273,77 +339,11 @@ class Transaction(models.Model):
             if eval(attribute) is None:
                 check_header = False
 
-        if check_header:
-            # start off  with version and number of inputs
-            tx_bytes = (
-                self.version.to_bytes(4, "little")
-                + int(time.mktime(self.time.timetuple())).to_bytes(4, "little")
-                + get_var_int_bytes(self.inputs.all().count())
-            )
-
-            # add each input
-            for tx_input in self.inputs.all().order_by("index"):
-                if tx_input.previous_output:
-                    tx_input_bytes = (
-                        codecs.decode(
-                            tx_input.previous_output.transaction.tx_id, "hex"
-                        )[::-1]
-                        + tx_input.previous_output.index.to_bytes(4, "little")
-                        + get_var_int_bytes(
-                            len(codecs.decode(tx_input.script_sig_hex, "hex"))
-                        )
-                        + codecs.decode(tx_input.script_sig_hex, "hex")  # noqa
-                        + tx_input.sequence.to_bytes(4, "little")
-                    )
-                else:
-                    if tx_input.coin_base:
-                        tx_input_bytes = (
-                            codecs.decode("0" * 64, "hex")[::-1]
-                            + codecs.decode("f" * 8, "hex")[::-1]
-                            + get_var_int_bytes(
-                                len(codecs.decode(tx_input.coin_base, "hex"))
-                            )
-                            + codecs.decode(tx_input.coin_base, "hex")
-                            + tx_input.sequence.to_bytes(4, "little")
-                        )
-                    else:  # custodial grant
-                        tx_input_bytes = (
-                            codecs.decode("0" * 64, "hex")[::-1]
-                            + codecs.decode(self.coin.vout_n_value, "hex")[::-1]
-                            + get_var_int_bytes(
-                                len(codecs.decode(tx_input.coin_base, "hex"))
-                            )
-                            + codecs.decode(tx_input.coin_base, "hex")
-                            + tx_input.sequence.to_bytes(4, "little")
-                        )
-                tx_bytes += tx_input_bytes
-
-            # add the number of outputs
-            tx_bytes += get_var_int_bytes(self.outputs.all().count())
-
-            # add each output
-            for tx_output in self.outputs.all().order_by("index"):
-                tx_output_bytes = (
-                    tx_output.value.to_bytes(8, "little")
-                    + get_var_int_bytes(
-                        len(codecs.decode(tx_output.script_pub_key_hex, "hex"))
-                    )
-                    + codecs.decode(tx_output.script_pub_key_hex, "hex")
-                )
-                tx_bytes += tx_output_bytes
-
-            # add the locktime
-            tx_bytes += self.lock_time.to_bytes(4, "little")
-            # add the unit
-            tx_bytes += codecs.encode(self.coin.unit_code)
-
-            # hash the header and fail if it doesn't match the one on record
-            header_hash = hashlib.sha256(hashlib.sha256(tx_bytes).digest()).digest()
-            calc_hash = codecs.encode(header_hash[::-1], "hex")
-
-            if str.encode(self.tx_id) != calc_hash:
+        if check_header and self.coin:
+            # rebuild the raw transaction and fail if its hash doesn't match
+            if get_tx_id(self.get_raw_transaction()) != self.tx_id:
                 validation_errors.append("incorrect hash")
-        else:
+        elif not check_header:
             validation_errors.append(f"missing header attribute")
 
         # check for a block
@@ -381,14 +381,27 @@ class Transaction(models.Model):
 
         if validation_errors:
             logger.warning(f"Found validation errors: {', '.join(validation_errors)}")
+
+        self._set_validity(validation_errors)
+
+    def _set_validity(self, validation_errors):
+        """
+        Only save when the result differs so the cache_version isn't bumped needlessly
+        """
+        is_valid = not validation_errors
+        validity_errors = list(set(validation_errors)) if validation_errors else None
+
+        if is_valid == self.is_valid and set(validity_errors or []) == set(
+            self.validity_errors or []
+        ):
+            return
+
+        if not is_valid:
             logger.info(f"Setting {self}.is_valid to False")
-            self.is_valid = False
-            self.validity_errors = list(set(validation_errors))
-            self.save()
-        else:
-            self.is_valid = True
-            self.validity_errors = None
-            self.save()
+
+        self.is_valid = is_valid
+        self.validity_errors = validity_errors
+        self.save(update_fields=["is_valid", "validity_errors"])
 
     @property
     def total_input(self):
@@ -428,21 +441,20 @@ class Transaction(models.Model):
         if not self.block:
             return
 
-        address_outputs = {}
+        address_values = {}
 
-        for address_tx in (
-            self.outputs.all().distinct("address__address").order_by("address__address")
-        ):
-            if not address_tx.address:
+        # summed in python so prefetched outputs need no further queries
+        for tout in self.outputs.all():
+            if not tout.address:
                 continue
-            address_outputs[address_tx.address.address] = (
-                self.outputs.filter(address=address_tx.address).aggregate(Sum("value"))[
-                    "value__sum"
-                ]
-                / 10000
+            address_values[tout.address.address] = (
+                address_values.get(tout.address.address, 0) + tout.value
             )
 
-        return address_outputs
+        return {
+            address: address_values[address] / 10000
+            for address in sorted(address_values)
+        }
 
     @property
     def balance(self):
@@ -574,6 +586,8 @@ class Address(models.Model):
     # 'Circulating Currency' calculation
     network_owned = models.BooleanField(default=False)
     coin = models.ForeignKey(Coin, blank=True, null=True, on_delete=models.CASCADE)
+    # sum of the UnspentOutput values, maintained by blocks.utils.utxo
+    current_balance = models.BigIntegerField(default=0)
 
     def __str__(self):
         return self.address
@@ -584,28 +598,72 @@ class Address(models.Model):
 
     @property
     def balance(self):
-        balance = self.outputs.filter(
-            input__isnull=True,
-            transaction__block__isnull=False,
-            transaction__block__height__isnull=False,
-        ).aggregate(Sum("value"))
-
-        return balance["value__sum"] if balance["value__sum"] else 0
+        return self.current_balance
 
     def transactions(self):
-        inputs = TxInput.objects.values_list("transaction", flat=True).filter(
-            previous_output__address=self,
-            transaction__block__isnull=False,
-            transaction__block__height__isnull=False,
-        )
-        outputs = TxOutput.objects.values_list("transaction", flat=True).filter(
-            address=self,
-            transaction__block__isnull=False,
-            transaction__block__height__isnull=False,
-        )
-        tx_ids = [tx for tx in inputs] + [tx for tx in outputs]
+        from blocks.utils.address_history import address_transactions
+
+        return address_transactions(self)
+
+
+class UnspentOutput(models.Model):
+    """
+    The UTXO set.
+    One row per unspent output in a block on the main chain
+    """
+
+    output = models.OneToOneField(
+        "TxOutput", primary_key=True, related_name="unspent", on_delete=models.CASCADE,
+    )
+    address = models.ForeignKey(
+        "Address",
+        related_name="unspent_outputs",
+        related_query_name="unspent_output",
+        on_delete=models.CASCADE,
+    )
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return "{}:{}".format(self.address_id, self.output_id)
+
+
+class AddressActivity(models.Model):
+    """
+    One row per main chain transaction that pays to or spends from an address.
+    Maintained by blocks.utils.activity as blocks are connected and disconnected
+    """
+
+    RECEIVED = "received"
+    SENT = "sent"
+    BOTH = "both"
+
+    address = models.ForeignKey(
+        "Address",
+        related_name="activity",
+        related_query_name="activity",
+        on_delete=models.CASCADE,
+    )
+    transaction = models.ForeignKey(
+        "Transaction",
+        related_name="address_activity",
+        related_query_name="address_activity",
+        on_delete=models.CASCADE,
+    )
+    block = models.ForeignKey("Block", on_delete=models.CASCADE)
+    height = models.BigIntegerField()
+    tx_index = models.BigIntegerField()
+    # change to the address balance made by the transaction
+    delta = models.BigIntegerField(default=0)
+    direction = models.CharField(
+        max_length=10, choices=((RECEIVED, "Received"), (SENT, "Sent"), (BOTH, "Both")),
+    )
 
-        return Transaction.objects.filter(id__in=tx_ids).order_by("-time")
+    def __str__(self):
+        return "{}:{}:{}".format(self.address_id, self.transaction_id, self.delta)
+
+    class Meta:
+        unique_together = ("address", "transaction")
+        indexes = [models.Index(fields=["address", "-height", "-tx_index"])]
 
 
 class WatchAddress(models.Model):
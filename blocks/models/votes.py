@@ -1,5 +1,6 @@
 import logging
 
+from django.contrib.postgres.fields import JSONField
 from django.db import models
 
 from daio.models import Coin
@@ -81,10 +82,93 @@ class ParkRate(models.Model):
         return round((self.daily_percentage * self.days) * 1000, 8)
 
 
+class ParkRateSchedule(models.Model):
+    """
+    A set of park rates, stored once however many blocks vote for or activate it.
+    Identified by the hash of its rates. See blocks.utils.park_rates
+    """
+
+    hash = models.CharField(max_length=64, unique=True)
+    # [{"blocks": int, "rate": float}] ordered by blocks
+    rates = JSONField(default=list)
+
+    def __str__(self):
+        return self.hash[:8]
+
+    @property
+    def park_rates(self):
+        # unsaved ParkRates for their display properties
+        return [
+            ParkRate(blocks=rate["blocks"], rate=rate["rate"]) for rate in self.rates
+        ]
+
+
+class VoteWindow(models.Model):
+    """
+    The height and total sharedays destroyed of the sliding vote window
+    that VoteTally rows are currently counted over.
+    There is a single row per chain
+    """
+
+    height = models.BigIntegerField(blank=True, null=True)
+    sharedays_destroyed = models.BigIntegerField(default=0)
+    time_updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return "{}:{}".format(self.height, self.sharedays_destroyed)
+
+
+class VoteTally(models.Model):
+    """
+    Running count of the blocks in the vote window that voted for a motion or grant
+    """
+
+    MOTION = "motion"
+    CUSTODIAN = "custodian"
+
+    vote_type = models.CharField(
+        max_length=20, choices=((MOTION, "Motion"), (CUSTODIAN, "Custodian"))
+    )
+    hash = models.CharField(max_length=255, blank=True, null=True)
+    address = models.ForeignKey(
+        "Address", blank=True, null=True, on_delete=models.CASCADE
+    )
+    amount = models.DecimalField(max_digits=25, decimal_places=8, blank=True, null=True)
+    number_of_votes = models.BigIntegerField(default=0)
+    sharedays_destroyed = models.BigIntegerField(default=0)
+    first_seen = models.BigIntegerField(blank=True, null=True)
+
+    def __str__(self):
+        return "{}:{}:{}".format(self.vote_type, self.key, self.number_of_votes)
+
+    class Meta:
+        unique_together = ("vote_type", "hash", "address", "amount")
+        index_together = ("vote_type", "number_of_votes")
+
+    @property
+    def key(self):
+        return self.vote_type, self.hash, self.address_id, self.amount
+
+
 class ParkRateVote(models.Model):
     block = models.ForeignKey("Block", blank=True, null=True, on_delete=models.CASCADE)
     coin = models.ForeignKey(Coin, blank=True, null=True, on_delete=models.CASCADE)
+    # votes parsed before schedules were introduced still use rates
     rates = models.ManyToManyField("ParkRate")
+    schedule = models.ForeignKey(
+        ParkRateSchedule, blank=True, null=True, on_delete=models.SET_NULL
+    )
 
     class Meta:
         unique_together = ("block", "coin")
+
+    @property
+    def park_rates(self):
+        if self.schedule:
+            return self.schedule.park_rates
+
+        return list(self.rates.all())
+
+    @property
+    def rate_list(self):
+        return [{"blocks": rate.blocks, "rate": rate.rate} for rate in self.park_rates]
@@ -11,6 +11,22 @@ $(function() {
     var transactions_div = $("#transactions");
     var tx_total = $("#tx_total");
     var tx_index = $("#tx_index");
+    var next_cursor = null;
+    var loading = false;
+
+    // ask for the next page of transactions once the end of the list is in view
+    $(window).scroll(function() {
+        if (!next_cursor || loading) {
+            return;
+        }
+        if ($(window).scrollTop() + $(window).height() > $(document).height() - 200) {
+            loading = true;
+            webSocketBridge.stream(address).send({
+                'host': window.location.hostname,
+                'cursor': next_cursor
+            });
+        }
+    });
 
     webSocketBridge.socket.addEventListener('open', function() {
         webSocketBridge.stream(address).send({'host': window.location.hostname});
@@ -25,6 +41,10 @@ $(function() {
                 transactions_div.append(data["html"]);
                 tx_index.text(data["index"]);
             }
+            if (data["message_type"] === "address_transactions_next") {
+                next_cursor = data["cursor"];
+                loading = false;
+            }
             if (data["message_type"] === "address_balance") {
                 balance_div.text(data["balance"]);
             }
@@ -17,6 +17,23 @@ $(function() {
                 first_row.before(block_html);
             }
 
+            if (message_type === "new_tip") {
+                // only the rows that changed are sent. replace them or add new rows
+                $.each(data["blocks"], function (i, block) {
+                    var row = $("#latest-blocks-table>tbody tr[data-height='" + block["height"] + "']");
+
+                    if (row.length === 0) {
+                        row = $("<tr></tr>").attr("data-height", block["height"]);
+                        $("#latest-blocks-table>tbody").prepend(row);
+                        $("#latest-blocks-table>tbody tr").slice(50).remove();
+                    }
+
+                    row.toggleClass("warning", !block["block_is_valid"]);
+                    row.html(block["block_html"]);
+                });
+                latest_blocks_table_rows = $("#latest-blocks-table>tbody tr");
+            }
+
             if (message_type === "update_block") {
                 var index = data["index"];
                 var block_html = data["block_html"];
@@ -15,7 +15,18 @@ from .transactions import (
     parse_transaction,
 )
 
-from .network import validation, get_latest_blocks
+from .network import (
+    validation,
+    get_latest_blocks,
+    refresh_supply,
+    update_info_rollups,
+    apply_retention,
+    prune_serialized_cache,
+)
+
+from .sync import sync_range
+
+from .tip import new_tip
 
 
 __all__ = [
@@ -32,4 +43,10 @@ __all__ = [
     "parse_transaction",
     "validation",
     "get_latest_blocks",
+    "refresh_supply",
+    "update_info_rollups",
+    "apply_retention",
+    "prune_serialized_cache",
+    "sync_range",
+    "new_tip",
 ]
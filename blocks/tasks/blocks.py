@@ -3,43 +3,47 @@ from django.db import connection
 
 from blocks.models import Block, Transaction
 from blocks.utils.rpc import get_block_hash, get_rpc_block, send_rpc
+from blocks.utils.chain import ReorgError, connect_rpc_block, orphan_blocks
+from blocks.utils.repair import releases_repair, schedule_repair
 from daio.celery import app
 
 logger = get_task_logger(__name__)
 
 
 @app.task
-def get_block(height):
+@releases_repair
+def get_block(height, block_hash=None):
     """
     Get the block from the rpc connection at the given height
-    Ensure that if a different block exists at this height, its height is set to None
+    If a different block exists at this height, or the chain has forked below it,
+    the orphaned blocks are rolled back first
+    block_hash can be passed if it has already been fetched in a batch
     """
     logger.info(f"Getting block {height}")
-    block_hash = get_block_hash(height, connection.schema_name)
+
+    if not block_hash:
+        block_hash = get_block_hash(height, connection.schema_name)
 
     if not block_hash:
         logger.warning("No block hash returned from daemon")
         return
 
-    db_hash_block, _ = Block.objects.get_or_create(hash=block_hash)
-
-    try:
-        db_height_block = Block.objects.get(height=height)
-    except Block.DoesNotExist:
-        db_height_block = db_hash_block
+    rpc_block = get_rpc_block(block_hash, connection.schema_name)
 
-    if db_hash_block != db_height_block:
-        db_height_block.height = None
-        db_height_block.save()
+    if not rpc_block:
+        logger.warning("No RPC Block returned from Daemon")
+        return
 
-    db_hash_block.height = height
-    db_hash_block.save()
+    try:
+        db_hash_block, _ = connect_rpc_block(rpc_block)
+    except ReorgError as e:
+        logger.critical(f"Refusing to connect block {block_hash}: {e}")
+        return
 
-    parse_block.apply(kwargs={"block_hash": db_hash_block.hash})
     validate_block.apply(kwargs={"block_hash": db_hash_block.hash})
 
     if not db_hash_block.is_valid:
-        repair_block.delay(db_hash_block.hash)
+        schedule_repair("repair_block", block_hash=db_hash_block.hash)
 
 
 @app.task
@@ -60,6 +64,7 @@ def parse_block(block_hash):
 
 
 @app.task
+@releases_repair
 def validate_block(block_hash):
     block, _ = Block.objects.get_or_create(hash=block_hash)
 
@@ -72,12 +77,11 @@ def validate_block(block_hash):
         logger.info(f"Block {block} is valid")
 
     for tx in block.transactions.all():
-        app.send_task(
-            "blocks.tasks.transactions.validate_transaction", kwargs={"tx_id": tx.tx_id}
-        )
+        schedule_repair("validate_transaction", tx_id=tx.tx_id)
 
 
 @app.task
+@releases_repair
 def repair_block(block_hash):
     try:
         block = Block.objects.get(hash=block_hash)
@@ -107,7 +111,7 @@ def repair_block(block_hash):
         fix_merkle_root.apply(kwargs={"block_hash": block.hash})
 
     if "previous block has no previous block" in block.validity_errors:
-        get_block.delay(block.height - 2)
+        schedule_repair("get_block", height=block.height - 2)
 
     if {
         "missing attribute: self.previous_block",
@@ -143,21 +147,19 @@ def repair_block(block_hash):
         tx.validate()
 
         if not tx.is_valid:
-            app.send_task(
-                "blocks.tasks.transactions.validate_transaction",
-                kwargs={"tx_id": tx.tx_id},
-            )
+            schedule_repair("validate_transaction", tx_id=tx.tx_id)
 
         for tx_input in tx.inputs.all():
             if tx_input.previous_output:
-                app.send_task(
-                    "blocks.tasks.transactions.validate_transaction",
-                    kwargs={"tx_id": tx_input.previous_output.transaction.tx_id},
+                schedule_repair(
+                    "validate_transaction",
+                    tx_id=tx_input.previous_output.transaction.tx_id,
                 )
 
                 if tx_input.previous_output.transaction.block:
-                    validate_block.delay(
-                        tx_input.previous_output.transaction.block.hash
+                    schedule_repair(
+                        "validate_block",
+                        block_hash=tx_input.previous_output.transaction.block.hash,
                     )
 
     # run validate() once more to clear any existing validation errors
@@ -222,7 +224,7 @@ def fix_adjoining_block(block_hash, height_diff):
 
     if block.height is None:
         logger.warning(f"block {block} has height None. Sending for repair")
-        repair_block.delay(block_hash=block.hash)
+        schedule_repair("repair_block", block_hash=block.hash)
         return
 
     logger.info(
@@ -254,8 +256,7 @@ def fix_adjoining_block(block_hash, height_diff):
         logger.info("Setting height to None")
         # the block with the previous height doesn't match the hash from this block
         # likely to be an orphan so remove it
-        adjoining_height_block.height = None
-        adjoining_height_block.save()
+        orphan_blocks([adjoining_height_block])
 
     logger.info(
         f"setting {adjoining_hash_block} height to {block.height + height_diff}"
@@ -281,7 +282,7 @@ def fix_adjoining_block(block_hash, height_diff):
 
     if not adjoining_hash_block.is_valid:
         logger.warning(f"Block {adjoining_hash_block} is not valid. Sending for repair")
-        repair_block.delay(adjoining_hash_block.hash)
+        schedule_repair("repair_block", block_hash=adjoining_hash_block.hash)
 
 
 @app.task
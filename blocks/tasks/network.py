@@ -1,23 +1,30 @@
 import datetime
-import json
-import time
 
 from celery.utils.log import get_task_logger
-from channels import Group, Channel
+from channels import Channel
+from django.conf import settings
+from django.core.cache import cache
 from django.core.paginator import Paginator
 
 from django.db import connection
 from django.db.models import Max
-from django.template.loader import render_to_string
-from django.utils.timezone import make_aware
+from django.utils.timezone import make_aware, now
 from tenant_schemas.utils import schema_context
 
-from blocks.models import Block, Info, Peer, Transaction
+from blocks.consumers.ui.blocks import refresh_latest_blocks
+from blocks.models import Block, Peer, Transaction
 from daio.celery import app
 from daio.models import Coin
-from .blocks import repair_block, get_block
-from .transactions import repair_transaction
-from blocks.utils.rpc import send_rpc
+from .blocks import get_block
+from .sync import sync_range
+from blocks.utils.cache import serialized_cache
+from blocks.utils.info import apply_info_retention, get_latest_infos, record_info
+from blocks.utils.repair import schedule_repair
+from blocks.utils.rollups import rollup_info
+from blocks.utils.rpc import get_block_hashes, send_rpc
+from blocks.utils.supply import refresh_supply_snapshot
+from blocks.utils.validation import RangeValidator, send_for_repair
+from blocks.utils.valid_hashes import update_hash_index
 
 logger = get_task_logger(__name__)
 
@@ -30,23 +37,25 @@ def trigger_validation(chain):
 @app.task
 def validation(chain):
     with schema_context(chain):
-        blocks = Block.objects.exclude(height=None).filter(is_valid=False)
-        block_paginator = Paginator(blocks, 1000)
-
-        for page_num in block_paginator.page_range:
-            for block in block_paginator.page(page_num):
-
-                repair_block.apply_async(
-                    kwargs={"block_hash": block.hash}, queue="validation"
-                )
+        # check the whole chain's headers and linkage in windows
+        failing_heights = set(RangeValidator().run())
+
+        # and anything already marked invalid by Block.validate
+        failing_heights.update(
+            Block.objects.exclude(height=None)
+            .filter(is_valid=False)
+            .values_list("height", flat=True)
+        )
+        logger.info(f"Sending {len(failing_heights)} blocks for repair")
+        send_for_repair(sorted(failing_heights))
 
         transactions = Transaction.objects.exclude(block=None).filter(is_valid=False)
         tx_paginator = Paginator(transactions, 1000)
 
         for page_num in tx_paginator.page_range:
             for tx in tx_paginator.page(page_num):
-                repair_transaction.apply_async(
-                    kwargs={"tx_id": tx.tx_id}, queue="validation"
+                schedule_repair(
+                    "repair_transaction", queue="validation", tx_id=tx.tx_id
                 )
 
 
@@ -55,44 +64,53 @@ def get_latest_blocks(chain):
     with schema_context(chain):
         get_peer_info.delay(chain)
         get_info.apply(kwargs={"chain": chain})
-        max_height = Info.objects.all().aggregate(Max("max_height"))["max_height__max"]
+        # pick up the blocks fetched since the last run
+        update_hash_index()
+        max_height = max(
+            (info.max_height for info in get_latest_infos().values()), default=None
+        )
         next_height = Block.objects.all().aggregate(Max("height"))["height__max"] + 1
 
+        if max_height - next_height >= settings.SYNC_THRESHOLD:
+            # too far behind to fetch block by block. Use the range sync instead
+            logger.info(f"Range syncing blocks {next_height} to {max_height}")
+            sync_range.apply_async(
+                kwargs={
+                    "chain": chain,
+                    "start_height": next_height,
+                    "end_height": max_height,
+                },
+                queue="sync",
+            )
+            next_height = max_height + 1
+
+        # fetch all of the missing hashes in one batched call
+        block_hashes = get_block_hashes(
+            range(next_height, max_height + 1), schema_name=connection.schema_name
+        )
+
         while next_height <= max_height:
             logger.info(f"Getting block at height {next_height}")
             get_block.apply_async(
-                kwargs={"height": next_height}, queue="network_blocks"
+                kwargs={
+                    "height": next_height,
+                    "block_hash": block_hashes.get(next_height),
+                },
+                queue="network_blocks",
             )
             next_height += 1
 
-        logger.info("Refreshing Blocks on front page")
-        index = 0
-        top_blocks = Block.objects.exclude(height=None).order_by("-height")[:50]
-
-        # pause for a while to allow the latest blocks to be created
-        time.sleep(5)
-
-        for block in top_blocks:
-            block.validate()
-
-            Group("{}_latest_blocks_list".format(connection.schema_name)).send(
-                {
-                    "text": json.dumps(
-                        {
-                            "message_type": "update_block",
-                            "index": index,
-                            "block_html": render_to_string(
-                                "explorer/fragments/block.html", {"block": block}
-                            ),
-                            "block_is_valid": block.is_valid,
-                        }
-                    )
-                }
-            )
-            index += 1
+        # blocks are validated as they're connected so only repair the invalid ones
+        for block_hash, is_valid in (
+            Block.objects.exclude(height=None)
+            .order_by("-height")
+            .values_list("hash", "is_valid")[:50]
+        ):
+            if not is_valid:
+                schedule_repair("repair_block", block_hash=block_hash)
 
-            if not block.is_valid:
-                repair_block.delay(block.hash)
+        # validity may have changed so rebuild the shared latest blocks payload
+        refresh_latest_blocks()
 
 
 @app.task
@@ -109,20 +127,55 @@ def get_info(chain):
             if not rpc:
                 continue
 
-            info = Info.objects.create(
-                unit=rpc["walletunit"],
-                max_height=rpc["blocks"],
-                money_supply=rpc["moneysupply"],
-                total_parked=rpc.get("totalparked"),
-                connections=rpc["connections"],
-                difficulty=rpc["difficulty"],
-                pay_tx_fee=rpc["paytxfee"],
-            )
+            info = record_info(rpc)
 
             logger.info(f"saved {info} for coin {coin}")
 
         Channel("display_info").send({"chain": connection.schema_name})
 
+    # the supply figures and rollups depend on the info so update them off this task
+    refresh_supply.delay(chain)
+    update_info_rollups.delay(chain)
+
+    if cache.add(
+        "{}_info_retention".format(chain),
+        True,
+        settings.INFO_COMPACTION_INTERVAL_SECONDS,
+    ):
+        apply_retention.delay(chain)
+
+    if cache.add(
+        "serialized_cache_prune", True, settings.SERIALIZED_CACHE_PRUNE_INTERVAL_SECONDS
+    ):
+        prune_serialized_cache.delay()
+
+
+@app.task
+def refresh_supply(chain):
+    with schema_context(chain):
+        for coin in Coin.objects.filter(chain__schema_name=chain):
+            refresh_supply_snapshot(coin)
+
+
+@app.task
+def update_info_rollups(chain):
+    with schema_context(chain):
+        rollup_info(now())
+
+
+@app.task
+def apply_retention(chain):
+    with schema_context(chain):
+        apply_info_retention(
+            now(),
+            lookback=datetime.timedelta(hours=settings.INFO_COMPACTION_LOOKBACK_HOURS),
+        )
+
+
+@app.task
+def prune_serialized_cache():
+    serialized_cache.prune()
+
 
 @app.task
 def get_peer_info(chain):
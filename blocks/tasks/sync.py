@@ -0,0 +1,30 @@
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.core.cache import cache
+from tenant_schemas.utils import schema_context
+
+from blocks.utils.sync import RangeSync
+from blocks.utils.valid_hashes import update_hash_index
+from daio.celery import app
+
+logger = get_task_logger(__name__)
+
+
+@app.task
+def sync_range(chain, start_height, end_height):
+    """
+    Download a range of blocks in height order.
+    Only one range sync runs per chain at a time
+    """
+    lock = "{}_range_sync".format(chain)
+
+    if not cache.add(lock, True, settings.SYNC_LOCK_SECONDS):
+        logger.info(f"A range sync is already running for {chain}")
+        return
+
+    try:
+        with schema_context(chain):
+            RangeSync(start_height, end_height).run()
+            update_hash_index(start_height)
+    finally:
+        cache.delete(lock)
@@ -0,0 +1,74 @@
+import json
+
+from celery.utils.log import get_task_logger
+from channels import Group
+from django.template.loader import render_to_string
+from tenant_schemas.utils import schema_context
+
+from blocks.consumers.ui.blocks import (
+    get_block_details_messages,
+    refresh_latest_blocks,
+)
+from blocks.models import Block
+from blocks.utils.chain import ReorgError, connect_rpc_block
+from blocks.utils.rpc import get_rpc_block
+from blocks.utils.valid_hashes import update_hash_index
+from daio.celery import app
+
+logger = get_task_logger(__name__)
+
+
+@app.task
+def new_tip(chain, block_hash):
+    """
+    Add the block the daemon has notified us of and push the rows that changed to
+    the latest blocks list in a single message
+    """
+    with schema_context(chain):
+        rpc_block = get_rpc_block(block_hash, chain)
+
+        if not rpc_block:
+            logger.warning(f"No RPC Block returned from Daemon for {block_hash}")
+            return
+
+        try:
+            block, replaced_heights = connect_rpc_block(rpc_block)
+        except ReorgError as e:
+            logger.critical(f"Refusing to connect block {block_hash}: {e}")
+            return
+
+        block.validate()
+
+        if not block.is_valid:
+            block.send_for_repair()
+
+        update_hash_index(min(set(replaced_heights) | {block.height}))
+
+        changed_blocks = Block.objects.filter(
+            height__in=set(replaced_heights) | {block.height}
+        ).order_by("height")
+
+        Group("{}_latest_blocks_list".format(chain)).send(
+            {
+                "text": json.dumps(
+                    {
+                        "message_type": "new_tip",
+                        "blocks": [
+                            {
+                                "height": changed_block.height,
+                                "block_html": render_to_string(
+                                    "explorer/fragments/block.html",
+                                    {"block": changed_block},
+                                ),
+                                "block_is_valid": changed_block.is_valid,
+                            }
+                            for changed_block in changed_blocks
+                        ],
+                    }
+                )
+            }
+        )
+
+        # build the shared payloads once for every subscriber
+        refresh_latest_blocks()
+        get_block_details_messages(block)
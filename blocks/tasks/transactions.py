@@ -3,13 +3,17 @@ from django.db import connection
 
 from blocks.models import Transaction, Block, TxOutput, Address
 from blocks.utils.numbers import convert_to_satoshis
+from blocks.utils.repair import releases_repair, schedule_repair
 from blocks.utils.rpc import get_rpc_block, get_raw_transaction
+from blocks.utils.summary import invalidate_summaries
+from blocks.utils.utxo import connect_transactions
 from daio.celery import app
 
 logger = get_task_logger(__name__)
 
 
 @app.task
+@releases_repair
 def validate_transaction(tx_id):
     tx, _ = Transaction.objects.get_or_create(tx_id=tx_id)
 
@@ -37,9 +41,11 @@ def parse_transaction(tx_id):
         return
 
     tx.parse_rpc_tx(rpc_tx)
+    invalidate_summaries([tx.block_id])
 
 
 @app.task
+@releases_repair
 def repair_transaction(tx_id):
     try:
         tx = Transaction.objects.get(tx_id=tx_id)
@@ -73,9 +79,8 @@ def repair_transaction(tx_id):
             logger.warning(
                 f"tx {tx_id[:8]} is attached to block {tx.block}. Detaching and repairing block"
             )
-            app.send_task(
-                "blocks.tasks.blocks.repair_block", kwargs={"block_hash": tx.block.hash}
-            )
+            schedule_repair("repair_block", block_hash=tx.block.hash)
+            invalidate_summaries([tx.block_id])
             tx.block = None
             tx.save()
 
@@ -192,9 +197,13 @@ def repair_transaction(tx_id):
             tx_out.save()
             logger.info(f"added park data to {tx_out}")
 
-    app.send_task(
-        "blocks.tasks.blocks.validate_block", kwargs={"block_hash": tx.block.hash}
-    )
+    # outputs may have gained addresses or values so refresh the UTXO set
+    if tx.block and tx.block.height is not None:
+        connect_transactions(Transaction.objects.filter(pk=tx.pk))
+
+    invalidate_summaries([tx.block_id])
+
+    schedule_repair("validate_block", block_hash=tx.block.hash)
 
 
 @app.task
@@ -215,11 +224,9 @@ def fix_tx_outputs(tx_id):
                 )
             else:
                 if tx_in.previous_output.transaction.block.height is None:
-                    app.send_task(
-                        "blocks.tasks.blocks.validate_block",
-                        kwargs={
-                            "block_hash": tx_in.previous_output.transaction.block.hash
-                        },
+                    schedule_repair(
+                        "validate_block",
+                        block_hash=tx_in.previous_output.transaction.block.hash,
                     )
 
             if not tx_in.previous_output.address:
@@ -279,3 +286,6 @@ def fix_tx_outputs(tx_id):
                     tx_in.previous_output.transaction.save()
 
                 scanned_transactions.append(previous_tx_id)
+
+    # previous outputs may have gained addresses or values so refresh the UTXO set
+    connect_transactions(Transaction.objects.filter(tx_id__in=scanned_transactions))
@@ -0,0 +1,51 @@
+import hashlib
+
+from tenant_schemas.test.cases import TenantTestCase
+
+from blocks.models import Address, Block, Transaction, TxInput, TxOutput
+from blocks.utils.activity import add_activity
+from blocks.utils.address_history import get_address_history
+
+
+class TestAddressHistory(TenantTestCase):
+    def test_get_address_history(self):
+        address = Address.objects.create(address="SHistoryAddress")
+        other = Address.objects.create(address="SOtherAddress")
+        outputs = []
+
+        for height in range(3):
+            block = Block.objects.create(
+                height=height, hash=hashlib.sha256(str(height).encode()).hexdigest()
+            )
+            tx = Transaction.objects.create(
+                tx_id=hashlib.sha256(f"History {height}".encode()).hexdigest(),
+                block=block,
+                index=1,
+            )
+
+            if outputs:
+                # spend the last output back to another address
+                TxInput.objects.create(
+                    transaction=tx, index=0, previous_output=outputs[-1]
+                )
+                TxOutput.objects.create(
+                    transaction=tx, index=1, address=other, value=100
+                )
+
+            outputs.append(
+                TxOutput.objects.create(
+                    transaction=tx, index=0, address=address, value=1000 * (height + 1)
+                )
+            )
+
+        add_activity(Transaction.objects.all())
+
+        page, cursor = get_address_history(address, limit=2)
+        self.assertEqual(
+            [(tx.block_height, delta) for tx, delta in page], [(2, 1000), (1, 1000)]
+        )
+        self.assertEqual(cursor, "1:1")
+
+        page, cursor = get_address_history(address, cursor=cursor, limit=2)
+        self.assertEqual([(tx.block_height, delta) for tx, delta in page], [(0, 1000)])
+        self.assertIsNone(cursor)
@@ -6,7 +6,9 @@ from random import randint, choice, uniform
 from django.utils.timezone import make_aware
 from tenant_schemas.test.cases import TenantTestCase
 
-from blocks.models import Block, Transaction, TxOutput, Address
+from blocks.models import Block, Transaction, TxInput, TxOutput, Address
+from blocks.utils.summary import invalidate_summaries, with_summaries
+from daio.models import Coin
 
 
 class TestBlock(TenantTestCase):
@@ -185,3 +187,60 @@ class TestBlock(TenantTestCase):
 
         block.validate()
         self.assertTrue(block.is_valid)
+
+    def test_serialize_cache(self):
+        block = Block.objects.create(
+            height=10, hash=hashlib.sha256(b"Cached Block").hexdigest(), is_valid=True
+        )
+        self.assertEqual(block.serialize()["size"], None)
+
+        # cached payloads are served until the block is written again
+        Block.objects.filter(pk=block.pk).update(size=100)
+        self.assertEqual(block.serialize()["size"], None)
+
+        block.size = 200
+        block.save()
+        self.assertEqual(block.serialize()["size"], 200)
+
+    def test_summary(self):
+        coin = Coin.objects.create(
+            name="NuBits", code="NBT", unit_code="B", chain=self.tenant, magic_byte=25
+        )
+        block = Block.objects.create(
+            height=20, hash=hashlib.sha256(b"Summary Block").hexdigest()
+        )
+        previous = Transaction.objects.create(
+            tx_id=hashlib.sha256(b"Summary Previous").hexdigest(), coin=coin
+        )
+        previous_output = TxOutput.objects.create(
+            transaction=previous, index=0, value=50000
+        )
+        Transaction.objects.create(
+            tx_id=hashlib.sha256(b"Summary Tx0").hexdigest(), block=block, index=0
+        )
+        tx1 = Transaction.objects.create(
+            tx_id=hashlib.sha256(b"Summary Tx1").hexdigest(),
+            block=block,
+            index=1,
+            coin=coin,
+        )
+        TxInput.objects.create(
+            transaction=tx1, index=0, previous_output=previous_output
+        )
+        solver = Address.objects.create(address="SSolver")
+        TxOutput.objects.create(transaction=tx1, index=0, value=10000)
+        TxOutput.objects.create(transaction=tx1, index=1, value=60000, address=solver)
+
+        self.assertIsNone(block.number_of_transactions)
+        self.assertEqual(block.solved_by, "SSolver")
+
+        block.refresh_from_db()
+        self.assertEqual(block.number_of_transactions, 2)
+        self.assertEqual(block.solver, solver)
+        self.assertEqual(block.totals_transacted, [{"name": "NBT", "value": 2.0}])
+
+        # changed transactions are summarized again when next used
+        invalidate_summaries([block.pk])
+        block.refresh_from_db()
+        self.assertIsNone(block.number_of_transactions)
+        self.assertEqual(with_summaries([block])[0].number_of_transactions, 2)
@@ -0,0 +1,83 @@
+import hashlib
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from tenant_schemas.test.cases import TenantTestCase
+
+from blocks.models import Block
+from blocks.utils import cache as cache_utils
+from blocks.utils.cache import DiskCache, SerializedCache
+
+
+class TestSerializedCache(TenantTestCase):
+    def test_tiers(self):
+        for height in range(5):
+            Block.objects.create(
+                height=height, hash=hashlib.sha256(str(height).encode()).hexdigest()
+            )
+
+        cache_utils._top_heights.clear()
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with override_settings(
+                SERIALIZED_CACHE_DEPTH=2, SERIALIZED_CACHE_DIR=cache_dir
+            ):
+                serialized_cache = SerializedCache()
+
+                serialized_cache.set("deep", {"height": 1}, height=1)
+                serialized_cache.set("shallow", {"height": 4}, height=4)
+
+                self.assertEqual(serialized_cache.lru.get("deep"), {"height": 1})
+                self.assertEqual(serialized_cache.disk.get("deep"), {"height": 1})
+                self.assertIsNone(serialized_cache.lru.get("shallow"))
+                self.assertIsNone(serialized_cache.disk.get("shallow"))
+
+                # deep entries survive the shared cache being cleared
+                cache.clear()
+                serialized_cache.lru.delete("deep")
+
+                with mock.patch.object(cache_utils.cache, "set") as cache_set:
+                    self.assertEqual(serialized_cache.get("deep"), {"height": 1})
+
+                # disk hits go back to the shared cache no longer than the disk keeps them
+                cache_set.assert_called_once_with(
+                    "deep", {"height": 1}, settings.SERIALIZED_CACHE_DISK_SECONDS
+                )
+                self.assertIsNone(serialized_cache.get("shallow"))
+
+                serialized_cache.delete("deep")
+                self.assertIsNone(serialized_cache.get("deep"))
+
+    def test_save_bumps_stored_version(self):
+        block = Block.objects.create(
+            height=1, hash=hashlib.sha256(b"Version Block").hexdigest()
+        )
+        stale = Block.objects.get(pk=block.pk)
+
+        # ingest bumps the version behind the loaded instance
+        block.save()
+        stale.save(update_fields=["height"])
+
+        self.assertEqual(stale.cache_version, 2)
+        self.assertEqual(Block.objects.get(pk=block.pk).cache_version, 2)
+
+    def test_disk_prune(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            disk = DiskCache(cache_dir, 60)
+            disk.set("old", {"version": 1})
+            disk.set("new", {"version": 2})
+            old_time = time.time() - 120
+            os.utime(disk.path("old"), (old_time, old_time))
+
+            self.assertEqual(disk.prune(), 1)
+            self.assertFalse(os.path.exists(disk.path("old")))
+            self.assertEqual(disk.get("new"), {"version": 2})
+
+            # expired entries are missing even before they're pruned
+            os.utime(disk.path("new"), (old_time, old_time))
+            self.assertIsNone(disk.get("new"))
@@ -0,0 +1,220 @@
+import hashlib
+from unittest.mock import patch
+
+from tenant_schemas.test.cases import TenantTestCase
+
+from blocks.models import (
+    Address,
+    Block,
+    Orphan,
+    SyncCheckpoint,
+    Transaction,
+    TxInput,
+    TxOutput,
+    UnspentOutput,
+)
+from blocks.utils.chain import ReorgError, orphan_blocks, reorganize
+from blocks.utils.sync import RangeSync
+from blocks.utils.utxo import connect_block
+
+
+class TestChain(TenantTestCase):
+    def test_orphan_blocks(self):
+        blocks = []
+
+        for height in range(3):
+            block = Block.objects.create(
+                height=height,
+                hash=hashlib.sha256(str(height).encode()).hexdigest(),
+                previous_block=blocks[-1] if blocks else None,
+            )
+
+            if blocks:
+                blocks[-1].next_block = block
+                blocks[-1].save()
+
+            blocks.append(block)
+
+        address = Address.objects.create(address="SOrphanAddress")
+        tx = Transaction.objects.create(
+            tx_id=hashlib.sha256(b"Orphan Tx").hexdigest(), block=blocks[2], index=0
+        )
+        TxOutput.objects.create(transaction=tx, index=0, address=address, value=500)
+        connect_block(blocks[2])
+        self.assertEqual(UnspentOutput.objects.count(), 1)
+
+        orphan_blocks(Block.objects.filter(height=2))
+
+        orphan = Block.objects.get(pk=blocks[2].pk)
+        self.assertIsNone(orphan.height)
+        self.assertIsNone(Block.objects.get(pk=blocks[1].pk).next_block)
+        self.assertTrue(Orphan.objects.filter(hash=orphan.hash).exists())
+        self.assertEqual(UnspentOutput.objects.count(), 0)
+
+        address.refresh_from_db()
+        self.assertEqual(address.balance, 0)
+
+    def test_orphan_bumps_transaction_versions(self):
+        blocks = [
+            Block.objects.create(
+                height=height, hash=hashlib.sha256(b"Bump%d" % height).hexdigest()
+            )
+            for height in range(2)
+        ]
+        spent, other, spending = [
+            Transaction.objects.create(
+                tx_id=hashlib.sha256(name).hexdigest(), block=block, index=index
+            )
+            for index, (name, block) in enumerate(
+                [
+                    (b"Bump Spent", blocks[0]),
+                    (b"Bump Other", blocks[0]),
+                    (b"Bump", blocks[1]),
+                ]
+            )
+        ]
+        output = TxOutput.objects.create(transaction=spent, index=0, value=500)
+        TxInput.objects.create(transaction=spending, index=0, previous_output=output)
+        versions = dict(Transaction.objects.values_list("pk", "cache_version"))
+
+        orphan_blocks(Block.objects.filter(height=1))
+
+        bumped = {
+            pk
+            for pk, version in Transaction.objects.values_list("pk", "cache_version")
+            if version > versions[pk]
+        }
+        self.assertEqual(bumped, {spent.pk, spending.pk})
+
+    def test_orphan_branch_with_internal_spend(self):
+        blocks = [
+            Block.objects.create(
+                height=height, hash=hashlib.sha256(b"Branch%d" % height).hexdigest()
+            )
+            for height in range(3)
+        ]
+        address = Address.objects.create(address="SBranchAddress")
+        outputs = []
+
+        # each block's transaction spends the output of the one before it
+        for height, block in enumerate(blocks):
+            tx = Transaction.objects.create(
+                tx_id=hashlib.sha256(b"Branch Tx%d" % height).hexdigest(),
+                block=block,
+                index=0,
+            )
+
+            if outputs:
+                TxInput.objects.create(
+                    transaction=tx, index=0, previous_output=outputs[-1]
+                )
+
+            outputs.append(
+                TxOutput.objects.create(
+                    transaction=tx, index=0, address=address, value=500
+                )
+            )
+            connect_block(block)
+
+        self.assertEqual(
+            list(UnspentOutput.objects.values_list("output_id", flat=True)),
+            [outputs[2].pk],
+        )
+
+        orphan_blocks(Block.objects.filter(height__gte=1))
+
+        # the output spent inside the branch isn't restored
+        self.assertEqual(
+            list(UnspentOutput.objects.values_list("output_id", flat=True)),
+            [outputs[0].pk],
+        )
+        address.refresh_from_db()
+        self.assertEqual(address.balance, 500)
+
+    def test_reorgs_over_the_same_range(self):
+        synced = []
+
+        def run(range_sync):
+            synced.append(range_sync.next_height)
+            range_sync.checkpoint.height = range_sync.end_height
+            range_sync.checkpoint.save()
+            return True
+
+        with patch.object(RangeSync, "run", run), patch(
+            "blocks.utils.chain.find_common_ancestor",
+            return_value=(0, {1: "fork", 2: "fork"}),
+        ):
+            for attempt in range(2):
+                # the ancestor at height 0 is kept, the branch above it is replaced
+                for height in range(1 if attempt else 0, 3):
+                    Block.objects.create(
+                        height=height,
+                        hash=hashlib.sha256(
+                            b"Flip%d%d" % (attempt, height)
+                        ).hexdigest(),
+                    )
+
+                reorganize(3, "new{}".format(attempt), "other")
+
+        self.assertEqual(synced, [1, 1])
+        self.assertFalse(SyncCheckpoint.objects.exists())
+
+    def make_chain(self, heights):
+        hashes = {
+            height: hashlib.sha256(b"Safe%d" % height).hexdigest() for height in heights
+        }
+
+        for height, block_hash in hashes.items():
+            Block.objects.create(height=height, hash=block_hash)
+
+        return hashes
+
+    def assert_refused(self, get_block_hashes):
+        with patch(
+            "blocks.utils.chain.get_block_hashes", side_effect=get_block_hashes
+        ), self.assertRaises(ReorgError):
+            reorganize(10, "new", "other")
+
+        # nothing was orphaned
+        self.assertEqual(Block.objects.filter(height__isnull=False).count(), 10)
+        self.assertFalse(Orphan.objects.exists())
+
+    def test_reorg_refused_when_the_daemon_fails(self):
+        self.make_chain(range(10))
+        self.assert_refused(lambda heights, schema_name: {})
+
+    def test_reorg_refused_on_a_partial_batch(self):
+        hashes = self.make_chain(range(10))
+        # the daemon agrees about height 2 but leaves out 5
+        self.assert_refused(
+            lambda heights, schema_name: {
+                height: hashes[height] if height <= 2 else "fork"
+                for height in heights
+                if height != 5
+            }
+        )
+
+    def test_reorg_refused_beyond_max_depth(self):
+        self.make_chain(range(10))
+
+        with self.settings(MAX_REORG_DEPTH=5):
+            self.assert_refused(
+                lambda heights, schema_name: {height: "fork" for height in heights}
+            )
+
+    def test_reorg_orphans_only_forked_heights(self):
+        hashes = self.make_chain(range(10))
+        daemon_hashes = {
+            height: hashes[height] if height <= 6 else "fork{}".format(height)
+            for height in range(10)
+        }
+
+        with patch(
+            "blocks.utils.chain.get_block_hashes",
+            side_effect=lambda heights, schema_name: {
+                height: daemon_hashes[height] for height in heights
+            },
+        ), patch.object(RangeSync, "run", return_value=True):
+            self.assertEqual(sorted(reorganize(10, "new", "other")), [7, 8, 9])
+
+        self.assertEqual(Block.objects.filter(height__isnull=False).count(), 7)
@@ -0,0 +1,107 @@
+import hashlib
+from datetime import datetime
+
+from django.test import SimpleTestCase
+from django.utils.timezone import make_aware
+
+from blocks.utils.codec import (
+    COINBASE_INDEX,
+    NULL_HASH,
+    BlockHeader,
+    DecodeError,
+    RawBlock,
+    RawTransaction,
+    TxIn,
+    TxOut,
+    decode_block,
+    decode_transaction,
+    encode_block,
+    encode_transaction,
+    get_block_hash,
+    get_tx_id,
+)
+from blocks.utils.merkle import merkle_root
+from blocks.utils.validation import get_header_bytes
+
+
+class TestCodec(SimpleTestCase):
+    def setUp(self):
+        self.coinbase = RawTransaction(
+            tx_id=None,
+            version=1,
+            time=1514764800,
+            inputs=[
+                TxIn(NULL_HASH, COINBASE_INDEX, bytes.fromhex("0123"), 2 ** 32 - 1)
+            ],
+            outputs=[TxOut(0, b"")],
+            lock_time=0,
+            unit="S",
+        )
+        self.spend = RawTransaction(
+            tx_id=None,
+            version=1,
+            time=1514764860,
+            inputs=[TxIn(get_tx_id(self.coinbase), 0, bytes(300), 2 ** 32 - 1),],
+            outputs=[
+                TxOut(105000, bytes.fromhex("76a914" + "11" * 20 + "88ac")),
+                TxOut(2 ** 40, bytes.fromhex("21" + "02" * 33 + "ac")),
+            ],
+            lock_time=100,
+            unit="B",
+        )
+
+    def test_transaction_round_trip(self):
+        raw = encode_transaction(self.spend)
+        transaction = decode_transaction(raw.hex())
+
+        self.assertEqual(transaction.tx_id, get_tx_id(self.spend))
+        self.assertEqual(transaction._replace(tx_id=None), self.spend)
+        self.assertEqual(encode_transaction(transaction), raw)
+        # the unit is part of the hash
+        self.assertNotEqual(get_tx_id(self.spend._replace(unit="S")), transaction.tx_id)
+
+        with self.assertRaises(DecodeError):
+            decode_transaction(raw[:-1])
+
+        with self.assertRaises(DecodeError):
+            decode_transaction(raw + b"\x00")
+
+        # a misaligned read can put any byte where the unit should be
+        with self.assertRaises(DecodeError):
+            decode_transaction(raw[:-1] + b"\xb4")
+
+    def test_block_round_trip(self):
+        transactions = [self.coinbase, self.spend]
+        header = BlockHeader(
+            hash=None,
+            version=1,
+            previous_hash=hashlib.sha256(b"Previous").hexdigest(),
+            merkle_root=merkle_root([get_tx_id(tx) for tx in transactions]),
+            time=int(make_aware(datetime(2018, 1, 1)).timestamp()),
+            bits="1e0fffff",
+            nonce=7,
+        )
+        raw = encode_block(RawBlock(header, transactions, bytes(72)))
+        block = decode_block(raw)
+
+        self.assertEqual(block.header.hash, get_block_hash(header))
+        self.assertEqual(
+            block.header.merkle_root,
+            merkle_root([transaction.tx_id for transaction in block.transactions]),
+        )
+        self.assertEqual(block.signature, bytes(72))
+        self.assertEqual(encode_block(block), raw)
+        # the same header bytes that Block.validate hashes
+        self.assertEqual(
+            raw[:80],
+            get_header_bytes(
+                {
+                    "version": header.version,
+                    "previous_block__hash": header.previous_hash,
+                    "merkle_root": header.merkle_root,
+                    "time": datetime.fromtimestamp(header.time),
+                    "bits": header.bits,
+                    "nonce": header.nonce,
+                }
+            ),
+        )
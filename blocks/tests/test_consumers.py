@@ -0,0 +1,41 @@
+import hashlib
+
+import pytest
+from django.core.cache import cache
+from tenant_schemas.test.cases import TenantTestCase
+
+from blocks.consumers.ui.blocks import (
+    get_block_details_messages,
+    get_latest_blocks_message,
+)
+from blocks.models import Transaction
+
+
+class TestBlockConsumers(TenantTestCase):
+    def test_block_details_messages(self):
+        block = pytest.helpers.generate_block("test_block_details_messages")
+        Transaction.objects.create(
+            tx_id=hashlib.sha256(b"Details Tx").hexdigest(), block=block, index=0
+        )
+
+        messages = get_block_details_messages(block)
+        self.assertEqual(
+            [message["message_type"] for message in messages],
+            ["clear_block_details", "has_transactions", "block_transaction"],
+        )
+
+        # a new version of the block is rendered again
+        Transaction.objects.all().delete()
+        self.assertEqual(get_block_details_messages(block), messages)
+        block.save()
+        self.assertEqual(len(get_block_details_messages(block)), 1)
+
+    def test_latest_blocks_message(self):
+        cache.clear()
+        block = pytest.helpers.generate_block("test_latest_blocks_message")
+
+        latest_blocks = get_latest_blocks_message()["message"]
+        self.assertEqual(
+            [serialized["height"] for serialized in latest_blocks],
+            [block.height + 1, block.height, block.height - 1],
+        )
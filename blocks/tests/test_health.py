@@ -0,0 +1,63 @@
+import datetime
+
+from django.core.cache import cache
+from django.utils.timezone import now
+from tenant_schemas.test.cases import TenantTestCase
+
+from blocks.models import Info, InfoRollup, Orphan
+from blocks.utils.health import get_health_snapshot
+from blocks.utils.rollups import get_period_start, rollup_info
+
+
+class TestHealth(TenantTestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = get_period_start(now(), InfoRollup.DAY)
+        yesterday = self.today - datetime.timedelta(days=1)
+
+        for minutes, difficulty in [(10, 1), (20, 2), (70, 3)]:
+            for unit in ["B", "S"]:
+                info = Info.objects.create(
+                    unit=unit,
+                    max_height=100 + minutes,
+                    money_supply=1000,
+                    total_parked=10,
+                    connections=8,
+                    difficulty=difficulty,
+                    pay_tx_fee=0.01,
+                )
+                # time_added is set on creation
+                Info.objects.filter(pk=info.pk).update(
+                    time_added=yesterday + datetime.timedelta(minutes=minutes)
+                )
+
+        Orphan.objects.create(hash="a", date_time=yesterday)
+        Orphan.objects.create(hash="b", date_time=self.today)
+
+    def test_rollup_info(self):
+        rollup_info(self.today - datetime.timedelta(days=1))
+        yesterday = InfoRollup.objects.get(
+            period=InfoRollup.DAY, start=self.today - datetime.timedelta(days=1)
+        )
+        self.assertEqual(yesterday.difficulty, 3)
+        self.assertEqual(yesterday.max_height, 170)
+        self.assertEqual(yesterday.orphans, 1)
+        self.assertEqual(yesterday.samples, 6)
+        self.assertEqual(
+            yesterday.supply["S"], {"money_supply": 1000.0, "total_parked": 10.0}
+        )
+        hours = InfoRollup.objects.filter(period=InfoRollup.HOUR).exclude(samples=0)
+        self.assertEqual([rollup.difficulty for rollup in hours], [2, 3])
+
+        # rolling up again replaces the rows
+        rollup_info(self.today - datetime.timedelta(days=1))
+        self.assertEqual(InfoRollup.objects.filter(period=InfoRollup.DAY).count(), 2)
+
+    def test_get_health_snapshot(self):
+        rollup_info(self.today - datetime.timedelta(days=1))
+        snapshot = get_health_snapshot()
+        self.assertEqual([rollup["orphans"] for rollup in snapshot["series"]], [1, 1])
+        self.assertEqual(snapshot["series"][0]["difficulty"], 3)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_health_snapshot(), snapshot)
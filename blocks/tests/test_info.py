@@ -0,0 +1,70 @@
+import datetime
+
+from django.test import override_settings
+from django.utils.timezone import now
+from tenant_schemas.test.cases import TenantTestCase
+
+from blocks.models import Info
+from blocks.utils.info import (
+    apply_info_retention,
+    get_bucket_start,
+    get_latest_info,
+    get_latest_infos,
+    record_info,
+)
+
+
+def record(unit, height, connections):
+    return record_info(
+        {
+            "walletunit": unit,
+            "blocks": height,
+            "moneysupply": 1000,
+            "totalparked": 10,
+            "connections": connections,
+            "difficulty": 1,
+            "paytxfee": 0.01,
+        }
+    )
+
+
+class TestInfo(TenantTestCase):
+    def test_latest_info(self):
+        record("B", 100, 8)
+        latest = record("B", 101, 8)
+        record("S", 100, 8)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_latest_info("B"), latest)
+
+        self.assertEqual(sorted(get_latest_infos()), ["B", "S"])
+
+    def test_apply_info_retention(self):
+        moment = now()
+        hour = get_bucket_start(moment, 60 * 60) - datetime.timedelta(days=2)
+        day = get_bucket_start(moment, 60 * 60 * 24) - datetime.timedelta(days=5)
+
+        # two hours of minutely rows past the first age and a day past the second
+        for start, minutes in [(hour, 120), (day, 24 * 60)]:
+            for minute in range(0, minutes, 10):
+                info = record("B", minute, minute % 7)
+                Info.objects.filter(pk=info.pk).update(
+                    time_added=start + datetime.timedelta(minutes=minute)
+                )
+
+        latest = record("B", 1000, 8)
+        retention = override_settings(INFO_RETENTION=[(1, 60 * 60), (3, 60 * 60 * 24)])
+
+        with retention:
+            apply_info_retention(moment)
+
+        compacted = list(Info.objects.exclude(pk=latest.pk).order_by("time_added"))
+        self.assertEqual([info.samples for info in compacted], [144, 6, 6])
+        self.assertEqual(compacted[1].max_height, 50)
+        self.assertEqual(compacted[1].ranges["max_height"], [0, 50])
+        self.assertEqual(compacted[0].ranges["connections"], [0, 6])
+        self.assertEqual(get_latest_info("B"), latest)
+
+        # compacting again changes nothing
+        with retention:
+            self.assertEqual(apply_info_retention(moment), 0)
@@ -0,0 +1,147 @@
+import hashlib
+
+import pytest
+from tenant_schemas.test.cases import TenantTestCase
+
+from blocks.models import (
+    Address,
+    AddressActivity,
+    Block,
+    Transaction,
+    TxInput,
+    TxOutput,
+)
+from blocks.utils.ingest import ingest_rpc_transactions
+from blocks.utils.summary import summarize_block
+from blocks.utils.utxo import connect_block
+
+
+class TestIngest(TenantTestCase):
+    def test_ingest_rpc_transactions(self):
+        block = pytest.helpers.generate_block("test_ingest_rpc_transactions")
+        coinbase_id = hashlib.sha256(b"Coinbase").hexdigest()
+        spend_id = hashlib.sha256(b"Spend").hexdigest()
+        rpc_txs = [
+            {
+                "txid": coinbase_id,
+                "version": 1,
+                "time": 1514764800,
+                "locktime": 0,
+                "vin": [{"coinbase": "0123", "sequence": 4294967295}],
+                "vout": [
+                    {
+                        "value": 10.5,
+                        "n": 0,
+                        "scriptPubKey": {
+                            "hex": "abcd",
+                            "type": "pubkeyhash",
+                            "addresses": ["SAddressOne"],
+                        },
+                    }
+                ],
+            },
+            {
+                "txid": spend_id,
+                "version": 1,
+                "time": 1514764800,
+                "locktime": 0,
+                "vin": [{"txid": coinbase_id, "vout": 0, "sequence": 4294967295}],
+                "vout": [
+                    {
+                        "value": 10.0,
+                        "n": 0,
+                        "scriptPubKey": {
+                            "hex": "abcd",
+                            "type": "park",
+                            "park": {"duration": 1440, "unparkaddress": "SAddressTwo"},
+                        },
+                    }
+                ],
+            },
+        ]
+
+        ingest_rpc_transactions(block, rpc_txs)
+        # ingesting the same block twice should leave the same rows
+        ingest_rpc_transactions(block, rpc_txs)
+
+        self.assertEqual(
+            list(block.transactions.order_by("index").values_list("tx_id", flat=True)),
+            [coinbase_id, spend_id],
+        )
+        self.assertEqual(Address.objects.count(), 2)
+        self.assertEqual(TxOutput.objects.count(), 2)
+        self.assertEqual(TxInput.objects.count(), 2)
+
+        coinbase_output = TxOutput.objects.get(transaction__tx_id=coinbase_id)
+        self.assertEqual(coinbase_output.value, 105000)
+        self.assertEqual(coinbase_output.address.address, "SAddressOne")
+        self.assertTrue(coinbase_output.is_spent)
+
+        park_output = TxOutput.objects.get(transaction__tx_id=spend_id)
+        self.assertEqual(park_output.park_duration, 1440)
+        self.assertEqual(park_output.address.address, "SAddressTwo")
+        self.assertEqual(
+            Transaction.objects.get(tx_id=spend_id).inputs.get().previous_output,
+            coinbase_output,
+        )
+
+    def test_out_of_order_ingestion(self):
+        first, second = [
+            Block.objects.create(
+                height=height, hash=hashlib.sha256(b"Order%d" % height).hexdigest()
+            )
+            for height in range(1, 3)
+        ]
+        coinbase_id = hashlib.sha256(b"Order Coinbase").hexdigest()
+        spend_id = hashlib.sha256(b"Order Spend").hexdigest()
+
+        # the spending block is ingested and connected before the one it spends from
+        ingest_rpc_transactions(
+            second,
+            [
+                {
+                    "txid": spend_id,
+                    "vin": [{"txid": coinbase_id, "vout": 0}],
+                    "vout": [
+                        {
+                            "value": 10.0,
+                            "n": 0,
+                            "scriptPubKey": {"addresses": ["SOrderTwo"]},
+                        }
+                    ],
+                }
+            ],
+        )
+        connect_block(second)
+        summarize_block(second)
+        spender = Address.objects.get(address="SOrderTwo")
+
+        ingest_rpc_transactions(
+            first,
+            [
+                {
+                    "txid": coinbase_id,
+                    "vin": [{"coinbase": "0123"}],
+                    "vout": [
+                        {
+                            "value": 10.5,
+                            "n": 0,
+                            "scriptPubKey": {"addresses": ["SOrderOne"]},
+                        }
+                    ],
+                }
+            ],
+        )
+
+        activity = AddressActivity.objects.get(
+            transaction__tx_id=spend_id, address__address="SOrderOne"
+        )
+        self.assertEqual(activity.delta, -105000)
+        self.assertEqual(activity.direction, AddressActivity.SENT)
+        self.assertEqual(
+            AddressActivity.objects.get(
+                transaction__tx_id=spend_id, address=spender
+            ).delta,
+            100000,
+        )
+        self.assertIsNone(Block.objects.get(pk=second.pk).number_of_transactions)
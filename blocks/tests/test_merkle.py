@@ -0,0 +1,44 @@
+from django.test import SimpleTestCase
+
+from blocks.utils.merkle import (
+    merkle_proof,
+    merkle_root,
+    merkle_roots,
+    verify_merkle_proof,
+)
+
+TX_IDS = [
+    "e6f089cda1edf1d767f1a4803ca121bdf633e018b43eef12c9d634e7b2999434",
+    "badd47983f391b83f97ba33a6ce918592d8545d3747e247f226a14f0eab69e0f",
+]
+ROOT = "d11c7d89ab966802bbd4d738ffffae2aa7e8486a166f31a93f02cd10d77d3b8d"
+
+
+class TestMerkle(SimpleTestCase):
+    def test_merkle_root(self):
+        self.assertEqual(merkle_root([]), "")
+        self.assertEqual(merkle_root(TX_IDS[:1]), TX_IDS[0])
+        self.assertEqual(merkle_root(TX_IDS), ROOT)
+        # an odd leaf is paired with itself
+        self.assertEqual(
+            merkle_root(TX_IDS + TX_IDS[1:]), merkle_root(TX_IDS + TX_IDS[1:] * 2)
+        )
+
+    def test_merkle_roots(self):
+        tx_id_lists = [TX_IDS, [], TX_IDS[:1], TX_IDS * 3]
+        self.assertEqual(
+            merkle_roots(tx_id_lists), [merkle_root(l) for l in tx_id_lists]
+        )
+
+    def test_merkle_proof(self):
+        tx_ids = TX_IDS * 2 + TX_IDS[:1]
+        root = merkle_root(tx_ids)
+
+        for index, tx_id in enumerate(tx_ids):
+            proof = merkle_proof(tx_ids, index)
+            self.assertTrue(verify_merkle_proof(tx_id, proof, root))
+
+        self.assertEqual(
+            merkle_proof(TX_IDS, 0), [{"hash": TX_IDS[1], "side": "right"}]
+        )
+        self.assertFalse(verify_merkle_proof(TX_IDS[0], merkle_proof(TX_IDS, 1), ROOT))
@@ -0,0 +1,166 @@
+import hashlib
+import json
+
+from django.test import RequestFactory
+from tenant_schemas.test.cases import TenantTestCase
+
+from blocks.api.views.v1 import ParkRateData
+from blocks.models import (
+    ActiveParkRate,
+    ActiveParkRateRange,
+    Block,
+    ParkRate,
+    ParkRateSchedule,
+    ParkRateVote,
+)
+from blocks.utils.info import record_info
+from blocks.utils.park_rates import (
+    build_active_ranges,
+    get_active_ranges,
+    get_schedule,
+    set_active_schedule,
+)
+from daio.models import Coin
+
+LOW = [{"blocks": 1024, "rate": 0.0001}, {"blocks": 8192, "rate": 0.0005}]
+HIGH = [{"blocks": 1024, "rate": 0.0002}]
+
+
+def make_block(height):
+    return Block.objects.create(
+        height=height,
+        hash=hashlib.sha256("Rate Block{}".format(height).encode()).hexdigest(),
+    )
+
+
+class TestParkRates(TenantTestCase):
+    def setUp(self):
+        self.coin = Coin.objects.create(
+            name="NuBits", code="NBT", unit_code="B", chain=self.tenant, magic_byte=25
+        )
+
+    def get_ranges(self):
+        return list(
+            ActiveParkRateRange.objects.filter(coin=self.coin)
+            .order_by("valid_from")
+            .values_list("valid_from", "valid_to", "schedule__rates")
+        )
+
+    def test_schedules_are_deduplicated(self):
+        schedule = get_schedule(LOW)
+        self.assertEqual(get_schedule(list(reversed(LOW))), schedule)
+        self.assertEqual(ParkRateSchedule.objects.count(), 1)
+        self.assertEqual([rate.apr for rate in schedule.park_rates], [0.01, 0.05])
+
+    def test_set_active_schedule_at_tip(self):
+        low, high = get_schedule(LOW), get_schedule(HIGH)
+
+        for height in range(10, 15):
+            make_block(height)
+            set_active_schedule(self.coin, height, high if height >= 13 else low)
+
+        self.assertEqual(self.get_ranges(), [(10, 12, LOW), (13, None, HIGH)])
+
+    def test_set_active_schedule_in_history(self):
+        low, high = get_schedule(LOW), get_schedule(HIGH)
+
+        for height in range(10, 21):
+            make_block(height)
+
+        # blocks parsed out of order split and merge the ranges around them
+        set_active_schedule(self.coin, 10, low)
+        set_active_schedule(self.coin, 15, high)
+        self.assertEqual(
+            self.get_ranges(), [(10, 14, LOW), (15, 15, HIGH), (16, None, LOW)]
+        )
+
+        set_active_schedule(self.coin, 16, high)
+        self.assertEqual(
+            self.get_ranges(), [(10, 14, LOW), (15, 16, HIGH), (17, None, LOW)]
+        )
+
+        set_active_schedule(self.coin, 15, low)
+        set_active_schedule(self.coin, 16, low)
+        self.assertEqual(self.get_ranges(), [(10, None, LOW)])
+
+    def test_get_active_ranges(self):
+        other = Coin.objects.create(
+            name="NuShares", code="NSR", unit_code="S", chain=self.tenant, magic_byte=63
+        )
+        make_block(20)
+        set_active_schedule(self.coin, 10, get_schedule(LOW))
+        set_active_schedule(self.coin, 15, get_schedule(HIGH))
+        set_active_schedule(other, 12, get_schedule(HIGH))
+
+        with self.assertNumQueries(1):
+            active = {
+                active_range.coin.unit_code: active_range.rate_list
+                for active_range in get_active_ranges(13)
+            }
+
+        self.assertEqual(active, {"B": LOW, "S": HIGH})
+        self.assertEqual(
+            [active_range.coin for active_range in get_active_ranges(5)], []
+        )
+
+    def test_build_active_ranges(self):
+        low = [ParkRate.objects.create(**rate) for rate in LOW]
+        high = [ParkRate.objects.create(**rate) for rate in HIGH]
+
+        for height in range(10, 16):
+            active_rate = ActiveParkRate.objects.create(
+                block=make_block(height), coin=self.coin
+            )
+            active_rate.rates.add(*(high if height in (12, 13) else low))
+
+        self.assertEqual(build_active_ranges(self.coin, delete=True), 3)
+        self.assertEqual(
+            self.get_ranges(), [(10, 11, LOW), (12, 13, HIGH), (14, None, LOW)]
+        )
+        self.assertFalse(ActiveParkRate.objects.exists())
+
+    def test_park_rate_data(self):
+        make_block(20)
+        set_active_schedule(self.coin, 10, get_schedule(LOW))
+        record_info(
+            {
+                "walletunit": "B",
+                "blocks": 18,
+                "moneysupply": 1000,
+                "totalparked": 250,
+                "connections": 8,
+                "difficulty": 1,
+                "paytxfee": 0.01,
+            }
+        )
+
+        response = ParkRateData.as_view()(RequestFactory().get("/"), block_height=20)
+        data = json.loads(response.content)
+
+        self.assertEqual(data["rates"], {"B": LOW})
+        # the closest info below the height is used
+        self.assertEqual(data["parked_amounts_info"], {"B": 250})
+
+    def test_vote_rates(self):
+        block = make_block(20)
+        ParkRateVote.objects.create(
+            block=block, coin=self.coin, schedule=get_schedule(HIGH)
+        )
+        legacy = ParkRateVote.objects.create(block=make_block(21), coin=self.coin)
+        legacy.rates.add(*[ParkRate.objects.create(**rate) for rate in LOW])
+
+        # converted votes don't touch the legacy rates
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                Block._get_park_rates(
+                    block.parkratevote_set.select_related("coin", "schedule")
+                ),
+                {"B": HIGH},
+            )
+
+        self.assertEqual(
+            Block._get_park_rates(
+                legacy.block.parkratevote_set.select_related("coin", "schedule")
+            ),
+            {"B": LOW},
+        )
@@ -0,0 +1,136 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from blocks.utils.codec import (
+    COINBASE_INDEX,
+    NULL_HASH,
+    BlockHeader,
+    RawBlock,
+    RawTransaction,
+    TxIn,
+    TxOut,
+    encode_block,
+    encode_transaction,
+    get_block_hash,
+    get_tx_id,
+)
+from blocks.utils.merkle import merkle_root
+from blocks.utils.raw_blocks import get_raw_rpc_blocks
+from blocks.utils.scripts import decode_script_pub_key, decode_script_sig
+
+P2PKH = bytes.fromhex("76a914" + "00" * 20 + "88ac")
+SIGNATURE = bytes.fromhex("47" + "30" * 71 + "21" + "02" * 33)
+
+
+def make_transaction(inputs, script_pub_key=P2PKH):
+    return RawTransaction(
+        "", 1, 1500000000, inputs, [TxOut(123456, script_pub_key)], 0, "B"
+    )
+
+
+class TestRawBlocks(SimpleTestCase):
+    def test_decode_scripts(self):
+        script_pub_key = decode_script_pub_key(P2PKH, 0)
+        self.assertEqual(script_pub_key["type"], "pubkeyhash")
+        self.assertEqual(script_pub_key["addresses"], ["1111111111111111111114oLvT2"])
+        self.assertEqual(decode_script_pub_key(b"", 0)["type"], "nonstandard")
+        # anything unusual is left to the daemon
+        self.assertIsNone(decode_script_pub_key(b"\x6a\x01\x01", 0))
+
+        script_sig = decode_script_sig(SIGNATURE)
+        self.assertEqual(script_sig["asm"], "30" * 71 + " " + "02" * 33)
+        self.assertIsNone(decode_script_sig(b"\x01\x01"))
+
+    def test_get_raw_rpc_blocks(self):
+        coinbase = make_transaction([TxIn(NULL_HASH, COINBASE_INDEX, b"\x01", 0)])
+        spend = make_transaction([TxIn(get_tx_id(coinbase), 0, SIGNATURE, 0)])
+        unknown = make_transaction(
+            [TxIn(get_tx_id(coinbase), 0, SIGNATURE, 0)], b"\x6a"
+        )
+        transactions = {get_tx_id(tx): tx for tx in (coinbase, spend, unknown)}
+        tx_ids = list(transactions)
+
+        def send_batch_rpc(requests, schema_name):
+            results = []
+
+            for request in requests:
+                if request["method"] == "getblock":
+                    results.append(
+                        (
+                            {
+                                "hash": "a",
+                                "merkleroot": merkle_root(tx_ids),
+                                "tx": tx_ids,
+                            },
+                            "",
+                        )
+                    )
+                elif request["params"][1]:
+                    results.append(({"txid": request["params"][0]}, ""))
+                else:
+                    tx = transactions[request["params"][0]]
+                    results.append((encode_transaction(tx).hex(), ""))
+
+            return results
+
+        with mock.patch(
+            "blocks.utils.raw_blocks.send_batch_rpc", side_effect=send_batch_rpc
+        ) as batch, mock.patch(
+            "blocks.utils.raw_blocks.get_magic_bytes", return_value={"B": 25}
+        ):
+            rpc_block = get_raw_rpc_blocks(["a"], "test")["a"]
+
+        self.assertEqual([tx["txid"] for tx in rpc_block["tx"]], tx_ids)
+        self.assertEqual(rpc_block["tx"][0]["vin"], [{"coinbase": "01", "sequence": 0}])
+        self.assertEqual(rpc_block["tx"][1]["vout"][0]["value"], 12.3456)
+        self.assertEqual(rpc_block["tx"][1]["vin"][0]["txid"], tx_ids[0])
+        # only the tx with an unknown script was fetched verbose
+        self.assertEqual(
+            batch.call_args_list[-1][0][0],
+            [{"method": "getrawtransaction", "params": [tx_ids[2], 1]}],
+        )
+
+    def test_get_serialized_rpc_blocks(self):
+        coinbase = make_transaction([TxIn(NULL_HASH, COINBASE_INDEX, b"\x01", 0)])
+        spend = make_transaction([TxIn(get_tx_id(coinbase), 0, SIGNATURE, 0)])
+        unknown = make_transaction(
+            [TxIn(get_tx_id(coinbase), 0, SIGNATURE, 0)], b"\x6a"
+        )
+        tx_ids = [get_tx_id(tx) for tx in (coinbase, spend, unknown)]
+        header = BlockHeader(
+            "", 1, NULL_HASH, merkle_root(tx_ids), 1500000000, "1d00ffff", 0
+        )
+        block_hash = get_block_hash(header)
+        raw_block = encode_block(RawBlock(header, [coinbase, spend, unknown], b""))
+
+        def send_batch_rpc(requests, schema_name):
+            results = []
+
+            for request in requests:
+                if request["method"] == "getblock" and len(request["params"]) == 2:
+                    results.append((raw_block.hex(), ""))
+                elif request["method"] == "getblock":
+                    results.append(
+                        ({"merkleroot": merkle_root(tx_ids), "tx": tx_ids}, "")
+                    )
+                else:
+                    results.append(({"txid": request["params"][0]}, ""))
+
+            return results
+
+        with mock.patch(
+            "blocks.utils.raw_blocks.send_batch_rpc", side_effect=send_batch_rpc
+        ) as batch, mock.patch(
+            "blocks.utils.raw_blocks.get_magic_bytes", return_value={"B": 25}
+        ):
+            rpc_block = get_raw_rpc_blocks([block_hash], "test")[block_hash]
+
+        self.assertEqual([tx["txid"] for tx in rpc_block["tx"]], tx_ids)
+        self.assertEqual(rpc_block["tx"][1]["vin"][0]["txid"], tx_ids[0])
+        # one batch for the block and one for the tx with an unknown script
+        self.assertEqual(batch.call_count, 2)
+        self.assertEqual(
+            batch.call_args_list[-1][0][0],
+            [{"method": "getrawtransaction", "params": [tx_ids[2], 1]}],
+        )
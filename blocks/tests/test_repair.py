@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from tenant_schemas.test.cases import TenantTestCase
+
+from blocks.utils.repair import (
+    get_repair_metrics,
+    releases_repair,
+    schedule_repair,
+)
+
+
+class TestRepair(TenantTestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(REPAIR_MAX_IN_FLIGHT=2)
+    def test_schedule_repair(self):
+        with mock.patch("blocks.utils.repair.app.send_task") as send_task:
+            self.assertTrue(schedule_repair("repair_block", block_hash="aa"))
+            # pending work is coalesced
+            self.assertFalse(schedule_repair("repair_block", block_hash="aa"))
+            self.assertTrue(schedule_repair("validate_block", block_hash="aa"))
+            # over the cap
+            self.assertFalse(schedule_repair("repair_block", block_hash="bb"))
+
+        self.assertEqual(send_task.call_count, 2)
+        repair_key = send_task.call_args_list[0][1]["kwargs"]["repair_key"]
+        self.assertEqual(
+            send_task.call_args_list[0][1]["kwargs"],
+            {"block_hash": "aa", "repair_key": repair_key},
+        )
+
+        @releases_repair
+        def repair_block(block_hash):
+            return block_hash
+
+        self.assertEqual(repair_block("aa", repair_key=repair_key), "aa")
+        # finishing twice only releases once
+        repair_block("aa", repair_key=repair_key)
+
+        with mock.patch("blocks.utils.repair.app.send_task") as send_task:
+            # still cooling down
+            self.assertFalse(schedule_repair("repair_block", block_hash="aa"))
+            self.assertTrue(schedule_repair("repair_block", block_hash="bb"))
+
+        self.assertEqual(
+            get_repair_metrics(),
+            {
+                "in_flight": 2,
+                "sent": 3,
+                "deduplicated": 2,
+                "dropped": 1,
+                "completed": 1,
+            },
+        )
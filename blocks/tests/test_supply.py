@@ -0,0 +1,66 @@
+from decimal import Decimal
+from unittest import mock
+
+import requests
+from django.core.cache import cache
+from tenant_schemas.test.cases import TenantTestCase
+
+from blocks.models import Address, ExchangeBalance, NetworkFund, SupplySnapshot
+from blocks.utils.info import record_info
+from blocks.utils.supply import get_supply_snapshot, refresh_supply_snapshot
+from daio.models import Coin
+
+
+class TestSupply(TenantTestCase):
+    def setUp(self):
+        cache.clear()
+        self.coin = Coin.objects.create(
+            name="NuBits", code="NBT", unit_code="B", chain=self.tenant, magic_byte=25
+        )
+        record_info(
+            {
+                "walletunit": "B",
+                "blocks": 100,
+                "moneysupply": Decimal("1000"),
+                "totalparked": Decimal("100"),
+                "connections": 8,
+                "difficulty": 1,
+                "paytxfee": 0,
+            }
+        )
+        Address.objects.create(
+            address="SNetwork",
+            network_owned=True,
+            coin=self.coin,
+            current_balance=500000,
+        )
+        NetworkFund.objects.create(name="Fund", value=Decimal("25"), coin=self.coin)
+        ExchangeBalance.objects.create(
+            coin=self.coin, exchange="Exchange", api_url="http://grafana/api"
+        )
+
+    def test_refresh_supply_snapshot(self):
+        response = mock.Mock()
+        response.json.return_value = [{"datapoints": [[10, 1], [15, 2]]}]
+
+        with mock.patch("requests.get", return_value=response):
+            supply = refresh_supply_snapshot(self.coin)
+
+        # 1000 - (100 parked + 50 at the address + 25 fund + 15 on the exchange)
+        self.assertEqual(supply["version"], 1)
+        self.assertEqual(supply["circulating_supply"], Decimal("810"))
+        self.assertEqual(
+            supply["network_funds_on_exchange"],
+            [{"exchange": "Exchange", "balance": 15}],
+        )
+
+        # a failing exchange keeps its last balance
+        with mock.patch("requests.get", side_effect=requests.Timeout):
+            supply = refresh_supply_snapshot(self.coin)
+
+        self.assertEqual(supply["version"], 2)
+        self.assertEqual(supply["circulating_supply"], Decimal("810"))
+
+        # served from the cache without touching the snapshot table
+        SupplySnapshot.objects.update(circulating_supply=0)
+        self.assertEqual(get_supply_snapshot(self.coin)["circulating_supply"], 810)
@@ -0,0 +1,76 @@
+import hashlib
+
+from django.core.cache import cache
+from tenant_schemas.test.cases import TenantTestCase
+
+from blocks.models import Address, Block, Transaction, TxInput, TxOutput
+from blocks.utils.transaction_views import get_transaction_views, render_transactions
+from daio.models import Coin
+
+
+class TestTransactionViews(TenantTestCase):
+    def setUp(self):
+        cache.clear()
+        self.coin = Coin.objects.create(
+            name="NuBits", code="NBT", unit_code="B", chain=self.tenant, magic_byte=25
+        )
+        self.block = Block.objects.create(
+            height=30, hash=hashlib.sha256(b"View Block").hexdigest()
+        )
+        previous = Transaction.objects.create(
+            tx_id=hashlib.sha256(b"View Previous").hexdigest(), coin=self.coin
+        )
+        addresses = [
+            Address.objects.create(address="SView{}".format(i)) for i in range(2)
+        ]
+
+        for tx_index in range(5):
+            tx = Transaction.objects.create(
+                tx_id=hashlib.sha256("View Tx{}".format(tx_index).encode()).hexdigest(),
+                block=self.block,
+                index=tx_index,
+                coin=self.coin,
+                is_valid=True,
+            )
+            previous_output = TxOutput.objects.create(
+                transaction=previous, index=tx_index, value=90000, address=addresses[0],
+            )
+            TxInput.objects.create(
+                transaction=tx, index=0, previous_output=previous_output
+            )
+
+            for index, value in enumerate([10000, 20000, 30000]):
+                TxOutput.objects.create(
+                    transaction=tx,
+                    index=index,
+                    value=value,
+                    address=addresses[index % 2],
+                )
+
+    def test_get_transaction_views(self):
+        transactions = list(self.block.transactions.select_related("block", "coin"))
+
+        # the transactions, inputs and outputs regardless of the transaction count
+        with self.assertNumQueries(2):
+            views = get_transaction_views(transactions)
+
+        for view in views:
+            self.assertEqual(view.total_input, 9)
+            self.assertEqual(view.total_output, 6)
+            self.assertEqual(view.balance, -3)
+            self.assertEqual(view.address_inputs, {"SView0": 9})
+            self.assertEqual(view.address_outputs, {"SView0": 4, "SView1": 2})
+
+        # the model gives the same totals
+        tx = Transaction.objects.get(pk=views[0].tx.pk)
+        self.assertEqual(tx.address_outputs, views[0].address_outputs)
+
+    def test_render_transactions(self):
+        transactions = self.block.transactions.select_related("block", "coin")
+        fragments = render_transactions(transactions)
+        self.assertEqual(len(fragments), 5)
+        self.assertIn("SView1", fragments[0])
+
+        # confirmed fragments are served from the cache
+        with self.assertNumQueries(1):
+            self.assertEqual(render_transactions(transactions.all()), fragments)
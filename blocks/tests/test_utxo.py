@@ -0,0 +1,75 @@
+import hashlib
+
+import pytest
+from tenant_schemas.test.cases import TenantTestCase
+
+from blocks.models import (
+    Address,
+    AddressActivity,
+    Transaction,
+    TxInput,
+    TxOutput,
+    UnspentOutput,
+)
+from blocks.utils.utxo import connect_block, disconnect_block
+
+
+class TestUTXO(TenantTestCase):
+    def test_connect_disconnect(self):
+        block = pytest.helpers.generate_block("test_connect_disconnect")
+        address = Address.objects.create(address="SUTXOAddress")
+        tx0 = Transaction.objects.create(
+            tx_id=hashlib.sha256(b"UTXO Tx0").hexdigest(), block=block, index=0
+        )
+        tx1 = Transaction.objects.create(
+            tx_id=hashlib.sha256(b"UTXO Tx1").hexdigest(), block=block, index=1
+        )
+        spent = TxOutput.objects.create(
+            transaction=tx0, index=0, address=address, value=1000
+        )
+        TxOutput.objects.create(transaction=tx1, index=0, address=address, value=600)
+        TxInput.objects.create(transaction=tx1, index=0, previous_output=spent)
+
+        connect_block(block)
+        # connecting twice should not change the set
+        connect_block(block)
+        address.refresh_from_db()
+
+        self.assertEqual(UnspentOutput.objects.count(), 1)
+        self.assertEqual(address.balance, 600)
+        self.assertEqual(
+            dict(AddressActivity.objects.values_list("transaction", "delta")),
+            {tx0.pk: 1000, tx1.pk: -400},
+        )
+
+        disconnect_block(block)
+        address.refresh_from_db()
+
+        # tx0 is disconnected too so the output tx1 spent isn't restored
+        self.assertFalse(UnspentOutput.objects.exists())
+        self.assertEqual(address.balance, 0)
+        self.assertFalse(AddressActivity.objects.exists())
+
+    def test_disconnect_restores_earlier_outputs(self):
+        address = Address.objects.create(address="SUTXOEarlier")
+        earlier = pytest.helpers.generate_block("test_disconnect_earlier")
+        block = earlier.next_block
+        tx0 = Transaction.objects.create(
+            tx_id=hashlib.sha256(b"UTXO Earlier Tx0").hexdigest(), block=earlier
+        )
+        tx1 = Transaction.objects.create(
+            tx_id=hashlib.sha256(b"UTXO Earlier Tx1").hexdigest(), block=block
+        )
+        spent = TxOutput.objects.create(
+            transaction=tx0, index=0, address=address, value=1000
+        )
+        TxInput.objects.create(transaction=tx1, index=0, previous_output=spent)
+        connect_block(earlier)
+        connect_block(block)
+        self.assertFalse(UnspentOutput.objects.exists())
+
+        disconnect_block(block)
+        address.refresh_from_db()
+
+        self.assertEqual(UnspentOutput.objects.get().output, spent)
+        self.assertEqual(address.balance, 1000)
@@ -0,0 +1,102 @@
+import fcntl
+import hashlib
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import override_settings
+from tenant_schemas.test.cases import TenantTestCase
+
+from blocks.models import Block
+from blocks.utils import valid_hashes
+from blocks.utils.valid_hashes import get_prefix, get_valid_hashes, update_hash_index
+
+
+def make_hash(name):
+    return hashlib.sha256(name.encode()).hexdigest()
+
+
+def wire_hash(block_hash):
+    # wallets send hashes in byte order
+    return bytes.fromhex(block_hash)[::-1]
+
+
+class TestValidHashes(TenantTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings = override_settings(
+            HASH_INDEX_DIR=self.directory.name, HASH_INDEX_MAP_DEPTH=5
+        )
+        self.settings.enable()
+        valid_hashes._indexes.clear()
+        self.hashes = [make_hash("Valid {}".format(height)) for height in range(10)]
+
+        for height, block_hash in enumerate(self.hashes):
+            Block.objects.create(height=height, hash=block_hash)
+
+    def tearDown(self):
+        valid_hashes._indexes.clear()
+        self.settings.disable()
+        self.directory.cleanup()
+
+    def test_get_valid_hashes(self):
+        self.assertEqual(update_hash_index(), 10)
+
+        # the first hash we recognise, either from the index or the database
+        for body, start_height in [
+            (wire_hash(self.hashes[7]), 7),
+            (wire_hash(make_hash("Unknown")) + wire_hash(self.hashes[2]), 2),
+            (wire_hash(self.hashes[1]) + wire_hash(self.hashes[8]), 1),
+        ]:
+            self.assertEqual(
+                bytes(get_valid_hashes(body)),
+                b"".join(
+                    get_prefix(block_hash) for block_hash in self.hashes[start_height:]
+                ),
+            )
+
+        self.assertEqual(get_valid_hashes(wire_hash(make_hash("Unknown"))), b"")
+
+    def test_update_hash_index(self):
+        update_hash_index()
+        Block.objects.filter(height=8).update(height=None)
+        Block.objects.create(height=8, hash=make_hash("Reorg 8"))
+
+        # heights after a missing block aren't indexed
+        Block.objects.filter(height=9).delete()
+        Block.objects.create(height=11, hash=make_hash("Gap 11"))
+        self.assertEqual(update_hash_index(), 9)
+
+        self.assertEqual(
+            bytes(get_valid_hashes(wire_hash(self.hashes[6]))),
+            get_prefix(self.hashes[6])
+            + get_prefix(self.hashes[7])
+            + get_prefix(make_hash("Reorg 8")),
+        )
+
+    def test_writers_take_turns(self):
+        update_hash_index()
+        written = threading.Event()
+        # the writer thread has its own connection so give it this schema's path
+        path = valid_hashes.get_index_path()
+
+        def write_hash_index(path, from_height):
+            written.set()
+            return 0
+
+        with mock.patch(
+            "blocks.utils.valid_hashes.get_index_path", return_value=path
+        ), mock.patch(
+            "blocks.utils.valid_hashes._write_hash_index", side_effect=write_hash_index
+        ), open(
+            path + ".lock", "w"
+        ) as lock_file:
+            # another process is rewriting the index
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            writer = threading.Thread(target=update_hash_index)
+            writer.start()
+            self.assertFalse(written.wait(0.2))
+
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            writer.join(5)
+            self.assertTrue(written.is_set())
@@ -0,0 +1,73 @@
+import hashlib
+from datetime import datetime
+
+from django.utils.timezone import make_aware
+from tenant_schemas.test.cases import TenantTestCase
+
+from blocks.models import Block, Transaction
+from blocks.utils.validation import RangeValidator, get_header_bytes
+
+
+class TestRangeValidator(TenantTestCase):
+    def create_chain(self, length):
+        blocks = [
+            Block.objects.create(
+                height=0, hash=hashlib.sha256(b"Genesis").hexdigest(), is_valid=True
+            )
+        ]
+
+        for height in range(1, length):
+            header = {
+                "version": 1,
+                "previous_block__hash": blocks[-1].hash,
+                "merkle_root": hashlib.sha256(str(height).encode()).hexdigest(),
+                "time": make_aware(datetime(2018, 1, 1, 0, height)),
+                "bits": "1e0fffff",
+                "nonce": height,
+            }
+            header_hash = hashlib.sha256(
+                hashlib.sha256(get_header_bytes(header)).digest()
+            ).digest()
+            block = Block.objects.create(
+                height=height,
+                hash=header_hash[::-1].hex(),
+                version=header["version"],
+                merkle_root=header["merkle_root"],
+                time=header["time"],
+                bits=header["bits"],
+                nonce=header["nonce"],
+                previous_block=blocks[-1],
+            )
+            blocks[-1].next_block = block
+            blocks[-1].save()
+            blocks.append(block)
+
+        return blocks
+
+    def test_range_validator(self):
+        blocks = self.create_chain(6)
+
+        self.assertEqual(RangeValidator(window=2).run(), [])
+
+        # a bad header and both ends of a broken link are reported
+        blocks[2].nonce = 0
+        blocks[2].save()
+        blocks[4].next_block = None
+        blocks[4].save()
+
+        self.assertEqual(RangeValidator(window=2).run(), [2, 4, 5])
+        self.assertEqual(RangeValidator(3, 5).run(), [4, 5])
+
+    def test_range_validator_merkle(self):
+        blocks = self.create_chain(3)
+
+        for block in blocks[1:]:
+            Transaction.objects.create(tx_id=block.merkle_root, block=block, index=0)
+
+        self.assertEqual(RangeValidator(1, 2, merkle=True).run(), [])
+
+        Transaction.objects.create(
+            tx_id=hashlib.sha256(b"Extra").hexdigest(), block=blocks[2], index=1
+        )
+        self.assertEqual(RangeValidator(1, 2).run(), [])
+        self.assertEqual(RangeValidator(1, 2, merkle=True).run(), [2])
@@ -1,6 +1,10 @@
+import hashlib
+
+from django.test import override_settings
 from tenant_schemas.test.cases import TenantTestCase
 
-from blocks.models import ParkRate
+from blocks.models import Block, MotionVote, ParkRate, VoteTally
+from blocks.utils.vote_tally import get_vote_window, invalidate_vote_window
 
 
 class TestVotes(TenantTestCase):
@@ -11,3 +15,37 @@ class TestVotes(TenantTestCase):
         self.assertEqual(rate.days, 1)
         self.assertEqual(rate.daily_percentage, 0.00273973)
         self.assertEqual(rate.overall_return, 2.73973)
+
+    @override_settings(VOTE_WINDOW=3)
+    def test_vote_window(self):
+        motion = hashlib.sha256(b"Motion").hexdigest()
+
+        for height in range(8):
+            block = Block.objects.create(
+                height=height,
+                hash=hashlib.sha256(str(height).encode()).hexdigest(),
+                coinage_destroyed=10,
+            )
+
+            if height in (1, 2, 3, 6):
+                MotionVote.objects.create(block=block, hash=motion)
+
+        window = get_vote_window(3)
+        tally = VoteTally.objects.get(vote_type=VoteTally.MOTION, hash=motion)
+        self.assertEqual(window.sharedays_destroyed, 40)
+        self.assertEqual(tally.number_of_votes, 3)
+        self.assertEqual(tally.first_seen, 1)
+
+        # stepping the window should match counting from scratch
+        window = get_vote_window(6)
+        tally.refresh_from_db()
+        self.assertEqual(window.sharedays_destroyed, 40)
+        self.assertEqual(tally.number_of_votes, 2)
+        self.assertEqual(tally.sharedays_destroyed, 20)
+
+        MotionVote.objects.filter(block__height=6).delete()
+        invalidate_vote_window(6)
+        get_vote_window(6)
+        tally.refresh_from_db()
+        self.assertEqual(tally.number_of_votes, 1)
+        self.assertEqual(tally.first_seen, 1)
@@ -0,0 +1,80 @@
+import logging
+from collections import defaultdict
+
+from django.db.models import Sum
+
+from blocks.models.transaction import AddressActivity, Transaction, TxInput, TxOutput
+
+logger = logging.getLogger(__name__)
+
+
+def remove_activity(transactions):
+    AddressActivity.objects.filter(transaction__in=transactions).delete()
+
+
+def add_activity(transactions):
+    """
+    Write the AddressActivity rows for the main chain transactions.
+    Existing rows for the transactions are replaced so this is safe to repeat
+    """
+    remove_activity(transactions)
+
+    tx_positions = {
+        tx_id: (block_id, height, index)
+        for tx_id, block_id, height, index in Transaction.objects.filter(
+            pk__in=transactions, block__height__isnull=False
+        ).values_list("id", "block_id", "block__height", "index")
+    }
+
+    if not tx_positions:
+        return
+
+    tx_ids = list(tx_positions)
+
+    received = defaultdict(int)
+    sent = defaultdict(int)
+
+    for tx_id, address_id, value in (
+        TxOutput.objects.filter(transaction__in=tx_ids, address__isnull=False)
+        .values("transaction", "address")
+        .annotate(total=Sum("value"))
+        .values_list("transaction", "address", "total")
+    ):
+        received[(tx_id, address_id)] += value or 0
+
+    for tx_id, address_id, value in (
+        TxInput.objects.filter(
+            transaction__in=tx_ids, previous_output__address__isnull=False
+        )
+        .values("transaction", "previous_output__address")
+        .annotate(total=Sum("previous_output__value"))
+        .values_list("transaction", "previous_output__address", "total")
+    ):
+        sent[(tx_id, address_id)] += value or 0
+
+    rows = []
+
+    for key in set(received) | set(sent):
+        tx_id, address_id = key
+        block_id, height, index = tx_positions[tx_id]
+
+        if key in received and key in sent:
+            direction = AddressActivity.BOTH
+        elif key in received:
+            direction = AddressActivity.RECEIVED
+        else:
+            direction = AddressActivity.SENT
+
+        rows.append(
+            AddressActivity(
+                address_id=address_id,
+                transaction_id=tx_id,
+                block_id=block_id,
+                height=height,
+                tx_index=index,
+                delta=received.get(key, 0) - sent.get(key, 0),
+                direction=direction,
+            )
+        )
+
+    AddressActivity.objects.bulk_create(rows, ignore_conflicts=True)
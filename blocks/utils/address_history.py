@@ -0,0 +1,79 @@
+import logging
+
+from django.conf import settings
+from django.db.models import Q
+
+from blocks.models.transaction import AddressActivity, Transaction
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(height, index):
+    return "{}:{}".format(height, index)
+
+
+def decode_cursor(cursor):
+    """
+    Return the (height, index) of the cursor or None if no cursor was given.
+    Raises ValueError for a malformed cursor
+    """
+    if not cursor:
+        return None
+
+    height, index = cursor.split(":")
+    return int(height), int(index)
+
+
+def get_page_size(limit=None):
+    if not limit:
+        return settings.ADDRESS_HISTORY_PAGE_SIZE
+
+    return max(1, min(int(limit), settings.ADDRESS_HISTORY_MAX_PAGE_SIZE))
+
+
+def address_transactions(address):
+    """
+    The main chain transactions that spend from or pay to the address,
+    newest first. Nothing is evaluated until the queryset is sliced
+    """
+    return Transaction.objects.filter(address_activity__address=address).order_by(
+        "-address_activity__height", "-address_activity__tx_index"
+    )
+
+
+def get_address_history(address, cursor=None, limit=None):
+    """
+    Return a page of (transaction, delta) newest first and the cursor of the next
+    page, which is None on the last page.
+    Pages are read from the AddressActivity index keyed on (height, tx index) so
+    each costs the same to fetch however deep into the history it is
+    """
+    limit = get_page_size(limit)
+    activity = (
+        AddressActivity.objects.filter(address=address)
+        .select_related("transaction__block", "transaction__coin")
+        .order_by("-height", "-tx_index")
+    )
+    position = decode_cursor(cursor)
+
+    if position:
+        height, index = position
+        activity = activity.filter(
+            Q(height__lt=height) | Q(height=height, tx_index__lt=index)
+        )
+
+    # fetch one extra to know if there is another page
+    page = list(activity[: limit + 1])
+    next_cursor = None
+
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1].height, page[-1].tx_index)
+
+    history = []
+
+    for row in page:
+        row.transaction.block_height = row.height
+        history.append((row.transaction, row.delta))
+
+    return history, next_cursor
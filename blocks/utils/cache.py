@@ -0,0 +1,235 @@
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Max
+
+logger = logging.getLogger(__name__)
+
+# top block heights per schema, cached in process for SERIALIZED_TOP_HEIGHT_SECONDS
+_top_heights = {}
+
+
+class LRUCache(object):
+    """
+    A small thread safe in process cache.
+    Entries expire after max_age seconds so other processes' invalidations are
+    eventually seen
+    """
+
+    def __init__(self, max_size, max_age):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                return None
+
+            value, expires = entry
+
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.max_age)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+class DiskCache(object):
+    """
+    zlib compressed pickles in a directory, one file per key.
+    Files older than max_age seconds are treated as missing. Superseded versions
+    are never read again so prune() removes them
+    """
+
+    def __init__(self, directory, max_age):
+        self.directory = directory
+        self.max_age = max_age
+
+    def path(self, key):
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.directory, name[:2], name)
+
+    def get(self, key):
+        path = self.path(key)
+
+        try:
+            if os.path.getmtime(path) < time.time() - self.max_age:
+                os.remove(path)
+                return None
+
+            with open(path, "rb") as cache_file:
+                return pickle.loads(zlib.decompress(cache_file.read()))
+        except FileNotFoundError:
+            return None
+        except (OSError, zlib.error, pickle.UnpicklingError) as e:
+            logger.warning(f"Unable to read {key} from disk cache: {e}")
+            return None
+
+    def set(self, key, value):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+
+        try:
+            with open(temp_path, "wb") as cache_file:
+                cache_file.write(zlib.compress(pickle.dumps(value)))
+            # rename is atomic so readers never see a partial file
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Unable to write {key} to disk cache: {e}")
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def prune(self):
+        """
+        Remove the files older than max_age, including abandoned temp files.
+        Returns the number removed
+        """
+        expires = time.time() - self.max_age
+        removed = 0
+
+        for directory, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(directory, name)
+
+                try:
+                    if os.path.getmtime(path) < expires:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+
+        return removed
+
+
+class SerializedCache(object):
+    """
+    Tiered cache for serialized blocks and transactions.
+    Lookups go in process LRU -> django cache -> optional disk store.
+    Entries deeper than SERIALIZED_CACHE_DEPTH confirmations can't change without a
+    deep reorg so they are stored in every tier. They have no timeout in the django
+    cache and the disk copies expire after SERIALIZED_CACHE_DISK_SECONDS.
+    Shallower entries are only stored in the django cache with the default timeout
+    """
+
+    def __init__(self):
+        self.lru = LRUCache(
+            settings.SERIALIZED_CACHE_LRU_SIZE, settings.SERIALIZED_CACHE_LRU_SECONDS
+        )
+        self.disk = (
+            DiskCache(
+                settings.SERIALIZED_CACHE_DIR, settings.SERIALIZED_CACHE_DISK_SECONDS
+            )
+            if settings.SERIALIZED_CACHE_DIR
+            else None
+        )
+
+    def get(self, key):
+        value = self.lru.get(key)
+
+        if value is not None:
+            return value
+
+        value = cache.get(key)
+
+        if value is None and self.disk:
+            value = self.disk.get(key)
+
+            if value is not None:
+                # the disk copy is at most max_age old so don't outlive it by more
+                cache.set(key, value, self.disk.max_age)
+
+        if value is not None:
+            self.lru.set(key, value)
+
+        return value
+
+    def set(self, key, value, height=None):
+        if not is_deep(height):
+            cache.set(key, value)
+            return
+
+        self.lru.set(key, value)
+        cache.set(key, value, None)
+
+        if self.disk:
+            self.disk.set(key, value)
+
+    def delete(self, key):
+        self.lru.delete(key)
+        cache.delete(key)
+
+        if self.disk:
+            self.disk.delete(key)
+
+    def prune(self):
+        if not self.disk:
+            return 0
+
+        removed = self.disk.prune()
+        logger.info(f"Pruned {removed} files from the disk cache")
+        return removed
+
+
+def get_top_height():
+    cached = _top_heights.get(connection.schema_name)
+
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+
+    from blocks.models import Block
+
+    top_height = Block.objects.aggregate(Max("height"))["height__max"]
+    _top_heights[connection.schema_name] = (
+        top_height,
+        time.monotonic() + settings.SERIALIZED_TOP_HEIGHT_SECONDS,
+    )
+    return top_height
+
+
+def is_deep(height):
+    """
+    True if the block at height has more than SERIALIZED_CACHE_DEPTH confirmations
+    """
+    if height is None:
+        return False
+
+    top_height = get_top_height()
+
+    if top_height is None:
+        return False
+
+    return top_height - height >= settings.SERIALIZED_CACHE_DEPTH
+
+
+serialized_cache = SerializedCache()
@@ -0,0 +1,187 @@
+import logging
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.db.transaction import atomic
+
+from blocks.models import Block, Orphan, Transaction
+from blocks.utils.rpc import get_block_hashes
+from blocks.utils.utxo import disconnect_transactions
+from blocks.utils.vote_tally import invalidate_vote_window
+
+logger = logging.getLogger(__name__)
+
+# how many heights are compared with the daemon per round when looking for a fork
+ANCESTOR_WINDOW = 100
+
+
+class ReorgError(Exception):
+    """
+    A fork couldn't be resolved safely so nothing was orphaned
+    """
+
+
+@atomic
+def orphan_blocks(blocks):
+    """
+    Take the blocks off the main chain in bulk.
+    Their transactions are removed from the UTXO set, their heights are cleared,
+    blocks pointing at them are unlinked and Orphan rows are recorded.
+    Returns the heights the blocks were at
+    """
+    blocks = [block for block in blocks if block.height is not None]
+
+    if not blocks:
+        return []
+
+    heights = [block.height for block in blocks]
+
+    block_ids = [block.pk for block in blocks]
+    logger.warning(f"Orphaning blocks {', '.join(str(block) for block in blocks)}")
+
+    # the orphaned transactions and those they spent from serialize the spends
+    # and heights that are about to change. Bump the cache version as update()
+    # skips save()
+    Transaction.objects.filter(
+        Q(block__in=block_ids) | Q(output__input__transaction__block__in=block_ids)
+    ).update(cache_version=F("cache_version") + 1)
+
+    disconnect_transactions(Transaction.objects.filter(block__in=block_ids))
+    invalidate_vote_window(min(block.height for block in blocks))
+
+    Block.objects.filter(next_block__in=block_ids).exclude(pk__in=block_ids).update(
+        next_block=None, cache_version=F("cache_version") + 1
+    )
+    Block.objects.filter(previous_block__in=block_ids).exclude(pk__in=block_ids).update(
+        previous_block=None, cache_version=F("cache_version") + 1
+    )
+    Block.objects.filter(pk__in=block_ids).update(
+        height=None, cache_version=F("cache_version") + 1
+    )
+    Orphan.objects.bulk_create(
+        [Orphan(hash=block.hash) for block in blocks], ignore_conflicts=True
+    )
+
+    for block in blocks:
+        block.height = None
+
+    return heights
+
+
+def find_common_ancestor(height):
+    """
+    Walk back from height comparing our block hashes with the daemon's.
+    Returns (height of the last block both chains share, {height: daemon hash}).
+    Raises ReorgError if the daemon doesn't return every hash asked for or no
+    shared block is found within MAX_REORG_DEPTH heights
+    """
+    daemon_hashes = {}
+    max_height = height
+    min_allowed = max(height - settings.MAX_REORG_DEPTH, 0)
+
+    while max_height >= min_allowed:
+        min_height = max(max_height - ANCESTOR_WINDOW + 1, min_allowed)
+        heights = range(min_height, max_height + 1)
+        window_hashes = get_block_hashes(heights, schema_name=connection.schema_name)
+
+        if len(window_hashes) != len(heights):
+            # a failed or partial batch looks like a fork at every missing height
+            raise ReorgError(
+                f"Daemon returned {len(window_hashes)} of {len(heights)} block "
+                f"hashes between {min_height} and {max_height}"
+            )
+
+        daemon_hashes.update(window_hashes)
+        our_hashes = dict(
+            Block.objects.filter(
+                height__gte=min_height, height__lte=max_height
+            ).values_list("height", "hash")
+        )
+
+        for ancestor in range(max_height, min_height - 1, -1):
+            if ancestor in our_hashes and our_hashes[ancestor] == daemon_hashes.get(
+                ancestor
+            ):
+                return ancestor, daemon_hashes
+
+        max_height = min_height - 1
+
+    if min_allowed > 0:
+        raise ReorgError(
+            f"No common ancestor within {settings.MAX_REORG_DEPTH} blocks of {height}"
+        )
+
+    return -1, daemon_hashes
+
+
+def reorganize(height, block_hash, previous_hash):
+    """
+    Make room for the block with block_hash at height.
+    If previous_hash isn't our block at height - 1 the chain has forked, so the
+    orphaned branch back to the common ancestor is rolled back in one go and the
+    new branch is synced from the daemon.
+    A different block at height itself is always orphaned.
+    Returns the heights that now hold different blocks.
+    Raises ReorgError, before anything is orphaned, if the fork can't be resolved
+    """
+    from blocks.utils.sync import RangeSync
+
+    orphans = list(Block.objects.filter(height=height).exclude(hash=block_hash))
+
+    if height > 0 and previous_hash:
+        parent_hash = (
+            Block.objects.filter(height=height - 1)
+            .values_list("hash", flat=True)
+            .first()
+        )
+
+        if parent_hash and parent_hash != previous_hash:
+            ancestor, daemon_hashes = find_common_ancestor(height - 1)
+            logger.warning(
+                f"Chain forked at {ancestor + 1}. "
+                f"Rolling back {height - 1 - ancestor} blocks"
+            )
+            orphans += [
+                block
+                for block in Block.objects.filter(
+                    height__gt=ancestor, height__lt=height
+                )
+                # only heights the daemon has a different block for
+                if block.height in daemon_hashes
+                and block.hash != daemon_hashes[block.height]
+            ]
+            orphaned_heights = orphan_blocks(orphans)
+
+            # connect the new branch up to this block. Each reorg gets its own
+            # checkpoint so one over the same range as an earlier one isn't skipped
+            reorg_sync = RangeSync(
+                ancestor + 1, height - 1, name=f"reorg_{ancestor}_{block_hash}"
+            )
+
+            try:
+                if not reorg_sync.run():
+                    logger.error(
+                        f"Unable to connect the new branch from {ancestor + 1} "
+                        f"to {height - 1}"
+                    )
+            finally:
+                reorg_sync.checkpoint.delete()
+
+            return orphaned_heights
+
+    return orphan_blocks(orphans)
+
+
+def connect_rpc_block(rpc_block):
+    """
+    Add the verbose rpc block at its height, rolling back any fork first.
+    Returns the Block and the heights whose blocks were replaced
+    """
+    block_hash = rpc_block.get("hash")
+    replaced_heights = reorganize(
+        rpc_block.get("height"), block_hash, rpc_block.get("previousblockhash")
+    )
+    block, _ = Block.objects.get_or_create(hash=block_hash)
+    block.parse_rpc_block(rpc_block)
+    return block, replaced_heights
@@ -1,3 +1,4 @@
+import json
 import logging
 import time
 
@@ -14,3 +15,16 @@ def send_to_channel(channel, message):
         logger.error("Channel Full. Sleeping for a bit")
         time.sleep(600)
         return send_to_channel(channel, message)
+
+
+def send_to_reply_channel(message, payload):
+    """
+    Send the payload to a single client.
+    A client that isn't reading its messages is dropped rather than blocking the worker
+    """
+    try:
+        message.reply_channel.send({"text": json.dumps(payload)}, immediately=True)
+        return True
+    except BaseChannelLayer.ChannelFull:
+        logger.warning(f"Reply channel {message.reply_channel} is full")
+        return False
@@ -0,0 +1,243 @@
+# Binary serialization of Nu blocks and transactions.
+# Nu transactions are Peercoin transactions with a unit byte after the lock time.
+# Blocks are an 80 byte header followed by the transactions and the block signature.
+# Decoding hashes the original byte ranges so tx ids and block hashes need no
+# re-encoding and no database access
+import hashlib
+import struct
+from collections import namedtuple
+
+HEADER_SIZE = 80
+NULL_HASH = "0" * 64
+COINBASE_INDEX = 0xFFFFFFFF
+
+TxIn = namedtuple(
+    "TxIn", ["previous_tx_id", "previous_index", "script_sig", "sequence"]
+)
+TxOut = namedtuple("TxOut", ["value", "script_pub_key"])
+RawTransaction = namedtuple(
+    "RawTransaction",
+    ["tx_id", "version", "time", "inputs", "outputs", "lock_time", "unit"],
+)
+BlockHeader = namedtuple(
+    "BlockHeader",
+    ["hash", "version", "previous_hash", "merkle_root", "time", "bits", "nonce"],
+)
+RawBlock = namedtuple("RawBlock", ["header", "transactions", "signature"])
+
+_uint16 = struct.Struct("<H")
+_uint32 = struct.Struct("<I")
+_uint64 = struct.Struct("<Q")
+_header = struct.Struct("<I32s32sI4sI")
+
+
+class DecodeError(ValueError):
+    pass
+
+
+def double_sha256(data):
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()
+
+
+def hash_to_hex(hash_bytes):
+    # hashes are displayed byte reversed
+    return bytes(hash_bytes[::-1]).hex()
+
+
+def hex_to_hash(hash_hex):
+    return bytes.fromhex(hash_hex)[::-1]
+
+
+class Reader(object):
+    """
+    Read values from raw bytes without copying them until they're needed
+    """
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.position = 0
+
+    def read(self, length):
+        end = self.position + length
+
+        if end > len(self.data):
+            raise DecodeError(
+                f"Wanted {length} bytes at {self.position} of {len(self.data)}"
+            )
+
+        value = self.data[self.position : end]
+        self.position = end
+        return value
+
+    def read_struct(self, packer):
+        value = packer.unpack_from(self.read(packer.size))
+        return value[0] if len(value) == 1 else value
+
+    def read_var_int(self):
+        prefix = self.read(1)[0]
+
+        if prefix == 0xFD:
+            return self.read_struct(_uint16)
+        if prefix == 0xFE:
+            return self.read_struct(_uint32)
+        if prefix == 0xFF:
+            return self.read_struct(_uint64)
+
+        return prefix
+
+    def read_var_bytes(self):
+        return bytes(self.read(self.read_var_int()))
+
+    @property
+    def finished(self):
+        return self.position == len(self.data)
+
+
+def var_int_bytes(number):
+    if number < 0xFD:
+        return bytes((number,))
+    if number <= 0xFFFF:
+        return b"\xfd" + _uint16.pack(number)
+    if number <= 0xFFFFFFFF:
+        return b"\xfe" + _uint32.pack(number)
+    return b"\xff" + _uint64.pack(number)
+
+
+def _to_bytes(raw):
+    return bytes.fromhex(raw) if isinstance(raw, str) else raw
+
+
+def read_transaction(reader):
+    start = reader.position
+    version, time = reader.read_struct(_uint32), reader.read_struct(_uint32)
+    inputs = []
+
+    for _ in range(reader.read_var_int()):
+        previous_tx_id = hash_to_hex(reader.read(32))
+        previous_index = reader.read_struct(_uint32)
+        script_sig = reader.read_var_bytes()
+        inputs.append(
+            TxIn(
+                previous_tx_id, previous_index, script_sig, reader.read_struct(_uint32)
+            )
+        )
+
+    outputs = [
+        TxOut(reader.read_struct(_uint64), reader.read_var_bytes())
+        for _ in range(reader.read_var_int())
+    ]
+    lock_time = reader.read_struct(_uint32)
+    unit_byte = bytes(reader.read(1))
+
+    try:
+        unit = unit_byte.decode("ascii")
+    except UnicodeDecodeError as e:
+        raise DecodeError(f"Unit byte {unit_byte.hex()} isn't a unit code") from e
+
+    tx_id = hash_to_hex(double_sha256(reader.data[start : reader.position]))
+    return RawTransaction(tx_id, version, time, inputs, outputs, lock_time, unit)
+
+
+def read_header(reader):
+    header_bytes = reader.read(HEADER_SIZE)
+    version, previous_hash, merkle_root, time, bits, nonce = _header.unpack_from(
+        header_bytes
+    )
+    return BlockHeader(
+        hash=hash_to_hex(double_sha256(header_bytes)),
+        version=version,
+        previous_hash=hash_to_hex(previous_hash),
+        merkle_root=hash_to_hex(merkle_root),
+        time=time,
+        bits=hash_to_hex(bits),
+        nonce=nonce,
+    )
+
+
+def decode_transaction(raw):
+    """
+    Decode a raw transaction from bytes or hex, as returned by getrawtransaction
+    """
+    reader = Reader(_to_bytes(raw))
+    transaction = read_transaction(reader)
+
+    if not reader.finished:
+        raise DecodeError("Unexpected data after the transaction")
+
+    return transaction
+
+
+def decode_block(raw):
+    """
+    Decode a raw block from bytes or hex, as returned by getblock <hash> false
+    """
+    reader = Reader(_to_bytes(raw))
+    header = read_header(reader)
+    transactions = [read_transaction(reader) for _ in range(reader.read_var_int())]
+    signature = reader.read_var_bytes()
+
+    if not reader.finished:
+        raise DecodeError("Unexpected data after the block signature")
+
+    return RawBlock(header, transactions, signature)
+
+
+def encode_transaction(transaction):
+    """
+    Serialize a RawTransaction. tx_id is ignored
+    """
+    parts = [
+        _uint32.pack(transaction.version),
+        _uint32.pack(transaction.time),
+        var_int_bytes(len(transaction.inputs)),
+    ]
+
+    for tx_input in transaction.inputs:
+        parts += [
+            hex_to_hash(tx_input.previous_tx_id),
+            _uint32.pack(tx_input.previous_index),
+            var_int_bytes(len(tx_input.script_sig)),
+            tx_input.script_sig,
+            _uint32.pack(tx_input.sequence),
+        ]
+
+    parts.append(var_int_bytes(len(transaction.outputs)))
+
+    for tx_output in transaction.outputs:
+        parts += [
+            _uint64.pack(tx_output.value),
+            var_int_bytes(len(tx_output.script_pub_key)),
+            tx_output.script_pub_key,
+        ]
+
+    parts += [_uint32.pack(transaction.lock_time), transaction.unit.encode()]
+    return b"".join(parts)
+
+
+def encode_header(header):
+    """
+    Serialize a BlockHeader. hash is ignored
+    """
+    return _header.pack(
+        header.version,
+        hex_to_hash(header.previous_hash),
+        hex_to_hash(header.merkle_root),
+        header.time,
+        hex_to_hash(header.bits),
+        header.nonce,
+    )
+
+
+def encode_block(block):
+    parts = [encode_header(block.header), var_int_bytes(len(block.transactions))]
+    parts += [encode_transaction(transaction) for transaction in block.transactions]
+    parts += [var_int_bytes(len(block.signature)), block.signature]
+    return b"".join(parts)
+
+
+def get_tx_id(transaction):
+    return hash_to_hex(double_sha256(encode_transaction(transaction)))
+
+
+def get_block_hash(header):
+    return hash_to_hex(double_sha256(encode_header(header)))
@@ -1,10 +1,18 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from django.conf import settings
 
+logger = logging.getLogger(__name__)
 
-def get_exchange_balances(coin_object):
-    exchange_balances = []
 
-    for exchange_balance in coin_object.exchangebalance_set.all():
+def get_exchange_balance(exchange_balance):
+    """
+    Query Grafana for the latest balance held on the exchange.
+    Returns None if the query fails
+    """
+    try:
         r = requests.get(
             url=exchange_balance.api_url,
             headers={
@@ -12,29 +20,58 @@ def get_exchange_balances(coin_object):
                 "Accept": "application/json",
                 "Content-Type": "application/json",
             },
+            timeout=settings.EXCHANGE_BALANCE_TIMEOUT,
         )
-
-        try:
-            query_data = r.json()
-        except ValueError as e:
-            print(
-                "Invalid response when querying data for {}: {}".format(
-                    exchange_balance.api_url, e
-                )
+        query_data = r.json()
+        data_points = query_data[0].get("datapoints", [])
+    except (requests.RequestException, ValueError, IndexError, AttributeError) as e:
+        logger.warning(
+            "Invalid response when querying data for {}: {}".format(
+                exchange_balance.api_url, e
             )
-            continue
+        )
+        return None
+
+    time = 0
+    balance = {"exchange": exchange_balance.exchange, "balance": 0}
+
+    for data_point in data_points:
+        if int(data_point[1]) > time:
+            time = data_point[1]
+            if data_point[0]:
+                balance["balance"] = data_point[0]
+
+    return balance
 
-        time = 0
-        exchange_balance = {"exchange": exchange_balance.exchange, "balance": 0}
 
-        print(query_data)
+def get_exchange_balances(coin_object, previous_balances=None):
+    """
+    Query the exchange balances for the coin concurrently.
+    An exchange that fails keeps its balance from previous_balances if it has one
+    """
+    exchanges = list(coin_object.exchangebalance_set.all())
+
+    if not exchanges:
+        return []
+
+    previous_balances = {
+        balance.get("exchange"): balance for balance in previous_balances or []
+    }
+
+    with ThreadPoolExecutor(
+        max_workers=min(len(exchanges), settings.EXCHANGE_BALANCE_WORKERS)
+    ) as executor:
+        balances = list(executor.map(get_exchange_balance, exchanges))
+
+    exchange_balances = []
+
+    for exchange, balance in zip(exchanges, balances):
+        if balance is None:
+            balance = previous_balances.get(exchange.exchange)
 
-        for data_point in query_data[0].get("datapoints", []):
-            if int(data_point[1]) > time:
-                time = data_point[1]
-                if data_point[0]:
-                    exchange_balance["balance"] = data_point[0]
+            if balance is None:
+                continue
 
-        exchange_balances.append(exchange_balance)
+        exchange_balances.append(balance)
 
     return exchange_balances
@@ -0,0 +1,80 @@
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils.timezone import now
+
+from blocks.models import Block, Peer
+from blocks.utils.rollups import get_daily_series
+
+
+def get_peer_identifier(peer):
+    return hashlib.md5(
+        "{}:{}".format(peer.address, peer.port).encode("utf-8")
+    ).hexdigest()[:10]
+
+
+def build_health_snapshot():
+    top_block = (
+        Block.objects.exclude(height=None)
+        .exclude(time=None)
+        .order_by("-height")
+        .values("height", "time")
+        .first()
+    )
+    peers = []
+
+    if top_block:
+        # the peers with their distance from the top block
+        peers = [
+            {
+                "identifier": get_peer_identifier(peer),
+                "height": peer.height,
+                "height_diff": peer.height - top_block["height"],
+                "sub_version": peer.sub_version,
+                "last_receive": peer.last_receive,
+                "last_send": peer.last_send,
+            }
+            for peer in Peer.objects.filter(
+                last_receive__gte=now() - datetime.timedelta(days=14),
+                height__gte=top_block["height"] - 100000,
+            ).order_by("-height")
+        ]
+
+    return {
+        "top_block": top_block,
+        "next_block_time": (
+            top_block["time"] + datetime.timedelta(minutes=1) if top_block else None
+        ),
+        "peers": peers,
+        "series": [
+            {
+                "start": rollup.start,
+                "difficulty": float(rollup.difficulty)
+                if rollup.difficulty is not None
+                else None,
+                "connections": rollup.connections,
+                "max_height": rollup.max_height,
+                "supply": rollup.supply,
+                "orphans": rollup.orphans,
+            }
+            for rollup in get_daily_series(settings.HEALTH_SERIES_DAYS)
+        ],
+    }
+
+
+def get_health_snapshot():
+    """
+    The top block, peers and daily series shown on the health page.
+    Cached for HEALTH_CACHE_SECONDS as monitoring polls it
+    """
+    cache_key = "{}_health".format(connection.schema_name)
+    snapshot = cache.get(cache_key)
+
+    if snapshot is None:
+        snapshot = build_health_snapshot()
+        cache.set(cache_key, snapshot, settings.HEALTH_CACHE_SECONDS)
+
+    return snapshot
@@ -0,0 +1,162 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.transaction import atomic
+from django.utils.timezone import utc
+
+from blocks.models import Info, LatestInfo
+
+logger = logging.getLogger(__name__)
+
+# the fields compacted rows keep the min and max of
+RANGE_FIELDS = [
+    "max_height",
+    "money_supply",
+    "total_parked",
+    "connections",
+    "difficulty",
+]
+
+
+@atomic
+def record_info(rpc):
+    """
+    Save the getinfo result of a coin and point its LatestInfo at it
+    """
+    info = Info.objects.create(
+        unit=rpc["walletunit"],
+        max_height=rpc["blocks"],
+        money_supply=rpc["moneysupply"],
+        total_parked=rpc.get("totalparked"),
+        connections=rpc["connections"],
+        difficulty=rpc["difficulty"],
+        pay_tx_fee=rpc["paytxfee"],
+    )
+    LatestInfo.objects.update_or_create(unit=info.unit, defaults={"info": info})
+    return info
+
+
+def get_latest_infos():
+    """
+    Return a dict of unit: most recent Info in one query
+    """
+    return {
+        latest.unit: latest.info for latest in LatestInfo.objects.select_related("info")
+    }
+
+
+def get_latest_info(unit):
+    latest = LatestInfo.objects.select_related("info").filter(unit=unit).first()
+    return latest.info if latest else None
+
+
+def get_range(info, field):
+    if info.ranges and field in info.ranges:
+        return info.ranges[field]
+
+    value = getattr(info, field)
+    value = float(value) if value is not None else None
+    return [value, value]
+
+
+def merge_infos(infos):
+    """
+    Fold the infos, oldest first, into the last of them.
+    It keeps its values and time and gains the sample count and ranges of them all
+    """
+    last = infos[-1]
+    ranges = {}
+
+    for field in RANGE_FIELDS:
+        values = [
+            value
+            for info in infos
+            for value in get_range(info, field)
+            if value is not None
+        ]
+        ranges[field] = [min(values), max(values)] if values else [None, None]
+
+    last.samples = sum(info.samples for info in infos)
+    last.ranges = ranges
+    return last
+
+
+@atomic
+def compact_info(since, until, bucket_seconds):
+    """
+    Compact the Info rows between since and until to one row per unit per bucket.
+    The rows LatestInfo points at are left alone.
+    Returns the number of rows removed
+    """
+    keep = set(LatestInfo.objects.values_list("info_id", flat=True))
+    buckets = defaultdict(list)
+
+    for info in (
+        Info.objects.filter(time_added__gte=since, time_added__lt=until)
+        .exclude(pk__in=keep)
+        .order_by("time_added")
+        .iterator()
+    ):
+        bucket = int(info.time_added.timestamp()) // bucket_seconds
+        buckets[(info.unit, bucket)].append(info)
+
+    compacted = []
+    removed = []
+
+    for infos in buckets.values():
+        if len(infos) < 2:
+            continue
+
+        # time_added can't be set on new rows so the last row is kept and updated
+        compacted.append(merge_infos(infos))
+        removed += [info.pk for info in infos[:-1]]
+
+    Info.objects.bulk_update(compacted, ["samples", "ranges"], batch_size=1000)
+    Info.objects.filter(pk__in=removed).delete()
+    logger.info(
+        f"Compacted {len(removed) + len(compacted)} info rows into {len(compacted)} "
+        f"between {since} and {until}"
+    )
+    return len(removed)
+
+
+def get_bucket_start(moment, bucket_seconds):
+    return datetime.fromtimestamp(
+        int(moment.timestamp()) // bucket_seconds * bucket_seconds, tz=utc
+    )
+
+
+def apply_info_retention(moment, lookback=None):
+    """
+    Compact the Info rows that have aged past each INFO_RETENTION tier.
+    Only rows up to lookback before each age are examined, or all of them if no
+    lookback is given
+    """
+    removed = 0
+
+    for age_days, bucket_seconds in settings.INFO_RETENTION:
+        # only whole buckets are compacted
+        until = get_bucket_start(moment - timedelta(days=age_days), bucket_seconds)
+        since = (
+            until - lookback
+            if lookback is not None
+            else Info.objects.order_by("time_added")
+            .values_list("time_added", flat=True)
+            .first()
+        )
+
+        if since is None:
+            continue
+
+        since = get_bucket_start(since, bucket_seconds)
+        # about a day at a time keeps each transaction small
+        window = timedelta(seconds=bucket_seconds * max(1, 86400 // bucket_seconds))
+
+        while since < until:
+            window_end = min(since + window, until)
+            removed += compact_info(since, window_end, bucket_seconds)
+            since = window_end
+
+    return removed
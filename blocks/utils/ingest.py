@@ -0,0 +1,287 @@
+import logging
+from datetime import datetime
+
+from django.db import connection
+from django.db.models import F
+from django.utils.timezone import make_aware
+
+from blocks.models.transaction import Address, Transaction, TxInput, TxOutput
+from blocks.utils.activity import add_activity
+from blocks.utils.numbers import convert_to_satoshis
+from blocks.utils.summary import invalidate_summaries
+from daio.models import Coin
+
+logger = logging.getLogger(__name__)
+
+# inputs spending this txid are custodial grant rewards and have no previous output
+GRANT_TX_ID = "0000000000000000000000000000000000000000000000000000000000000000"
+
+
+def _get_output_address(script_pub_key):
+    """
+    Return the address string that an output pays to, following the unpark address
+    for park outputs in the same way as Transaction.parse_output
+    """
+    if script_pub_key.get("type") == "park":
+        return script_pub_key.get("park", {}).get("unparkaddress")
+
+    addresses = script_pub_key.get("addresses", [])
+    return addresses[-1] if addresses else None
+
+
+def _get_coins():
+    return {
+        coin.unit_code: coin
+        for coin in Coin.objects.filter(chain__schema_name=connection.schema_name)
+    }
+
+
+def _get_addresses(address_strings):
+    """
+    Fetch the Address objects for the given strings, creating any that are missing.
+    Costs two queries regardless of the number of addresses
+    """
+    address_strings = set(a for a in address_strings if a)
+
+    if not address_strings:
+        return {}
+
+    addresses = Address.objects.in_bulk(address_strings, field_name="address")
+    missing = address_strings - set(addresses.keys())
+
+    if missing:
+        Address.objects.bulk_create(
+            [Address(address=address) for address in missing], ignore_conflicts=True
+        )
+        addresses = Address.objects.in_bulk(address_strings, field_name="address")
+
+    return addresses
+
+
+def _get_transactions(tx_ids):
+    """
+    Fetch the Transaction objects for the given tx_ids, creating any that are missing
+    """
+    tx_ids = set(tx_ids)
+
+    if not tx_ids:
+        return {}, set()
+
+    transactions = Transaction.objects.in_bulk(tx_ids, field_name="tx_id")
+    missing = tx_ids - set(transactions.keys())
+
+    if missing:
+        Transaction.objects.bulk_create(
+            [Transaction(tx_id=tx_id) for tx_id in missing], ignore_conflicts=True
+        )
+        transactions = Transaction.objects.in_bulk(tx_ids, field_name="tx_id")
+
+    return transactions, missing
+
+
+def _refresh_spending_transactions(outputs, block_transactions):
+    """
+    The outputs were placeholders that later blocks' inputs already spend.
+    Those blocks may have been connected before this one was ingested, so the
+    activity and summaries they calculated from the empty outputs are redone
+    """
+    spending = list(
+        Transaction.objects.filter(
+            input__previous_output__in=outputs, block__height__isnull=False
+        )
+        .exclude(pk__in=[tx.pk for tx in block_transactions])
+        .values_list("pk", "block_id")
+        .distinct()
+    )
+
+    if not spending:
+        return
+
+    tx_ids = [tx_id for tx_id, _ in spending]
+    Transaction.objects.filter(pk__in=tx_ids).update(
+        cache_version=F("cache_version") + 1
+    )
+    add_activity(tx_ids)
+    invalidate_summaries(set(block_id for _, block_id in spending))
+    logger.info(f"Refreshed {len(tx_ids)} transactions spending outputs of this block")
+
+
+def ingest_rpc_transactions(block, rpc_txs):
+    """
+    Write the transactions, inputs, outputs and addresses of a verbose getblock
+    payload using a fixed number of bulk statements.
+    Should be called inside a database transaction so a block is written all or nothing.
+    Returns the list of Transaction objects in block order
+    """
+    logger.info(f"Bulk ingesting {len(rpc_txs)} transactions for block {block}")
+
+    if not rpc_txs:
+        return []
+
+    coins = _get_coins()
+
+    # transactions
+    transactions, _ = _get_transactions([rpc_tx.get("txid") for rpc_tx in rpc_txs])
+    block_transactions = []
+
+    for tx_index, rpc_tx in enumerate(rpc_txs):
+        tx = transactions[rpc_tx.get("txid")]
+        tx.block = block
+        tx.index = tx_index
+        tx.version = rpc_tx.get("version")
+        tx.lock_time = rpc_tx.get("locktime", 0)
+
+        tx_time = rpc_tx.get("time")
+        tx.time = make_aware(datetime.fromtimestamp(int(tx_time))) if tx_time else None
+
+        if rpc_tx.get("unit") in coins:
+            tx.coin = coins[rpc_tx.get("unit")]
+
+        block_transactions.append(tx)
+
+    Transaction.objects.bulk_update(
+        block_transactions, ["block", "index", "version", "lock_time", "time", "coin"]
+    )
+
+    # addresses used by the outputs
+    addresses = _get_addresses(
+        _get_output_address(rpc_output.get("scriptPubKey", {}))
+        for rpc_tx in rpc_txs
+        for rpc_output in rpc_tx.get("vout", [])
+    )
+
+    # outputs. Existing outputs are updated in place as they may be referenced by inputs
+    existing_outputs = {
+        (tx_output.transaction_id, tx_output.index): tx_output
+        for tx_output in TxOutput.objects.filter(transaction__in=block_transactions)
+    }
+    new_outputs = []
+    updated_outputs = []
+
+    for tx, rpc_tx in zip(block_transactions, rpc_txs):
+        for rpc_output in rpc_tx.get("vout", []):
+            script_pub_key = rpc_output.get("scriptPubKey", {})
+            key = (tx.id, rpc_output.get("n"))
+            tx_output = existing_outputs.get(
+                key, TxOutput(transaction=tx, index=key[1])
+            )
+
+            tx_output.value = convert_to_satoshis(rpc_output.get("value", 0.0))
+            tx_output.script_pub_key_asm = script_pub_key.get("asm", "")
+            tx_output.script_pub_key_hex = script_pub_key.get("hex", "")
+            tx_output.script_pub_key_type = script_pub_key.get("type", "")
+            tx_output.script_pub_key_req_sig = script_pub_key.get("reqSigs", "")
+            tx_output.address = addresses.get(_get_output_address(script_pub_key))
+            tx_output.park_duration = (
+                script_pub_key.get("park", {}).get("duration")
+                if tx_output.script_pub_key_type == "park"
+                else None
+            )
+
+            if tx_output.pk:
+                updated_outputs.append(tx_output)
+            else:
+                new_outputs.append(tx_output)
+
+    TxOutput.objects.bulk_create(new_outputs)
+    TxOutput.objects.bulk_update(
+        updated_outputs,
+        [
+            "value",
+            "script_pub_key_asm",
+            "script_pub_key_hex",
+            "script_pub_key_type",
+            "script_pub_key_req_sig",
+            "address",
+            "park_duration",
+        ],
+    )
+
+    # previous transactions and outputs spent by the inputs
+    spends = [
+        (rpc_input.get("txid"), rpc_input.get("vout"))
+        for rpc_tx in rpc_txs
+        for rpc_input in rpc_tx.get("vin", [])
+        if rpc_input.get("txid") and rpc_input.get("txid") != GRANT_TX_ID
+    ]
+    previous_transactions, missing_transactions = _get_transactions(
+        [tx_id for tx_id, _ in spends]
+    )
+
+    for tx_id in missing_transactions:
+        logger.error(f"tx {tx_id[:8]} not found for previous output in {block}")
+        previous_transactions[tx_id].send_for_repair()
+
+    previous_outputs = {
+        (tx_output.transaction_id, tx_output.index): tx_output
+        for tx_output in TxOutput.objects.filter(
+            transaction__in=previous_transactions.values()
+        )
+    }
+    missing_outputs = [
+        TxOutput(transaction=previous_transactions[tx_id], index=vout)
+        for tx_id, vout in set(spends)
+        if (previous_transactions[tx_id].id, vout) not in previous_outputs
+    ]
+
+    if missing_outputs:
+        TxOutput.objects.bulk_create(missing_outputs)
+
+        for tx_output in missing_outputs:
+            previous_outputs[(tx_output.transaction_id, tx_output.index)] = tx_output
+
+    # inputs are rebuilt from scratch. Nothing references them so this is safe and
+    # avoids unique clashes on previous_output when an input moves between indexes
+    TxInput.objects.filter(transaction__in=block_transactions).delete()
+    new_inputs = []
+
+    for tx, rpc_tx in zip(block_transactions, rpc_txs):
+        for input_index, rpc_input in enumerate(rpc_tx.get("vin", [])):
+            script_sig = rpc_input.get("scriptSig", {})
+            tx_input = TxInput(
+                transaction=tx,
+                index=input_index,
+                sequence=rpc_input.get("sequence", 4294967295),
+                coin_base=rpc_input.get("coinbase", ""),
+                script_sig_asm=script_sig.get("asm", ""),
+                script_sig_hex=script_sig.get("hex", ""),
+            )
+
+            prev_tx_id = rpc_input.get("txid")
+
+            if prev_tx_id and prev_tx_id != GRANT_TX_ID:
+                tx_input.previous_output = previous_outputs[
+                    (previous_transactions[prev_tx_id].id, rpc_input.get("vout"))
+                ]
+
+            new_inputs.append(tx_input)
+
+    # release the outputs from any other input that claims to spend them
+    TxInput.objects.filter(
+        previous_output__in=[
+            tx_input.previous_output
+            for tx_input in new_inputs
+            if tx_input.previous_output
+        ]
+    ).update(previous_output=None)
+
+    TxInput.objects.bulk_create(new_inputs)
+
+    # the serialized transactions and the ones whose outputs were spent have changed
+    Transaction.objects.filter(
+        pk__in=[tx.pk for tx in block_transactions]
+        + [tx.pk for tx in previous_transactions.values()]
+    ).update(cache_version=F("cache_version") + 1)
+
+    for tx in block_transactions:
+        tx.cache_version += 1
+
+    if updated_outputs:
+        _refresh_spending_transactions(updated_outputs, block_transactions)
+
+    logger.info(
+        f"Ingested {len(block_transactions)} transactions, {len(new_inputs)} inputs "
+        f"and {len(new_outputs) + len(updated_outputs)} outputs for block {block}"
+    )
+
+    return block_transactions
@@ -0,0 +1,121 @@
+import hashlib
+
+HASH_SIZE = 32
+
+
+def _double_sha256(data):
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()
+
+
+def _to_bytes(tx_id):
+    # tx ids are displayed byte reversed
+    return bytes.fromhex(tx_id)[::-1]
+
+
+def _to_hex(hash_bytes):
+    return bytes(hash_bytes[::-1]).hex()
+
+
+def _reduce(buffer, offset, count):
+    """
+    Hash the count leaves stored at offset in the buffer down to their root.
+    Each level is written over the start of the one below it, so the root ends up
+    in the first HASH_SIZE bytes
+    """
+    view = memoryview(buffer)
+
+    while count > 1:
+        for i in range(0, count, 2):
+            left = offset + i * HASH_SIZE
+
+            if i + 1 < count:
+                # the pair is contiguous in the buffer
+                digest = _double_sha256(view[left : left + 2 * HASH_SIZE])
+            else:
+                # odd, hash the last item twice
+                digest = _double_sha256(bytes(view[left : left + HASH_SIZE]) * 2)
+
+            # never ahead of the pairs still to be read
+            start = offset + (i // 2) * HASH_SIZE
+            view[start : start + HASH_SIZE] = digest
+
+        count = (count + 1) // 2
+
+    view.release()
+
+
+def merkle_roots(tx_id_lists):
+    """
+    Calculate the merkle root of each list of tx ids.
+    All of the leaves are hashed in one contiguous buffer.
+    A list with no tx ids has an empty root
+    """
+    buffer = bytearray()
+    trees = []
+
+    for tx_ids in tx_id_lists:
+        trees.append((len(buffer), len(tx_ids)))
+        buffer += b"".join(_to_bytes(tx_id) for tx_id in tx_ids)
+
+    roots = []
+
+    for offset, count in trees:
+        if not count:
+            roots.append("")
+            continue
+
+        _reduce(buffer, offset, count)
+        roots.append(_to_hex(buffer[offset : offset + HASH_SIZE]))
+
+    return roots
+
+
+def merkle_root(tx_ids):
+    return merkle_roots([tx_ids])[0]
+
+
+def merkle_proof(tx_ids, index):
+    """
+    Return the sibling hashes needed to prove the tx at index is in the tree, from
+    the leaves up, with the side each is hashed on
+    """
+    if not 0 <= index < len(tx_ids):
+        raise IndexError(f"No transaction at index {index}")
+
+    level = [_to_bytes(tx_id) for tx_id in tx_ids]
+    proof = []
+
+    while len(level) > 1:
+        if len(level) % 2 == 1:
+            level.append(level[-1])
+
+        sibling = index ^ 1
+        proof.append(
+            {
+                "hash": _to_hex(level[sibling]),
+                "side": "left" if sibling < index else "right",
+            }
+        )
+        level = [
+            _double_sha256(level[i] + level[i + 1]) for i in range(0, len(level), 2)
+        ]
+        index //= 2
+
+    return proof
+
+
+def verify_merkle_proof(tx_id, proof, root):
+    """
+    Check that hashing tx_id with the proof gives the merkle root
+    """
+    current = _to_bytes(tx_id)
+
+    for step in proof:
+        sibling = _to_bytes(step["hash"])
+
+        if step["side"] == "left":
+            current = _double_sha256(sibling + current)
+        else:
+            current = _double_sha256(current + sibling)
+
+    return _to_hex(current) == root
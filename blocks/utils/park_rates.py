@@ -0,0 +1,266 @@
+import hashlib
+import json
+import logging
+from bisect import bisect_right
+from itertools import groupby
+
+from django.db.transaction import atomic
+
+from blocks.models.network import ActiveParkRate, ActiveParkRateRange
+from blocks.models.votes import ParkRateSchedule, ParkRateVote
+from daio.models import Coin
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_rates(rates):
+    """
+    The rates as {"blocks": int, "rate": float} ordered by blocks so the same rates
+    always serialize the same way
+    """
+    return sorted(
+        (
+            {
+                "blocks": int(rate.get("blocks") or 0),
+                "rate": float(rate.get("rate") or 0),
+            }
+            for rate in rates
+        ),
+        key=lambda rate: (rate["blocks"], rate["rate"]),
+    )
+
+
+def get_schedule_hash(rates):
+    return hashlib.sha256(
+        json.dumps(normalize_rates(rates), sort_keys=True).encode()
+    ).hexdigest()
+
+
+def get_schedule(rates):
+    """
+    Return the ParkRateSchedule for the rates, creating it the first time they're seen
+    """
+    schedule, _ = ParkRateSchedule.objects.get_or_create(
+        hash=get_schedule_hash(rates), defaults={"rates": normalize_rates(rates)}
+    )
+    return schedule
+
+
+def get_range_at(ranges, height):
+    """
+    Return the range that includes height, from a queryset of one coin's ranges
+    """
+    active_range = ranges.filter(valid_from__lte=height).order_by("-valid_from").first()
+
+    if active_range and active_range.valid_to is not None:
+        if active_range.valid_to < height:
+            return None
+
+    return active_range
+
+
+@atomic
+def set_active_schedule(coin, height, schedule):
+    """
+    Record that the schedule is active for the coin at height.
+    The range including height is split around it and the new range is merged with
+    neighbours that have the same schedule, so unchanged rates cost nothing
+    """
+    from blocks.models import Block
+
+    # ranges that don't exist yet can't be locked so serialise on the coin
+    Coin.objects.select_for_update().get(pk=coin.pk)
+    ranges = ActiveParkRateRange.objects.filter(coin=coin)
+    current = get_range_at(ranges, height)
+
+    if current and current.schedule_id == schedule.pk:
+        return current
+
+    if current:
+        current_to = current.valid_to
+
+        if current.valid_from == height:
+            current.delete()
+        else:
+            current.valid_to = height - 1
+            current.save(update_fields=["valid_to"])
+
+        # heights after this one keep the schedule their own blocks set
+        if (
+            current_to is None and Block.objects.filter(height__gt=height).exists()
+        ) or (current_to is not None and current_to > height):
+            ActiveParkRateRange.objects.create(
+                coin=coin,
+                schedule_id=current.schedule_id,
+                valid_from=height + 1,
+                valid_to=current_to,
+            )
+            valid_to = height
+        else:
+            valid_to = current_to
+    else:
+        next_range = ranges.filter(valid_from__gt=height).order_by("valid_from").first()
+        valid_to = next_range.valid_from - 1 if next_range else None
+
+    new_range = ActiveParkRateRange(
+        coin=coin, schedule=schedule, valid_from=height, valid_to=valid_to
+    )
+
+    previous_range = ranges.filter(valid_to=height - 1, schedule=schedule).first()
+
+    if previous_range:
+        new_range.valid_from = previous_range.valid_from
+        previous_range.delete()
+
+    if valid_to is not None:
+        following_range = ranges.filter(
+            valid_from=valid_to + 1, schedule=schedule
+        ).first()
+
+        if following_range:
+            new_range.valid_to = following_range.valid_to
+            following_range.delete()
+
+    new_range.save()
+    return new_range
+
+
+def get_active_ranges(height):
+    """
+    Return the active park rate range of each coin at height in one query
+    """
+    active_ranges = [
+        active_range
+        for active_range in ActiveParkRateRange.objects.filter(valid_from__lte=height)
+        .select_related("coin", "schedule")
+        .order_by("coin_id", "-valid_from")
+        .distinct("coin_id")
+        if active_range.valid_to is None or active_range.valid_to >= height
+    ]
+    return sorted(active_ranges, key=lambda active_range: active_range.coin.index)
+
+
+def convert_park_rate_votes(batch_size=1000, delete=False):
+    """
+    Point the park rate votes still using the rates relation at their schedule.
+    With delete their rates rows are removed once converted.
+    Returns the number of votes converted
+    """
+    schedules = {}
+    converted = 0
+
+    while True:
+        votes = list(
+            ParkRateVote.objects.filter(schedule__isnull=True)
+            .prefetch_related("rates")
+            .order_by("pk")[:batch_size]
+        )
+
+        if not votes:
+            break
+
+        for vote in votes:
+            rates = vote.rate_list
+            schedule_hash = get_schedule_hash(rates)
+
+            if schedule_hash not in schedules:
+                schedules[schedule_hash] = get_schedule(rates)
+
+            vote.schedule = schedules[schedule_hash]
+
+        with atomic():
+            ParkRateVote.objects.bulk_update(votes, ["schedule"])
+
+            if delete:
+                ParkRateVote.rates.through.objects.filter(
+                    parkratevote_id__in=[vote.pk for vote in votes]
+                ).delete()
+
+        converted += len(votes)
+        logger.info(f"Converted {converted} park rate votes")
+
+    return converted
+
+
+def build_active_ranges(coin, delete=False):
+    """
+    Build the coin's ActiveParkRateRanges from its ActiveParkRate rows.
+    Consecutive blocks with the same rates share a range. Heights already covered
+    by a range are left as they are.
+    With delete the ActiveParkRate rows are removed afterwards.
+    Returns the number of ranges created
+    """
+    existing = list(
+        ActiveParkRateRange.objects.filter(coin=coin).order_by("valid_from")
+    )
+    starts = [active_range.valid_from for active_range in existing]
+
+    def is_covered(height):
+        index = bisect_right(starts, height) - 1
+        return index >= 0 and (
+            existing[index].valid_to is None or existing[index].valid_to >= height
+        )
+
+    def get_next_start(height):
+        index = bisect_right(starts, height)
+        return starts[index] if index < len(starts) else None
+
+    schedules = {}
+    ranges = []
+
+    rows = (
+        ActiveParkRate.objects.filter(coin=coin, block__height__isnull=False)
+        .order_by("block__height", "rates__blocks")
+        .values_list("block__height", "rates__blocks", "rates__rate")
+        .iterator()
+    )
+
+    for height, height_rows in groupby(rows, key=lambda row: row[0]):
+        if is_covered(height):
+            continue
+
+        rates = [
+            {"blocks": blocks, "rate": rate}
+            for _, blocks, rate in height_rows
+            if blocks is not None
+        ]
+        schedule_hash = get_schedule_hash(rates)
+
+        if schedule_hash not in schedules:
+            schedules[schedule_hash] = get_schedule(rates)
+
+        schedule = schedules[schedule_hash]
+        next_start = get_next_start(height)
+
+        if (
+            ranges
+            and ranges[-1].schedule_id == schedule.pk
+            and get_next_start(ranges[-1].valid_from) == next_start
+        ):
+            # the same rates as the previous block with no existing range between
+            continue
+
+        ranges.append(
+            ActiveParkRateRange(coin=coin, schedule=schedule, valid_from=height)
+        )
+
+    for index, active_range in enumerate(ranges):
+        # each range runs up to the next one, or the next existing range
+        following = [
+            start
+            for start in [
+                ranges[index + 1].valid_from if index + 1 < len(ranges) else None,
+                get_next_start(active_range.valid_from),
+            ]
+            if start is not None
+        ]
+        active_range.valid_to = min(following) - 1 if following else None
+
+    with atomic():
+        ActiveParkRateRange.objects.bulk_create(ranges, batch_size=1000)
+
+        if delete:
+            ActiveParkRate.objects.filter(coin=coin).delete()
+
+    logger.info(f"Built {len(ranges)} park rate ranges for {coin}")
+    return len(ranges)
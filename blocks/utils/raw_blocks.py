@@ -0,0 +1,266 @@
+# Fetching blocks without verbose json.
+# The daemon calculates fields a serialized block doesn't carry (height, mint,
+# votes, park rates...) so a block is requested as json with tx ids only and
+# serialized with getblock <hash> false. The transactions are decoded locally from
+# the serialized block. Daemons that answer getblock <hash> false with json
+# instead have each transaction fetched raw with getrawtransaction
+import logging
+import time
+
+from django.conf import settings
+
+from blocks.utils.codec import (
+    COINBASE_INDEX,
+    NULL_HASH,
+    DecodeError,
+    decode_block,
+    decode_transaction,
+)
+from blocks.utils.merkle import merkle_root
+from blocks.utils.rpc import send_batch_rpc
+from blocks.utils.scripts import decode_script_pub_key, decode_script_sig
+from daio.models import Coin
+
+logger = logging.getLogger(__name__)
+
+# unit code: magic byte per schema, cached in process like the chain credentials
+_magic_bytes = {}
+
+
+def get_magic_bytes(schema_name):
+    cached = _magic_bytes.get(schema_name)
+
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+
+    magic_bytes = dict(
+        Coin.objects.filter(chain__schema_name=schema_name).values_list(
+            "unit_code", "magic_byte"
+        )
+    )
+    _magic_bytes[schema_name] = (
+        magic_bytes,
+        time.monotonic() + settings.RPC_CHAIN_CACHE_SECONDS,
+    )
+    return magic_bytes
+
+
+def get_verbose_transaction(transaction, magic_byte):
+    """
+    Return a decoded transaction in the form getrawtransaction <txid> 1 gives.
+    Returns None if any of its scripts can't be decoded locally
+    """
+    vin = []
+
+    for tx_input in transaction.inputs:
+        if tx_input.previous_tx_id == NULL_HASH:
+            if tx_input.previous_index != COINBASE_INDEX:
+                # custodial grants are left to the daemon
+                return None
+
+            vin.append(
+                {"coinbase": tx_input.script_sig.hex(), "sequence": tx_input.sequence}
+            )
+            continue
+
+        script_sig = decode_script_sig(tx_input.script_sig)
+
+        if script_sig is None:
+            return None
+
+        vin.append(
+            {
+                "txid": tx_input.previous_tx_id,
+                "vout": tx_input.previous_index,
+                "scriptSig": script_sig,
+                "sequence": tx_input.sequence,
+            }
+        )
+
+    vout = []
+
+    for n, tx_output in enumerate(transaction.outputs):
+        script_pub_key = decode_script_pub_key(tx_output.script_pub_key, magic_byte)
+
+        if script_pub_key is None:
+            return None
+
+        vout.append(
+            {"value": tx_output.value / 10000, "n": n, "scriptPubKey": script_pub_key}
+        )
+
+    return {
+        "txid": transaction.tx_id,
+        "version": transaction.version,
+        "time": transaction.time,
+        "locktime": transaction.lock_time,
+        "unit": transaction.unit,
+        "vin": vin,
+        "vout": vout,
+    }
+
+
+def get_verbose_transactions(tx_ids, schema_name):
+    """
+    Return a dict of tx id: verbose transaction fetched from the daemon
+    """
+    if not tx_ids:
+        return {}
+
+    logger.info(f"Fetching {len(tx_ids)} verbose transactions")
+    results = send_batch_rpc(
+        [{"method": "getrawtransaction", "params": [tx_id, 1]} for tx_id in tx_ids],
+        schema_name=schema_name,
+    )
+    return {tx_id: rpc_tx for tx_id, (rpc_tx, msg) in zip(tx_ids, results) if rpc_tx}
+
+
+def get_rpc_transactions(tx_ids, schema_name):
+    """
+    Return a dict of tx id: verbose transaction.
+    Raw transactions are fetched and decoded locally. Any that fail to decode, hash
+    to a different tx id or use scripts we don't decode are fetched verbose instead
+    """
+    magic_bytes = get_magic_bytes(schema_name)
+    results = send_batch_rpc(
+        [{"method": "getrawtransaction", "params": [tx_id, 0]} for tx_id in tx_ids],
+        schema_name=schema_name,
+    )
+    transactions = {}
+    fallback = []
+
+    for tx_id, (raw_tx, msg) in zip(tx_ids, results):
+        rpc_tx = None
+
+        if raw_tx:
+            try:
+                transaction = decode_transaction(raw_tx)
+            except DecodeError as e:
+                logger.warning(f"Couldn't decode raw tx {tx_id[:8]}: {e}")
+            else:
+                if transaction.tx_id != tx_id:
+                    logger.error(f"Raw tx {tx_id[:8]} hashes to {transaction.tx_id}")
+                elif transaction.unit in magic_bytes:
+                    rpc_tx = get_verbose_transaction(
+                        transaction, magic_bytes[transaction.unit]
+                    )
+
+        if rpc_tx is None:
+            fallback.append(tx_id)
+        else:
+            transactions[tx_id] = rpc_tx
+
+    transactions.update(get_verbose_transactions(fallback, schema_name))
+    return transactions
+
+
+def get_block_transactions(block_hash, tx_ids, raw_block, magic_bytes):
+    """
+    Decode the transactions of a serialized block.
+    Returns a dict of tx id: verbose transaction for those decoded locally, or None
+    if raw_block isn't a serialized block that matches the hash and tx ids
+    """
+    if not isinstance(raw_block, str):
+        # the daemon took the second parameter as txinfo and returned json
+        return None
+
+    try:
+        block = decode_block(raw_block)
+    except DecodeError as e:
+        logger.warning(f"Couldn't decode raw block {block_hash[:8]}: {e}")
+        return None
+
+    if block.header.hash != block_hash:
+        logger.error(f"Raw block {block_hash[:8]} hashes to {block.header.hash}")
+        return None
+
+    if [transaction.tx_id for transaction in block.transactions] != tx_ids:
+        logger.error(f"Raw block {block_hash[:8]} has different transactions")
+        return None
+
+    transactions = {}
+
+    for transaction in block.transactions:
+        if transaction.unit in magic_bytes:
+            rpc_tx = get_verbose_transaction(transaction, magic_bytes[transaction.unit])
+
+            if rpc_tx is not None:
+                transactions[transaction.tx_id] = rpc_tx
+
+    return transactions
+
+
+def get_raw_rpc_blocks(block_hashes, schema_name):
+    """
+    Return a dict of block hash: rpc block in the same form as a verbose getblock.
+    Each block is requested as json with tx ids only, for the fields only the
+    daemon can calculate, and serialized with getblock <hash> false in one batch.
+    The serialized block's transactions are decoded locally. Its tx ids must match
+    and hash to the block's merkle root.
+    Transactions with scripts we don't decode are fetched verbose. If the daemon
+    doesn't serialize the block each transaction is fetched raw instead.
+    Blocks that can't be completed this way are fetched verbose
+    """
+    from blocks.utils.rpc import get_rpc_blocks
+
+    block_hashes = list(block_hashes)
+    magic_bytes = get_magic_bytes(schema_name)
+    results = send_batch_rpc(
+        [
+            {"method": "getblock", "params": params}
+            for block_hash in block_hashes
+            for params in ([block_hash], [block_hash, False])
+        ],
+        schema_name=schema_name,
+    )
+    rpc_blocks = {}
+    transactions = {}
+    fallback = []
+    unserialized = []
+
+    for index, block_hash in enumerate(block_hashes):
+        rpc_block, msg = results[index * 2]
+        raw_block, msg = results[index * 2 + 1]
+
+        if not rpc_block:
+            continue
+
+        tx_ids = rpc_block.get("tx", [])
+
+        if merkle_root(tx_ids) != rpc_block.get("merkleroot"):
+            logger.error(f"Transactions of block {block_hash[:8]} fail the merkle root")
+            continue
+
+        rpc_blocks[block_hash] = rpc_block
+        block_transactions = get_block_transactions(
+            block_hash, tx_ids, raw_block, magic_bytes
+        )
+
+        if block_transactions is None:
+            unserialized += tx_ids
+            continue
+
+        transactions.update(block_transactions)
+        fallback += [tx_id for tx_id in tx_ids if tx_id not in block_transactions]
+
+    transactions.update(get_verbose_transactions(fallback, schema_name))
+
+    if unserialized:
+        transactions.update(get_rpc_transactions(unserialized, schema_name))
+
+    for block_hash, rpc_block in list(rpc_blocks.items()):
+        tx_ids = rpc_block.get("tx", [])
+
+        if any(tx_id not in transactions for tx_id in tx_ids):
+            del rpc_blocks[block_hash]
+        else:
+            rpc_block["tx"] = [transactions[tx_id] for tx_id in tx_ids]
+
+    missing = [
+        block_hash for block_hash in block_hashes if block_hash not in rpc_blocks
+    ]
+
+    if missing:
+        rpc_blocks.update(get_rpc_blocks(missing, schema_name, raw=False))
+
+    return rpc_blocks
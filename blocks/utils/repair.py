@@ -0,0 +1,112 @@
+import logging
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from daio.celery import app
+
+logger = logging.getLogger(__name__)
+
+# short name: (celery task name, kwarg identifying the work)
+REPAIR_TASKS = {
+    "get_block": ("blocks.tasks.blocks.get_block", "height"),
+    "repair_block": ("blocks.tasks.blocks.repair_block", "block_hash"),
+    "validate_block": ("blocks.tasks.blocks.validate_block", "block_hash"),
+    "repair_transaction": ("blocks.tasks.transactions.repair_transaction", "tx_id"),
+    "validate_transaction": (
+        "blocks.tasks.transactions.validate_transaction",
+        "tx_id",
+    ),
+}
+
+METRICS = ["sent", "deduplicated", "dropped", "completed"]
+
+# the in flight count restarts this often so lost tasks can't hold the cap forever
+IN_FLIGHT_SECONDS = 60 * 60
+
+PENDING = "pending"
+COOLING = "cooling"
+
+
+def _key(name):
+    return "{}_repair_{}".format(connection.schema_name, name)
+
+
+def _count(name, delta=1, timeout=None):
+    key = _key(name)
+    cache.add(key, 0, timeout)
+
+    try:
+        if delta > 0:
+            return cache.incr(key, delta)
+        return cache.decr(key, -delta)
+    except ValueError:
+        # the counter was evicted between the add and the incr
+        cache.set(key, max(delta, 0), timeout)
+        return max(delta, 0)
+
+
+def schedule_repair(task, queue=None, **kwargs):
+    """
+    Send the repair task unless the same work is already pending or finished
+    within the cooldown.
+    Work beyond the chain's in flight cap is dropped to be picked up by a later
+    request or the validation task.
+    Returns True if the task was sent
+    """
+    task_name, key_field = REPAIR_TASKS[task]
+    repair_key = _key("{}_{}".format(task, kwargs[key_field]))
+
+    if not cache.add(repair_key, PENDING, settings.REPAIR_PENDING_SECONDS):
+        _count("deduplicated")
+        return False
+
+    if _count("in_flight", timeout=IN_FLIGHT_SECONDS) > settings.REPAIR_MAX_IN_FLIGHT:
+        _count("in_flight", -1, timeout=IN_FLIGHT_SECONDS)
+        cache.delete(repair_key)
+        _count("dropped")
+        return False
+
+    app.send_task(task_name, kwargs=dict(kwargs, repair_key=repair_key), queue=queue)
+    _count("sent")
+    return True
+
+
+def finish_repair(repair_key):
+    """
+    The scheduled work has run. Repeats are ignored until the cooldown expires
+    """
+    if cache.get(repair_key) != PENDING:
+        return
+
+    cache.set(repair_key, COOLING, settings.REPAIR_COOLDOWN_SECONDS)
+    _count("in_flight", -1, timeout=IN_FLIGHT_SECONDS)
+    _count("completed")
+
+
+def releases_repair(func):
+    """
+    Decorate a repair task so work sent by schedule_repair is released when it
+    finishes. Tasks called directly are unaffected
+    """
+
+    @wraps(func)
+    def wrapper(*args, repair_key=None, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if repair_key:
+                finish_repair(repair_key)
+
+    return wrapper
+
+
+def get_repair_metrics():
+    """
+    The number of repairs in flight for this chain and the scheduler's counters
+    """
+    keys = {_key(name): name for name in ["in_flight"] + METRICS}
+    values = cache.get_many(list(keys))
+    return {name: values.get(key, 0) for key, name in keys.items()}
@@ -0,0 +1,86 @@
+import logging
+from datetime import timedelta
+
+from django.db.transaction import atomic
+from django.utils.timezone import now
+
+from blocks.models import Info, InfoRollup, Orphan
+
+logger = logging.getLogger(__name__)
+
+
+def get_period_start(moment, period):
+    if period == InfoRollup.HOUR:
+        return moment.replace(minute=0, second=0, microsecond=0)
+
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+@atomic
+def rollup_info(since):
+    """
+    Rebuild the hourly and daily rollups from the start of the day containing since.
+    Each Info row is read once, in time order, so the last values in a period win
+    """
+    since = get_period_start(since, InfoRollup.DAY)
+    periods = (InfoRollup.HOUR, InfoRollup.DAY)
+    rollups = {}
+
+    def get_rollup(moment, period):
+        start = get_period_start(moment, period)
+        rollup = rollups.get((period, start))
+
+        if rollup is None:
+            rollup = rollups[(period, start)] = InfoRollup(period=period, start=start)
+
+        return rollup
+
+    for info in (
+        Info.objects.filter(time_added__gte=since)
+        .order_by("time_added")
+        .values(
+            "time_added",
+            "unit",
+            "difficulty",
+            "connections",
+            "max_height",
+            "money_supply",
+            "total_parked",
+            "samples",
+        )
+        .iterator()
+    ):
+        for period in periods:
+            rollup = get_rollup(info["time_added"], period)
+            rollup.difficulty = info["difficulty"]
+            rollup.connections = info["connections"]
+            rollup.max_height = max(rollup.max_height or 0, info["max_height"])
+            rollup.supply[info["unit"]] = {
+                "money_supply": float(info["money_supply"]),
+                "total_parked": float(info["total_parked"] or 0),
+            }
+            rollup.samples += info["samples"]
+
+    for orphaned in Orphan.objects.filter(date_time__gte=since).values_list(
+        "date_time", flat=True
+    ):
+        for period in periods:
+            get_rollup(orphaned, period).orphans += 1
+
+    InfoRollup.objects.filter(start__gte=since).delete()
+    InfoRollup.objects.bulk_create(rollups.values())
+    logger.info(f"Rebuilt {len(rollups)} info rollups from {since}")
+
+
+def get_daily_series(days):
+    """
+    The daily rollups of the last number of days, oldest first, in one query
+    """
+    return list(
+        InfoRollup.objects.filter(
+            period=InfoRollup.DAY,
+            start__gte=get_period_start(
+                now() - timedelta(days=days - 1), InfoRollup.DAY
+            ),
+        ).order_by("start")
+    )
@@ -1,75 +1,202 @@
 import json
 import logging
+import threading
 import time
 
 import requests
 from django.conf import settings
 from requests import ReadTimeout
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError
 
 from daio.models import Chain
 
 logger = logging.getLogger(__name__)
 
+# chain credentials are cached in process so each call doesn't need a db lookup
+_chains = {}
+# keep-alive sessions are per thread as requests.Session is not thread safe
+_local = threading.local()
 
-def send_rpc(data, schema_name, rpc_port=None, retry=0):
+
+def get_chain(schema_name):
     """
-    Return a connection to the nud  rpc  interface
+    Return the Chain for the schema, cached for RPC_CHAIN_CACHE_SECONDS
     """
-    if retry == 3:
-        logger.error("3 retries have failed")
-        return False, "3 retries have failed"
+    cached = _chains.get(schema_name)
+
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
 
     chain = Chain.objects.get(schema_name=schema_name)
+    _chains[schema_name] = (
+        chain,
+        time.monotonic() + settings.RPC_CHAIN_CACHE_SECONDS,
+    )
+    return chain
+
+
+def get_session(chain, rpc_port):
+    """
+    Return a pooled session for the chain daemon listening on rpc_port
+    """
+    if not hasattr(_local, "sessions"):
+        _local.sessions = {}
+
+    key = (chain.schema_name, chain.rpc_host, rpc_port)
+    session = _local.sessions.get(key)
+
+    if session is None:
+        session = requests.Session()
+        session.auth = (chain.rpc_user, chain.rpc_password)
+        session.headers.update({"Content-Type": "applications/json"})
+        session.mount(
+            "http://",
+            HTTPAdapter(pool_connections=1, pool_maxsize=settings.RPC_POOL_SIZE,),
+        )
+        _local.sessions[key] = session
+
+    return session
+
+
+def _post(payload, schema_name, rpc_port=None, methods=()):
+    """
+    Send the payload to the daemon.
+    Returns (response, message). response is None if nothing could be sent
+    """
+    chain = get_chain(schema_name)
 
     # check that the rpc connection is active
     if not chain.rpc_active:
-        if data.get("method") in settings.RPC_ALWAYS_LIST:
-            # if the method should be allowed, allow it
+        if methods and all(m in settings.RPC_ALWAYS_LIST for m in methods):
+            # if the methods should be allowed, allow them
             pass
         else:
             # otherwise quit early
             logger.warning(f"Daemon not active for {chain.name}")
-            return False, "Daemon not active"
+            return None, "Daemon not active"
+
+    port = chain.rpc_port if not rpc_port else rpc_port
+    rpc_url = "http://{}:{}".format(chain.rpc_host, port)
 
-    data["jsonrpc"] = "2.0"
-    data["id"] = int(time.time())
-    rpc_url = "http://{}:{}@{}:{}".format(
-        chain.rpc_user,
-        chain.rpc_password,
-        chain.rpc_host,
-        chain.rpc_port if not rpc_port else rpc_port,
-    )
-    headers = {"Content-Type": "applications/json"}
     try:
-        response = requests.post(
-            url=rpc_url, headers=headers, data=json.dumps(data), timeout=60,
+        return (
+            get_session(chain, port).post(
+                url=rpc_url, data=json.dumps(payload), timeout=60,
+            ),
+            "success",
         )
 
-        try:
-            result = response.json()
-            error = result.get("error", None)
-            if error:
-                logger.error("rpc error sending {}: {}".format(data, error))
-                return False, error
-            return result.get("result"), "success"
-
-        except ValueError:
-            logger.error("rpc error sending {}: {}".format(data, response.text))
-            return False, response.text
-
     except ConnectionError:
         logger.error(
             "rpc error sending {}: {}\n{}".format(
-                data, "no connection with daemon", rpc_url
+                payload, "no connection with daemon", rpc_url
             )
         )
-        return False, "no connection with daemon"
+        return None, "no connection with daemon"
+
 
+def send_rpc(data, schema_name, rpc_port=None, retry=0):
+    """
+    Send a single request to the nud rpc interface
+    """
+    if retry == 3:
+        logger.error("3 retries have failed")
+        return False, "3 retries have failed"
+
+    data["jsonrpc"] = "2.0"
+    data["id"] = int(time.time())
+
+    try:
+        response, message = _post(
+            data, schema_name, rpc_port=rpc_port, methods=[data.get("method")]
+        )
     except ReadTimeout:
         logger.warning("rpc error sending {}: {}".format(data, "daemon timeout"))
-        send_rpc(data, schema_name=schema_name, retry=retry + 1)
-        return False, "daemon timeout"
+        return send_rpc(
+            data, schema_name=schema_name, rpc_port=rpc_port, retry=retry + 1
+        )
+
+    if response is None:
+        return False, message
+
+    try:
+        result = response.json()
+        error = result.get("error", None)
+        if error:
+            logger.error("rpc error sending {}: {}".format(data, error))
+            return False, error
+        return result.get("result"), "success"
+
+    except ValueError:
+        logger.error("rpc error sending {}: {}".format(data, response.text))
+        return False, response.text
+
+
+def send_batch_rpc(batch, schema_name, rpc_port=None, retry=0):
+    """
+    Send a list of {"method": ..., "params": ...} requests as JSON-RPC batches.
+    Requests are split into chunks of RPC_BATCH_SIZE.
+    Returns a list of (result, message) tuples in the same order as the batch
+    """
+    if retry == 3:
+        logger.error("3 retries have failed")
+        return [(False, "3 retries have failed")] * len(batch)
+
+    batch_size = settings.RPC_BATCH_SIZE
+    results = []
+
+    for start in range(0, len(batch), batch_size):
+        chunk = batch[start : start + batch_size]
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "id": index,
+                "method": data.get("method"),
+                "params": data.get("params", []),
+            }
+            for index, data in enumerate(chunk)
+        ]
+
+        try:
+            response, message = _post(
+                payload,
+                schema_name,
+                rpc_port=rpc_port,
+                methods=set(data.get("method") for data in chunk),
+            )
+        except ReadTimeout:
+            logger.warning(
+                "rpc error sending batch of {}: {}".format(len(chunk), "daemon timeout")
+            )
+            results += send_batch_rpc(
+                chunk, schema_name=schema_name, rpc_port=rpc_port, retry=retry + 1
+            )
+            continue
+
+        if response is None:
+            results += [(False, message)] * len(chunk)
+            continue
+
+        try:
+            responses = {result.get("id"): result for result in response.json()}
+        except (ValueError, AttributeError):
+            logger.error("rpc error sending batch: {}".format(response.text))
+            results += [(False, response.text)] * len(chunk)
+            continue
+
+        for index, data in enumerate(chunk):
+            result = responses.get(index, {})
+            error = result.get("error", None)
+
+            if error or "result" not in result:
+                logger.error("rpc error sending {}: {}".format(data, error))
+                results.append((False, error))
+                continue
+
+            results.append((result.get("result"), "success"))
+
+    return results
 
 
 def get_block_hash(height, schema_name):
@@ -79,7 +206,27 @@ def get_block_hash(height, schema_name):
     return rpc
 
 
+def get_block_hashes(heights, schema_name):
+    """
+    Return a dict of height: block hash using batched requests.
+    Heights the daemon couldn't provide are left out
+    """
+    heights = [int(height) for height in heights]
+    results = send_batch_rpc(
+        [{"method": "getblockhash", "params": [height]} for height in heights],
+        schema_name=schema_name,
+    )
+    return {
+        height: block_hash
+        for height, (block_hash, msg) in zip(heights, results)
+        if block_hash
+    }
+
+
 def get_rpc_block(block_hash, schema_name):
+    if settings.RPC_RAW_BLOCKS:
+        return get_rpc_blocks([block_hash], schema_name).get(block_hash)
+
     rpc, msg = send_rpc(
         {"method": "getblock", "params": [block_hash, True, True]},
         schema_name=schema_name,
@@ -87,6 +234,35 @@ def get_rpc_block(block_hash, schema_name):
     return rpc
 
 
+def get_rpc_blocks(block_hashes, schema_name, raw=None):
+    """
+    Return a dict of block hash: verbose rpc block using batched requests.
+    With raw (defaulting to RPC_RAW_BLOCKS) the blocks are fetched serialized and
+    their transactions decoded locally
+    """
+    if raw is None:
+        raw = settings.RPC_RAW_BLOCKS
+
+    if raw:
+        from blocks.utils.raw_blocks import get_raw_rpc_blocks
+
+        return get_raw_rpc_blocks(block_hashes, schema_name)
+
+    block_hashes = list(block_hashes)
+    results = send_batch_rpc(
+        [
+            {"method": "getblock", "params": [block_hash, True, True]}
+            for block_hash in block_hashes
+        ],
+        schema_name=schema_name,
+    )
+    return {
+        block_hash: rpc_block
+        for block_hash, (rpc_block, msg) in zip(block_hashes, results)
+        if rpc_block
+    }
+
+
 def get_block(height, schema_name):
     block_hash = get_block_hash(height, schema_name)
     return get_rpc_block(block_hash, schema_name)
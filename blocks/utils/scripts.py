@@ -0,0 +1,136 @@
+import hashlib
+
+from blocks.utils.codec import double_sha256
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+OP_PUSHDATA1 = 0x4C
+OP_PUSHDATA2 = 0x4D
+OP_DUP = 0x76
+OP_HASH160 = 0xA9
+OP_EQUALVERIFY = 0x88
+OP_CHECKSIG = 0xAC
+
+
+def base58_check(payload):
+    data = payload + double_sha256(payload)[:4]
+    number = int.from_bytes(data, "big")
+    encoded = ""
+
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = BASE58_ALPHABET[remainder] + encoded
+
+    # leading zero bytes are kept as leading 1s
+    return "1" * (len(data) - len(data.lstrip(b"\0"))) + encoded
+
+
+def hash160(data):
+    """
+    Returns None if this OpenSSL build has no ripemd160
+    """
+    try:
+        ripemd160 = hashlib.new("ripemd160")
+    except ValueError:
+        return None
+
+    ripemd160.update(hashlib.sha256(data).digest())
+    return ripemd160.digest()
+
+
+def get_address(hash_bytes, magic_byte):
+    return base58_check(bytes((magic_byte,)) + hash_bytes)
+
+
+def get_pushes(script):
+    """
+    Return the data pushed by a script made only of data pushes.
+    Returns None if the script contains anything else
+    """
+    pushes = []
+    position = 0
+
+    while position < len(script):
+        opcode = script[position]
+        position += 1
+
+        if 0 < opcode < OP_PUSHDATA1:
+            length = opcode
+        elif opcode == OP_PUSHDATA1 and position < len(script):
+            length = script[position]
+            position += 1
+        elif opcode == OP_PUSHDATA2 and position + 1 < len(script):
+            length = int.from_bytes(script[position : position + 2], "little")
+            position += 2
+        else:
+            return None
+
+        if position + length > len(script):
+            return None
+
+        pushes.append(script[position : position + length])
+        position += length
+
+    return pushes
+
+
+def decode_script_sig(script):
+    """
+    Return the verbose scriptSig for an input script of data pushes.
+    The daemon shows pushes of 4 bytes or less as numbers so those aren't decoded.
+    Returns None if the script can't be decoded locally
+    """
+    pushes = get_pushes(script)
+
+    if pushes is None or any(len(push) <= 4 for push in pushes):
+        return None
+
+    return {"asm": " ".join(push.hex() for push in pushes), "hex": script.hex()}
+
+
+def decode_script_pub_key(script, magic_byte):
+    """
+    Return the verbose scriptPubKey for an empty, pay to public key hash or pay to
+    public key output script.
+    Returns None for any other script, including park scripts, so they can be
+    decoded by the daemon instead
+    """
+    if not script:
+        return {"asm": "", "hex": "", "type": "nonstandard"}
+
+    if (
+        len(script) == 25
+        and script[:3] == bytes((OP_DUP, OP_HASH160, 20))
+        and script[23:] == bytes((OP_EQUALVERIFY, OP_CHECKSIG))
+    ):
+        key_hash = script[3:23]
+        return {
+            "asm": "OP_DUP OP_HASH160 {} OP_EQUALVERIFY OP_CHECKSIG".format(
+                key_hash.hex()
+            ),
+            "hex": script.hex(),
+            "reqSigs": 1,
+            "type": "pubkeyhash",
+            "addresses": [get_address(key_hash, magic_byte)],
+        }
+
+    if (
+        len(script) in (35, 67)
+        and script[0] == len(script) - 2
+        and script[-1] == OP_CHECKSIG
+    ):
+        public_key = script[1:-1]
+        key_hash = hash160(public_key)
+
+        if key_hash is None:
+            return None
+
+        return {
+            "asm": "{} OP_CHECKSIG".format(public_key.hex()),
+            "hex": script.hex(),
+            "reqSigs": 1,
+            "type": "pubkey",
+            "addresses": [get_address(key_hash, magic_byte)],
+        }
+
+    return None
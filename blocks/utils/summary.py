@@ -0,0 +1,119 @@
+import logging
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Count, F, Sum
+
+from blocks.models.transaction import Address, Transaction, TxInput, TxOutput
+from daio.models import Coin
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = [
+    "number_of_transactions",
+    "solver",
+    "totals_transacted",
+    "cache_version",
+]
+
+
+def _solver_index(block):
+    # the stake reward is paid in tx 1 and the proof-of-work reward in tx 0
+    return 0 if block.flags == "proof-of-work" else 1
+
+
+def summarize_blocks(blocks):
+    """
+    Store the transaction count, solving address and totals transacted per coin
+    on each of the blocks.
+    Costs a fixed number of queries regardless of the number of blocks
+    """
+    from blocks.models import Block
+
+    blocks = {block.pk: block for block in blocks if block.pk}
+
+    if not blocks:
+        return
+
+    block_ids = list(blocks)
+    coins = list(Coin.objects.filter(chain__schema_name=connection.schema_name))
+
+    counts = dict(
+        Transaction.objects.filter(block__in=block_ids)
+        .order_by()
+        .values("block")
+        .annotate(total=Count("id"))
+        .values_list("block", "total")
+    )
+
+    solvers = {
+        (block_id, index): address_id
+        for block_id, index, address_id in TxOutput.objects.filter(
+            transaction__block__in=block_ids,
+            transaction__index=F("index"),
+            index__in=[0, 1],
+        ).values_list("transaction__block", "index", "address_id")
+    }
+
+    addresses = Address.objects.in_bulk(set(solvers.values()) - {None})
+    totals = defaultdict(int)
+
+    for block_id, coin_id, value in (
+        TxOutput.objects.filter(transaction__block__in=block_ids)
+        .order_by()
+        .values("transaction__block", "transaction__coin")
+        .annotate(total=Sum("value"))
+        .values_list("transaction__block", "transaction__coin", "total")
+    ):
+        totals[(block_id, coin_id)] += value or 0
+
+    for block_id, coin_id, value in (
+        TxInput.objects.filter(
+            transaction__block__in=block_ids, previous_output__isnull=False
+        )
+        .order_by()
+        .values("transaction__block", "transaction__coin")
+        .annotate(total=Sum("previous_output__value"))
+        .values_list("transaction__block", "transaction__coin", "total")
+    ):
+        totals[(block_id, coin_id)] -= value or 0
+
+    for block in blocks.values():
+        block.number_of_transactions = counts.get(block.pk, 0)
+        block.solver = addresses.get(solvers.get((block.pk, _solver_index(block))))
+        block.totals_transacted = [
+            {"name": coin.code, "value": totals[(block.pk, coin.pk)] / 10000}
+            for coin in coins
+        ]
+        # bulk_update skips save() so bump the version for the serialized cache
+        block.cache_version += 1
+
+    Block.objects.bulk_update(blocks.values(), SUMMARY_FIELDS)
+
+
+def with_summaries(blocks):
+    """
+    Return the blocks as a list, summarizing any that haven't been in one batch
+    """
+    blocks = list(blocks)
+    summarize_blocks(
+        [block for block in blocks if block.number_of_transactions is None]
+    )
+    return blocks
+
+
+def summarize_block(block):
+    logger.info(f"Summarizing block {block}")
+    summarize_blocks([block])
+
+
+def invalidate_summaries(block_ids):
+    """
+    The transactions in the blocks have changed.
+    The summaries are recalculated the next time they are used
+    """
+    from blocks.models import Block
+
+    Block.objects.filter(pk__in=[pk for pk in block_ids if pk]).update(
+        number_of_transactions=None, cache_version=F("cache_version") + 1
+    )
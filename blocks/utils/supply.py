@@ -0,0 +1,109 @@
+import logging
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+
+from blocks.models import Address, NetworkFund, SupplySnapshot
+from blocks.utils.exchange_balances import get_exchange_balances
+from blocks.utils.info import get_latest_info
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_key(coin):
+    return "{}_supply_{}".format(connection.schema_name, coin.code)
+
+
+def _serialize(snapshot):
+    return {
+        "version": snapshot.version,
+        "total_supply": snapshot.total_supply,
+        "parked": snapshot.parked,
+        "network_owned": snapshot.network_owned,
+        "circulating_supply": snapshot.circulating_supply,
+        "network_owned_addresses": snapshot.network_addresses,
+        "other_network_funds": snapshot.network_funds,
+        "network_funds_on_exchange": snapshot.exchange_balances,
+    }
+
+
+def refresh_supply_snapshot(coin):
+    """
+    Recalculate the supply components for the coin, store them as a new version of
+    its SupplySnapshot and cache the result.
+    Returns None if there is no Info for the coin yet
+    """
+    latest_info = get_latest_info(coin.unit_code)
+
+    if latest_info is None:
+        logger.warning(f"No info found for {coin}. Can't calculate supply")
+        return None
+
+    snapshot, _ = SupplySnapshot.objects.get_or_create(coin=coin)
+
+    address_balances = [
+        (address, Decimal(balance) / 10000)
+        for address, balance in Address.objects.filter(
+            network_owned=True, coin=coin
+        ).values_list("address", "current_balance")
+    ]
+    network_funds = list(NetworkFund.objects.filter(coin=coin))
+    exchange_balances = get_exchange_balances(coin, snapshot.exchange_balances)
+
+    snapshot.network_addresses = [
+        {"address": address, "balance": float(round(balance, coin.decimal_places))}
+        for address, balance in address_balances
+    ]
+    snapshot.network_funds = [
+        {"name": fund.name, "value": float(round(fund.value, coin.decimal_places))}
+        for fund in network_funds
+    ]
+    snapshot.exchange_balances = [
+        {
+            "exchange": balance.get("exchange"),
+            "balance": float(round(balance.get("balance"), coin.decimal_places)),
+        }
+        for balance in exchange_balances
+    ]
+
+    snapshot.total_supply = latest_info.money_supply
+    snapshot.parked = latest_info.total_parked or 0
+    snapshot.network_owned = (
+        sum(balance for _, balance in address_balances)
+        + sum(fund.value for fund in network_funds)
+        + sum(Decimal(str(balance.get("balance"))) for balance in exchange_balances)
+    )
+    snapshot.circulating_supply = round(
+        snapshot.total_supply - (snapshot.parked + snapshot.network_owned),
+        coin.decimal_places,
+    )
+    snapshot.version += 1
+    snapshot.save()
+
+    # read back so the cached values match those stored
+    snapshot.refresh_from_db()
+    serialized_snapshot = _serialize(snapshot)
+    cache.set(_cache_key(coin), serialized_snapshot, None)
+    logger.info(f"Saved supply snapshot {snapshot}")
+    return serialized_snapshot
+
+
+def get_supply_snapshot(coin):
+    """
+    Return the latest supply snapshot for the coin from the cache.
+    Falls back to the stored snapshot and calculates one if the coin has none yet
+    """
+    serialized_snapshot = cache.get(_cache_key(coin))
+
+    if serialized_snapshot is not None:
+        return serialized_snapshot
+
+    snapshot = SupplySnapshot.objects.filter(coin=coin).first()
+
+    if snapshot is None:
+        return refresh_supply_snapshot(coin)
+
+    serialized_snapshot = _serialize(snapshot)
+    cache.set(_cache_key(coin), serialized_snapshot, None)
+    return serialized_snapshot
@@ -0,0 +1,119 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+from blocks.models import Block, SyncCheckpoint
+from blocks.utils.rpc import get_block_hashes, get_chain, get_rpc_blocks
+from blocks.utils.chain import orphan_blocks
+from blocks.utils.raw_blocks import get_magic_bytes
+
+logger = logging.getLogger(__name__)
+
+
+class RangeSync(object):
+    """
+    Download a range of blocks from the daemon.
+    The range is split into chunks. Blocks in a chunk are fetched by a bounded pool of
+    rpc workers and then committed to the database in height order.
+    Progress is saved to a SyncCheckpoint after each block so a sync can be resumed
+    """
+
+    def __init__(
+        self, start_height, end_height, name="range_sync", chunk_size=None, workers=None
+    ):
+        self.schema_name = connection.schema_name
+        self.start_height = start_height
+        self.end_height = end_height
+        self.chunk_size = chunk_size or settings.SYNC_CHUNK_SIZE
+        self.workers = workers or settings.SYNC_WORKERS
+        self.checkpoint, _ = SyncCheckpoint.objects.get_or_create(
+            name=name, defaults={"start_height": start_height, "end_height": end_height}
+        )
+
+        if (
+            self.checkpoint.start_height != start_height
+            or self.checkpoint.end_height != end_height
+        ):
+            # a different range was requested so start again
+            self.checkpoint.start_height = start_height
+            self.checkpoint.end_height = end_height
+            self.checkpoint.height = None
+            self.checkpoint.save()
+
+    @property
+    def next_height(self):
+        if self.checkpoint.height is None:
+            return self.start_height
+        return self.checkpoint.height + 1
+
+    def fetch_blocks(self, block_hashes):
+        """
+        Fetch the verbose rpc blocks for the hashes using the worker pool.
+        Each worker sends one batched request
+        """
+        # prime the credential caches so the worker threads don't need the database
+        get_chain(self.schema_name)
+        get_magic_bytes(self.schema_name)
+
+        batch_size = max(1, -(-len(block_hashes) // self.workers))
+        batches = [
+            block_hashes[i : i + batch_size]
+            for i in range(0, len(block_hashes), batch_size)
+        ]
+        rpc_blocks = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for result in executor.map(
+                lambda batch: get_rpc_blocks(batch, self.schema_name), batches
+            ):
+                rpc_blocks.update(result)
+
+        return rpc_blocks
+
+    def commit_block(self, height, block_hash, rpc_block):
+        block, _ = Block.objects.get_or_create(hash=block_hash)
+
+        # any different block at this height has been orphaned
+        orphan_blocks(Block.objects.filter(height=height).exclude(pk=block.pk))
+
+        block.parse_rpc_block(rpc_block)
+        block.validate()
+
+        if not block.is_valid:
+            logger.warning(
+                f"Synced block {block} is not valid: {', '.join(block.validity_errors)}"
+            )
+
+    def run(self):
+        logger.info(
+            f"Syncing blocks {self.next_height} to {self.end_height} "
+            f"in chunks of {self.chunk_size} with {self.workers} workers"
+        )
+
+        for chunk_start in range(
+            self.next_height, self.end_height + 1, self.chunk_size
+        ):
+            chunk_end = min(chunk_start + self.chunk_size - 1, self.end_height)
+            block_hashes = get_block_hashes(
+                range(chunk_start, chunk_end + 1), schema_name=self.schema_name
+            )
+            rpc_blocks = self.fetch_blocks(list(block_hashes.values()))
+
+            for height in range(chunk_start, chunk_end + 1):
+                block_hash = block_hashes.get(height)
+                rpc_block = rpc_blocks.get(block_hash)
+
+                if not rpc_block:
+                    # stop here so the sync resumes from this height next time
+                    logger.error(f"No rpc block returned for height {height}")
+                    return False
+
+                self.commit_block(height, block_hash, rpc_block)
+                self.checkpoint.height = height
+                self.checkpoint.save()
+
+            logger.info(f"Synced blocks {chunk_start} to {chunk_end}")
+
+        return True
@@ -0,0 +1,99 @@
+from django.db.models import Prefetch, prefetch_related_objects
+from django.template.loader import render_to_string
+
+from blocks.models.transaction import TxInput, TxOutput
+from blocks.utils.cache import serialized_cache
+
+
+def get_prefetches():
+    """
+    Everything the transaction fragments follow from a transaction, in two queries
+    """
+    return [
+        Prefetch(
+            "inputs",
+            queryset=TxInput.objects.select_related(
+                "previous_output__address", "previous_output__transaction__block"
+            ),
+        ),
+        Prefetch(
+            "outputs",
+            queryset=TxOutput.objects.select_related(
+                "address", "input__transaction__block"
+            ),
+        ),
+    ]
+
+
+class TransactionView(object):
+    """
+    A transaction with its inputs, outputs and derived totals loaded once for
+    rendering. The transaction's inputs and outputs should already be prefetched
+    """
+
+    def __init__(self, tx):
+        self.tx = tx
+        self.tx_id = tx.tx_id
+        self.index = tx.index
+        self.time = tx.time
+        self.coin = tx.coin
+        self.is_valid = tx.is_valid
+        self.validity_errors = tx.validity_errors
+        self.inputs = list(tx.inputs.all())
+        self.outputs = list(tx.outputs.all())
+        self.is_coinbase = tx.is_coinbase
+        self.total_input = tx.total_input
+        self.total_output = tx.total_output
+        self.balance = self.total_output - self.total_input
+        self.address_inputs = tx.address_inputs
+        self.address_outputs = tx.address_outputs
+
+
+def _is_confirmed(tx):
+    return bool(tx.is_valid and tx.block and tx.block.height is not None)
+
+
+def _html_cache_key(tx):
+    return "{}_html".format(tx.cache_key)
+
+
+def get_transaction_views(transactions):
+    """
+    Return a TransactionView for each of the transactions.
+    Costs a fixed number of queries regardless of the number of transactions
+    """
+    transactions = list(transactions)
+    prefetch_related_objects(transactions, *get_prefetches())
+    return [TransactionView(tx) for tx in transactions]
+
+
+def render_transactions(transactions):
+    """
+    Return the rendered fragment of each transaction.
+    Confirmed transactions are rendered once per cache_version, which is bumped when
+    the transaction or the outputs it spends or are spent from it change.
+    Only the transactions that aren't cached are loaded in full
+    """
+    transactions = list(transactions)
+    fragments = {}
+
+    for tx in transactions:
+        if _is_confirmed(tx):
+            html = serialized_cache.get(_html_cache_key(tx))
+
+            if html is not None:
+                fragments[tx.pk] = html
+
+    uncached = [tx for tx in transactions if tx.pk not in fragments]
+
+    for view in get_transaction_views(uncached):
+        html = render_to_string("explorer/fragments/transaction.html", {"tx": view})
+
+        if _is_confirmed(view.tx):
+            serialized_cache.set(
+                _html_cache_key(view.tx), html, height=view.tx.block.height
+            )
+
+        fragments[view.tx.pk] = html
+
+    return [fragments[tx.pk] for tx in transactions]
@@ -0,0 +1,122 @@
+import logging
+
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from blocks.models.transaction import Address, TxOutput, UnspentOutput
+from blocks.utils.activity import add_activity, remove_activity
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_balances(address_ids=None):
+    """
+    Set current_balance for the addresses from the UTXO set in a single update.
+    All addresses are refreshed if address_ids is None
+    """
+    addresses = Address.objects.all()
+
+    if address_ids is not None:
+        address_ids = set(a for a in address_ids if a)
+
+        if not address_ids:
+            return
+
+        addresses = addresses.filter(id__in=address_ids)
+
+    addresses.update(
+        current_balance=Coalesce(
+            Subquery(
+                UnspentOutput.objects.filter(address=OuterRef("pk"))
+                .values("address")
+                .annotate(total=Sum("value"))
+                .values("total")
+            ),
+            0,
+        )
+    )
+
+
+def _add_unspent(outputs):
+    """
+    Add the outputs to the UTXO set.
+    Returns the ids of the addresses touched
+    """
+    rows = [
+        UnspentOutput(output_id=output_id, address_id=address_id, value=value)
+        for output_id, address_id, value in outputs.filter(
+            address__isnull=False, input__isnull=True
+        ).values_list("id", "address_id", "value")
+    ]
+    UnspentOutput.objects.bulk_create(rows, ignore_conflicts=True)
+    return [row.address_id for row in rows]
+
+
+def _remove_unspent(unspent):
+    """
+    Remove the UnspentOutput rows from the UTXO set.
+    Returns the ids of the addresses touched
+    """
+    address_ids = list(unspent.values_list("address_id", flat=True).distinct())
+    unspent.delete()
+    return address_ids
+
+
+def connect_transactions(transactions):
+    """
+    Apply the transactions to the UTXO set and the address activity index.
+    Their outputs become unspent and the outputs their inputs spend are removed.
+    Rows for the transactions' own outputs are rebuilt so this is safe to repeat
+    """
+    address_ids = _remove_unspent(
+        UnspentOutput.objects.filter(output__transaction__in=transactions)
+    )
+    address_ids += _add_unspent(
+        TxOutput.objects.filter(
+            transaction__in=transactions, transaction__block__height__isnull=False
+        )
+    )
+    address_ids += _remove_unspent(
+        UnspentOutput.objects.filter(output__input__transaction__in=transactions)
+    )
+    refresh_balances(address_ids)
+    add_activity(transactions)
+
+
+def disconnect_transactions(transactions):
+    """
+    Reverse connect_transactions.
+    Their outputs leave the UTXO set, the outputs they spent are restored and
+    their address activity is removed
+    """
+    address_ids = _remove_unspent(
+        UnspentOutput.objects.filter(output__transaction__in=transactions)
+    )
+
+    # the spending inputs still exist, so restore the previous outputs directly.
+    # Outputs of the disconnected transactions themselves stay spent
+    rows = [
+        UnspentOutput(output_id=output_id, address_id=address_id, value=value)
+        for output_id, address_id, value in TxOutput.objects.filter(
+            input__transaction__in=transactions,
+            address__isnull=False,
+            transaction__block__height__isnull=False,
+        )
+        .exclude(transaction__in=transactions)
+        .values_list("id", "address_id", "value")
+    ]
+    UnspentOutput.objects.bulk_create(rows, ignore_conflicts=True)
+    address_ids += [row.address_id for row in rows]
+
+    refresh_balances(address_ids)
+    remove_activity(transactions)
+
+
+def connect_block(block):
+    logger.info(f"Connecting UTXOs for block {block}")
+    connect_transactions(block.transactions.all())
+
+
+def disconnect_block(block):
+    logger.info(f"Disconnecting UTXOs for block {block}")
+    disconnect_transactions(block.transactions.all())
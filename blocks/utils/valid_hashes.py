@@ -0,0 +1,220 @@
+# The main chain's block hashes as a packed file of 16 byte prefixes.
+# The prefix of the block at height h is at byte h * 16, in the byte order wallets
+# send hashes in, so getvalidhashes replies are a slice of the file.
+# The file only covers heights up to the first one we don't have a block for.
+# Writers build a copy and rename it over the original so readers never see a
+# partial file and can keep using their old mapping until they notice the new one.
+# Writers in different processes take turns through a lock file so a rename can't
+# put back prefixes another writer has just replaced
+import fcntl
+import logging
+import mmap
+import os
+import shutil
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+from blocks.models import Block
+
+logger = logging.getLogger(__name__)
+
+PREFIX_SIZE = 16
+# the most prefixes returned by one getvalidhashes call
+MAX_VALID_HASHES = 50000
+
+# HashIndex per schema, loaded once per process
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_prefix(block_hash):
+    return bytes.fromhex(block_hash)[::-1][:PREFIX_SIZE]
+
+
+def get_index_path(schema_name=None):
+    return os.path.join(
+        settings.HASH_INDEX_DIR,
+        "{}.hashes".format(schema_name or connection.schema_name),
+    )
+
+
+def update_hash_index(from_height=None):
+    """
+    Rewrite the packed prefixes from from_height up.
+    By default the last HASH_INDEX_REWRITE_DEPTH heights are rewritten to pick up
+    new blocks and shallow reorgs.
+    Returns the number of heights the index covers
+    """
+    path = get_index_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(f"{path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return _write_hash_index(path, from_height)
+
+
+def _write_hash_index(path, from_height):
+    try:
+        indexed = os.path.getsize(path) // PREFIX_SIZE
+    except FileNotFoundError:
+        indexed = 0
+
+    if from_height is None:
+        from_height = indexed - settings.HASH_INDEX_REWRITE_DEPTH
+
+    from_height = max(0, min(from_height, indexed))
+    temp_path = f"{path}.{os.getpid()}.tmp"
+
+    if from_height:
+        shutil.copyfile(path, temp_path)
+
+    with open(temp_path, "r+b" if from_height else "wb") as index_file:
+        index_file.truncate(from_height * PREFIX_SIZE)
+        index_file.seek(from_height * PREFIX_SIZE)
+        height = from_height
+
+        for block_height, block_hash in (
+            Block.objects.filter(height__gte=from_height)
+            .order_by("height")
+            .values_list("height", "hash")
+            .iterator(chunk_size=settings.HASH_INDEX_CHUNK_SIZE)
+        ):
+            if block_height != height:
+                # the main chain is missing a block from here
+                break
+
+            index_file.write(get_prefix(block_hash))
+            height += 1
+
+    # rename is atomic so readers never see a partial file
+    os.replace(temp_path, path)
+    logger.info(f"Hash index covers {height} heights, rewritten from {from_height}")
+    return height
+
+
+class HashIndex(object):
+    """
+    A read only mapping of a schema's packed prefix file.
+    The most recent HASH_INDEX_MAP_DEPTH prefixes are held in a prefix: height dict.
+    The file is re-mapped whenever it has been replaced
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file_key = None
+        self.data = b""
+        self.heights = {}
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            stat = None
+
+        file_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size) if stat else None
+
+        with self.lock:
+            if file_key == self.file_key:
+                return
+
+            data = b""
+
+            if stat and stat.st_size:
+                with open(self.path, "rb") as index_file:
+                    # the mapping stays valid after the file is closed or replaced
+                    data = memoryview(
+                        mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+                    )
+
+            count = len(data) // PREFIX_SIZE
+            heights = {
+                bytes(data[height * PREFIX_SIZE : (height + 1) * PREFIX_SIZE]): height
+                for height in range(
+                    max(0, count - settings.HASH_INDEX_MAP_DEPTH), count
+                )
+            }
+            self.data, self.heights, self.file_key = data, heights, file_key
+
+    @property
+    def count(self):
+        return len(self.data) // PREFIX_SIZE
+
+    def get_prefixes(self, start_height, limit):
+        """
+        Return a view of up to limit prefixes from start_height without copying
+        """
+        return self.data[
+            start_height * PREFIX_SIZE : (start_height + limit) * PREFIX_SIZE
+        ]
+
+
+def get_hash_index():
+    with _indexes_lock:
+        hash_index = _indexes.get(connection.schema_name)
+
+        if hash_index is None:
+            hash_index = _indexes[connection.schema_name] = HashIndex(get_index_path())
+
+    hash_index.refresh()
+    return hash_index
+
+
+def find_start_height(hash_index, sent_hashes):
+    """
+    Return the height of the first of the sent hashes on the main chain.
+    Recent hashes are found in the index. Any sent before the first one found
+    there are looked up in one query
+    """
+    start_height = None
+    unknown = []
+
+    for sent_hash in sent_hashes:
+        start_height = hash_index.heights.get(sent_hash[:PREFIX_SIZE])
+
+        if start_height is not None:
+            break
+
+        unknown.append(sent_hash[::-1].hex())
+
+    if unknown:
+        heights = dict(
+            Block.objects.filter(hash__in=unknown, height__isnull=False).values_list(
+                "hash", "height"
+            )
+        )
+
+        for block_hash in unknown:
+            if block_hash in heights:
+                return heights[block_hash]
+
+    return start_height
+
+
+def get_valid_hashes(body):
+    """
+    Take the concatenated 32 byte hashes a wallet sends and return the prefixes of
+    up to MAX_VALID_HASHES main chain blocks from the first hash we recognise
+    """
+    sent_hashes = [body[i : i + 32] for i in range(0, len(body) - len(body) % 32, 32)]
+    hash_index = get_hash_index()
+    start_height = find_start_height(hash_index, sent_hashes)
+
+    if start_height is None:
+        logger.warning("No hashes found when searching for valid hashes")
+        return b""
+
+    logger.info("getting validhashes starting at {}".format(start_height))
+
+    if start_height < hash_index.count:
+        return hash_index.get_prefixes(start_height, MAX_VALID_HASHES)
+
+    # the index hasn't caught up with this block yet
+    return b"".join(
+        get_prefix(block_hash)
+        for block_hash in Block.objects.filter(height__gte=start_height)
+        .order_by("height")
+        .values_list("hash", flat=True)[:MAX_VALID_HASHES]
+    )
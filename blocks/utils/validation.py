@@ -0,0 +1,234 @@
+import codecs
+import hashlib
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db.models import Max
+
+from blocks.models import Block, Transaction
+from blocks.utils.merkle import merkle_roots
+from blocks.utils.repair import schedule_repair
+
+logger = logging.getLogger(__name__)
+
+HEADER_FIELDS = (
+    "id",
+    "height",
+    "hash",
+    "version",
+    "merkle_root",
+    "time",
+    "bits",
+    "nonce",
+    "previous_block_id",
+    "previous_block__hash",
+    "next_block_id",
+)
+
+
+def get_header_bytes(header):
+    """
+    Serialize a header row in the same way as Block.validate.
+    Returns None if any header attribute is missing
+    """
+    if None in (
+        header["version"],
+        header["previous_block__hash"],
+        header["merkle_root"],
+        header["time"],
+        header["bits"],
+        header["nonce"],
+    ):
+        return None
+
+    return (
+        header["version"].to_bytes(4, "little")
+        + codecs.decode(header["previous_block__hash"], "hex")[::-1]
+        + codecs.decode(header["merkle_root"], "hex")[::-1]
+        + int(time.mktime(header["time"].timetuple())).to_bytes(4, "little")
+        + codecs.decode(header["bits"], "hex")[::-1]
+        + header["nonce"].to_bytes(4, "little")
+    )
+
+
+def check_header_hashes(headers):
+    """
+    Double SHA256 each (height, hash, header bytes) and return the heights
+    where the result doesn't match the hash on record
+    """
+    sha256 = hashlib.sha256
+    return [
+        height
+        for height, block_hash, header_bytes in headers
+        if sha256(sha256(header_bytes).digest()).digest()[::-1].hex() != block_hash
+    ]
+
+
+class RangeValidator(object):
+    """
+    Check the headers and chain linkage of a range of blocks.
+    Headers are loaded a window at a time with a single values() query and the
+    linkage is checked against the neighbouring rows in memory.
+    With merkle=True the merkle roots of each window's transactions are checked
+    in one batch. Votes are left to Block.validate when a failing block is repaired
+    """
+
+    def __init__(
+        self, start_height=0, end_height=None, window=None, processes=None, merkle=False
+    ):
+        self.start_height = start_height
+        self.end_height = end_height
+        self.window = window or settings.VALIDATION_WINDOW
+        self.processes = processes or settings.VALIDATION_PROCESSES
+        self.merkle = merkle
+
+        if self.end_height is None:
+            self.end_height = Block.objects.aggregate(Max("height"))["height__max"]
+
+    def get_headers(self, min_height, max_height):
+        return {
+            header["height"]: header
+            for header in Block.objects.filter(
+                height__gte=min_height, height__lte=max_height
+            ).values(*HEADER_FIELDS)
+        }
+
+    def check_linkage(self, height, header, headers):
+        if height == 0:
+            return True
+
+        previous_header = headers.get(height - 1)
+        next_header = headers.get(height + 1)
+
+        # the previous block must be the block at height - 1 and point back to us
+        if not previous_header or header["previous_block_id"] != previous_header["id"]:
+            return False
+
+        if previous_header["next_block_id"] != header["id"]:
+            return False
+
+        if next_header:
+            return header["next_block_id"] == next_header["id"]
+
+        # only the top block may have no next block
+        return height == self.end_height and header["next_block_id"] is None
+
+    def hash_headers(self, headers):
+        if self.processes <= 1 or len(headers) < self.processes:
+            return check_header_hashes(headers)
+
+        chunk_size = -(-len(headers) // self.processes)
+        chunks = [
+            headers[i : i + chunk_size] for i in range(0, len(headers), chunk_size)
+        ]
+        failing = []
+
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            for result in executor.map(check_header_hashes, chunks):
+                failing += result
+
+        return failing
+
+    @staticmethod
+    def check_merkle_roots(headers, min_height, max_height):
+        tx_ids = defaultdict(list)
+
+        for height, tx_id in (
+            Transaction.objects.filter(
+                block__height__gte=min_height, block__height__lte=max_height
+            )
+            .order_by("block__height", "index")
+            .values_list("block__height", "tx_id")
+        ):
+            tx_ids[height].append(tx_id)
+
+        heights = [
+            height for height in range(min_height, max_height + 1) if height in headers
+        ]
+        return [
+            height
+            for height, root in zip(
+                heights, merkle_roots([tx_ids[height] for height in heights])
+            )
+            if root != headers[height]["merkle_root"]
+        ]
+
+    def validate_window(self, min_height, max_height):
+        # load one block either side so the edges of the window can be linked
+        headers = self.get_headers(max(min_height - 1, 0), max_height + 1)
+        failing = set()
+        to_hash = []
+
+        for height in range(min_height, max_height + 1):
+            header = headers.get(height)
+
+            if not header:
+                # missing blocks are failures too
+                failing.add(height)
+                continue
+
+            if not self.check_linkage(height, header, headers):
+                failing.add(height)
+
+            if height == 0:
+                continue
+
+            header_bytes = get_header_bytes(header)
+
+            if header_bytes is None:
+                failing.add(height)
+                continue
+
+            to_hash.append((height, header["hash"], header_bytes))
+
+        failing.update(self.hash_headers(to_hash))
+
+        if self.merkle:
+            failing.update(self.check_merkle_roots(headers, min_height, max_height))
+
+        return failing
+
+    def run(self):
+        """
+        Return a sorted list of the heights that failed validation
+        """
+        if self.end_height is None:
+            return []
+
+        logger.info(
+            f"Validating blocks {self.start_height} to {self.end_height} "
+            f"in windows of {self.window}"
+        )
+        failing = []
+
+        for min_height in range(self.start_height, self.end_height + 1, self.window):
+            max_height = min(min_height + self.window - 1, self.end_height)
+            window_failing = self.validate_window(min_height, max_height)
+            logger.info(
+                f"Validated blocks {min_height} to {max_height}. "
+                f"{len(window_failing)} failed"
+            )
+            failing += sorted(window_failing)
+
+        return failing
+
+
+def send_for_repair(heights, queue="validation"):
+    """
+    Repair the blocks at the failing heights.
+    Heights without a block are fetched from the daemon again
+    """
+    block_hashes = dict(
+        Block.objects.filter(height__in=heights).values_list("height", "hash")
+    )
+
+    for height in heights:
+        if height in block_hashes:
+            schedule_repair(
+                "repair_block", queue=queue, block_hash=block_hashes[height]
+            )
+        else:
+            schedule_repair("get_block", queue=queue, height=height)
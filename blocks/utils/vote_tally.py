@@ -0,0 +1,188 @@
+import logging
+
+from django.conf import settings
+from django.db.models import Count, Min, Q, Sum
+from django.db.transaction import atomic
+
+from blocks.models.votes import CustodianVote, MotionVote, VoteTally, VoteWindow
+
+logger = logging.getLogger(__name__)
+
+
+def _window_start(height):
+    return max(height - settings.VOTE_WINDOW, 0)
+
+
+def _sharedays_destroyed(min_height, max_height):
+    from blocks.models import Block
+
+    if max_height < min_height:
+        return 0
+
+    return (
+        Block.objects.filter(height__gte=min_height, height__lte=max_height).aggregate(
+            Sum("coinage_destroyed")
+        )["coinage_destroyed__sum"]
+        or 0
+    )
+
+
+def _count_votes(min_height, max_height):
+    """
+    Count the motion and custodian votes in blocks between the heights.
+    Returns a dict of VoteTally key: [number of votes, sharedays destroyed, first seen]
+    """
+    counts = {}
+
+    if max_height < min_height:
+        return counts
+
+    height_filter = {
+        "block__height__gte": min_height,
+        "block__height__lte": max_height,
+    }
+    aggregates = {
+        "votes": Count("id"),
+        "sdd": Sum("block__coinage_destroyed"),
+        "first": Min("block__height"),
+    }
+
+    for row in (
+        MotionVote.objects.filter(**height_filter).values("hash").annotate(**aggregates)
+    ):
+        counts[(VoteTally.MOTION, row["hash"], None, None)] = [
+            row["votes"],
+            row["sdd"] or 0,
+            row["first"],
+        ]
+
+    for row in (
+        CustodianVote.objects.filter(**height_filter)
+        .values("address", "amount")
+        .annotate(**aggregates)
+    ):
+        counts[(VoteTally.CUSTODIAN, None, row["address"], row["amount"])] = [
+            row["votes"],
+            row["sdd"] or 0,
+            row["first"],
+        ]
+
+    return counts
+
+
+def _apply_counts(counts, sign):
+    """
+    Add (sign=1) or subtract (sign=-1) the counts from the tallies
+    """
+    if not counts:
+        return
+
+    motions = [key[1] for key in counts if key[0] == VoteTally.MOTION]
+    addresses = [key[2] for key in counts if key[0] == VoteTally.CUSTODIAN]
+    tallies = {
+        tally.key: tally
+        for tally in VoteTally.objects.filter(
+            Q(vote_type=VoteTally.MOTION, hash__in=motions)
+            | Q(vote_type=VoteTally.CUSTODIAN, address__in=addresses)
+        )
+    }
+    new_tallies = []
+
+    for key, (votes, sdd, first_seen) in counts.items():
+        tally = tallies.get(key)
+
+        if tally is None:
+            tally = VoteTally(
+                vote_type=key[0], hash=key[1], address_id=key[2], amount=key[3]
+            )
+            new_tallies.append(tally)
+
+        tally.number_of_votes += sign * votes
+        tally.sharedays_destroyed += sign * sdd
+
+        if sign > 0 and (tally.first_seen is None or first_seen < tally.first_seen):
+            tally.first_seen = first_seen
+
+    VoteTally.objects.bulk_create(new_tallies)
+    VoteTally.objects.bulk_update(
+        [tally for tally in tallies.values() if tally.key in counts],
+        ["number_of_votes", "sharedays_destroyed", "first_seen"],
+    )
+
+
+def _rebuild(window, height):
+    logger.info(f"Rebuilding vote tallies for window ending at {height}")
+    VoteTally.objects.update(number_of_votes=0, sharedays_destroyed=0)
+    counts = _count_votes(_window_start(height), height)
+
+    # first seen is the first vote ever, which may be before the window
+    for row in (
+        MotionVote.objects.filter(
+            hash__in=[key[1] for key in counts if key[0] == VoteTally.MOTION]
+        )
+        .values("hash")
+        .annotate(first=Min("block__height"))
+    ):
+        counts[(VoteTally.MOTION, row["hash"], None, None)][2] = row["first"]
+
+    for row in (
+        CustodianVote.objects.filter(
+            address__in=[key[2] for key in counts if key[0] == VoteTally.CUSTODIAN]
+        )
+        .values("address", "amount")
+        .annotate(first=Min("block__height"))
+    ):
+        key = (VoteTally.CUSTODIAN, None, row["address"], row["amount"])
+
+        if key in counts:
+            counts[key][2] = row["first"]
+
+    _apply_counts(counts, 1)
+    window.sharedays_destroyed = _sharedays_destroyed(_window_start(height), height)
+
+
+def _step(window, height):
+    """
+    Move the window forward from window.height to height.
+    Votes in the entering blocks are added and votes in the leaving blocks subtracted
+    """
+    logger.info(f"Stepping vote tallies from {window.height} to {height}")
+    leaving = (_window_start(window.height), _window_start(height) - 1)
+    entering = (window.height + 1, height)
+
+    _apply_counts(_count_votes(*entering), 1)
+    _apply_counts(_count_votes(*leaving), -1)
+    window.sharedays_destroyed += _sharedays_destroyed(
+        *entering
+    ) - _sharedays_destroyed(*leaving)
+
+
+@atomic
+def get_vote_window(height):
+    """
+    Return the VoteWindow with the tallies counted over the blocks up to height
+    """
+    window, _ = VoteWindow.objects.select_for_update().get_or_create(pk=1)
+
+    if window.height == height:
+        return window
+
+    if (
+        window.height is not None
+        and window.height < height < window.height + settings.VOTE_WINDOW
+    ):
+        _step(window, height)
+    else:
+        _rebuild(window, height)
+
+    window.height = height
+    window.save()
+    return window
+
+
+def invalidate_vote_window(height):
+    """
+    Votes at height have changed.
+    If the window already covers that height it must be rebuilt the next time it's used
+    """
+    VoteWindow.objects.filter(pk=1, height__gte=height).update(height=None)
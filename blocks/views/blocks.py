@@ -4,8 +4,10 @@ from django.shortcuts import get_object_or_404, render
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import ListView
-from blocks.tasks import repair_transaction, repair_block
-from blocks.models import ActiveParkRate, Block, Transaction
+from blocks.models import Block, Transaction
+from blocks.utils.park_rates import get_active_ranges
+from blocks.utils.repair import schedule_repair
+from blocks.utils.summary import with_summaries
 
 
 class LatestBlocksList(ListView):
@@ -13,11 +15,13 @@ class LatestBlocksList(ListView):
     template_name = "explorer/latest_blocks_list.html"
 
     def get_queryset(self):
-        blocks = Block.objects.exclude(height=None).order_by("-height")[:50]
+        blocks = with_summaries(
+            Block.objects.exclude(height=None).order_by("-height")[:50]
+        )
 
         for block in blocks:
-            repair_block.apply_async(
-                kwargs={"block_hash": block.hash}, queue="high_priority"
+            schedule_repair(
+                "repair_block", queue="high_priority", block_hash=block.hash
             )
 
         return blocks
@@ -25,17 +29,15 @@ class LatestBlocksList(ListView):
     def get_context_data(self, **kwargs):
         context = super(LatestBlocksList, self).get_context_data(**kwargs)
         context["chain"] = connection.tenant
-        context["active_park_rates"] = []
-
-        for coin in connection.tenant.coins.all():
-            park_rate = ActiveParkRate.objects.filter(
-                block=Block.objects.exclude(height=None).order_by("-height").first(),
-                coin=coin,
-            ).first()
-
-            if park_rate:
-                context["active_park_rates"].append(park_rate)
-
+        top_height = (
+            Block.objects.exclude(height=None)
+            .order_by("-height")
+            .values_list("height", flat=True)
+            .first()
+        )
+        context["active_park_rates"] = (
+            get_active_ranges(top_height) if top_height is not None else []
+        )
         return context
 
 
@@ -47,14 +49,10 @@ class BlockDetailView(View):
     @staticmethod
     def get(request, block_height):
         block = get_object_or_404(Block, height=block_height)
-        repair_block.apply_async(
-            kwargs={"block_hash": block.hash}, queue="high_priority"
-        )
+        schedule_repair("repair_block", queue="high_priority", block_hash=block.hash)
 
         for tx in block.transactions.all():
-            repair_transaction.apply_async(
-                kwargs={"tx_id": tx.tx_id}, queue="high_priority"
-            )
+            schedule_repair("repair_transaction", queue="high_priority", tx_id=tx.tx_id)
 
         return render(
             request,
@@ -94,7 +92,11 @@ class AllBlocks(ListView):
 
     def get_queryset(self):
         print("getting queryset")
-        blocks = Block.objects.exclude(height=None).order_by("-height")
+        blocks = (
+            Block.objects.exclude(height=None)
+            .select_related("solver")
+            .order_by("-height")
+        )
 
         print(f"Got blocks: {blocks}")
         if "start-from" in self.kwargs["GET"]:
@@ -124,5 +126,6 @@ class AllBlocks(ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context["object_list"] = with_summaries(context["object_list"])
         context["chain"] = connection.tenant
         return context
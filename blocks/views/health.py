@@ -1,5 +1,4 @@
 import datetime
-import hashlib
 import time
 
 from django.db import connection
@@ -7,52 +6,26 @@ from django.shortcuts import render
 from django.utils.timezone import now
 from django.views import View
 
-from blocks.models import Block, Info, Orphan, Peer
+from blocks.utils.health import get_health_snapshot
 
 
 class HealthView(View):
     @staticmethod
     def get(request):
-        # calculate when we should expect the next block
-        top_block = (
-            Block.objects.exclude(height=None)
-            .exclude(time=None)
-            .order_by("-height")
-            .first()
+        snapshot = get_health_snapshot()
+        top_block = snapshot["top_block"]
+        next_block_time = snapshot["next_block_time"]
+        next_block_time_delta = (
+            next_block_time - now() if next_block_time else datetime.timedelta()
         )
 
-        next_block_time = top_block.time + datetime.timedelta(minutes=1)
-        next_block_time_delta = next_block_time - now()
-
-        # use the top height to update the peers with their distance from the top block
-        peers = Peer.objects.filter(
-            last_receive__gte=now() - datetime.timedelta(days=14),
-            height__gte=top_block.height - 100000,
-        ).order_by("-height")
-        for peer in peers:
-            peer.height_diff = peer.height - top_block.height
-            peer.identifier = hashlib.md5(
-                "{}:{}".format(peer.address, peer.port).encode("utf-8")
-            ).hexdigest()[:10]
-
-        # get 30 day difficulty
-        times = []
-        difficulties = []
-        orphans = []
-        get_date = now() - datetime.timedelta(days=30)
-        while get_date < now():
-            info = Info.objects.get_closest_to(target=get_date)
-            times.append(info.time_added)
-            difficulties.append(info.difficulty)
-
-            orphans.append(
-                Orphan.objects.filter(
-                    date_time__gte=get_date - datetime.timedelta(days=1),
-                    date_time__lt=get_date,
-                ).count()
-            )
-
-            get_date += datetime.timedelta(days=1)
+        # the 30 day series from the daily rollups
+        series = snapshot["series"]
+        times = [rollup["start"] for rollup in series]
+        orphans = [rollup["orphans"] for rollup in series]
+        difficulty_series = [
+            rollup for rollup in series if rollup["difficulty"] is not None
+        ]
 
         orphan_chart_data = {
             "chart_type": "lineChart",
@@ -82,8 +55,11 @@ class HealthView(View):
             "chart_type": "lineChart",
             "name": "30 Day Difficulty",
             "series_data": {
-                "x": [int(time.mktime(date.timetuple()) * 1000) for date in times],
-                "y1": [float(difficulty) for difficulty in difficulties],
+                "x": [
+                    int(time.mktime(rollup["start"].timetuple()) * 1000)
+                    for rollup in difficulty_series
+                ],
+                "y1": [rollup["difficulty"] for rollup in difficulty_series],
                 "name1": "Difficulty",
                 "extra1": {
                     "tooltip": {"y_start": "The network difficulty was ", "y_end": ""},
@@ -110,7 +86,7 @@ class HealthView(View):
                 "top_block": top_block,
                 "next_block_time": next_block_time,
                 "next_block_time_delta": round(next_block_time_delta.seconds / 60, 1),
-                "peers": peers,
+                "peers": snapshot["peers"],
                 "orphan_chart_data": orphan_chart_data,
                 "difficulty_chart_data": difficulty_chart_data,
             },
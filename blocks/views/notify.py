@@ -1,18 +1,16 @@
-import json
-
-from channels import Group
 from django.conf import settings
+from django.core.cache import cache
 from django.db import connection
 from django.http import HttpResponse, HttpResponseNotFound
-from django.template.loader import render_to_string
 from django.views import View
 
-from blocks.models import Block
+from daio.celery import app
 
 
 class Notify(View):
     """
-    Used by the coin daemon to notify of a new block
+    Used by the coin daemon to notify of a new block.
+    The block is added and broadcast by the new_tip task so the daemon isn't kept waiting
     """
 
     @staticmethod
@@ -21,28 +19,15 @@ class Notify(View):
             return HttpResponseNotFound()
         if len(block_hash) < 60:
             return HttpResponseNotFound()
-        # block validation is tied to the save method
-        Block.objects.get_or_create(hash=block_hash)
-
-        # update top blocks on ui
-        top_blocks = Block.objects.exclude(height=None).order_by("-height")[:50]
-        index = 0
 
-        for block in top_blocks:
-            block.save()
-            Group("{}_latest_blocks_list".format(connection.schema_name)).send(
-                {
-                    "text": json.dumps(
-                        {
-                            "message_type": "update_block",
-                            "index": index,
-                            "block_html": render_to_string(
-                                "explorer/fragments/block.html", {"block": block}
-                            ),
-                            "block_is_valid": block.is_valid,
-                        }
-                    )
-                }
+        # the daemon can notify of the same block more than once
+        if cache.add(
+            "{}_new_tip_{}".format(connection.schema_name, block_hash), True, 60
+        ):
+            app.send_task(
+                "blocks.tasks.tip.new_tip",
+                kwargs={"chain": connection.schema_name, "block_hash": block_hash},
+                queue="tip",
             )
-            index += 1
+
         return HttpResponse("daio received block {}".format(block_hash))
@@ -233,9 +233,97 @@ CACHEOPS_DEGRADE_ON_FAILURE = True
 APPEND_SLASH = False
 
 RPC_ALWAYS_LIST = ["sendrawtransaction"]
+# seconds to keep chain rpc credentials in process before re-reading them
+RPC_CHAIN_CACHE_SECONDS = 60
+# keep-alive connections held open to each daemon
+RPC_POOL_SIZE = 10
+# maximum number of requests sent in one JSON-RPC batch
+RPC_BATCH_SIZE = 500
+# fetch blocks serialized and decode their transactions locally
+RPC_RAW_BLOCKS = False
+
+# number of blocks votes are counted over
+VOTE_WINDOW = 10000
+
+# Range sync
+# how far behind the daemon we can be before a range sync is used
+SYNC_THRESHOLD = 100
+# number of blocks fetched and committed per chunk
+SYNC_CHUNK_SIZE = 500
+# concurrent rpc workers fetching blocks for a chunk
+SYNC_WORKERS = 4
+# how long a running range sync holds its lock
+SYNC_LOCK_SECONDS = 60 * 60 * 6
+# deepest fork rolled back automatically. Deeper ones are refused and logged
+MAX_REORG_DEPTH = 1000
+
+# Serialized block and transaction cache
+# confirmations after which a serialized payload is cached without expiry
+SERIALIZED_CACHE_DEPTH = 100
+# entries held in each process' LRU and how long before they are re-checked
+SERIALIZED_CACHE_LRU_SIZE = 5000
+SERIALIZED_CACHE_LRU_SECONDS = 60 * 5
+# optional directory for a compressed on disk tier of deep payloads
+SERIALIZED_CACHE_DIR = None
+# how long disk entries are kept and how often expired ones are pruned
+SERIALIZED_CACHE_DISK_SECONDS = 60 * 60 * 24 * 7
+SERIALIZED_CACHE_PRUNE_INTERVAL_SECONDS = 60 * 60 * 24
+# how long the top block height used for the depth check is cached in process
+SERIALIZED_TOP_HEIGHT_SECONDS = 30
+
+# Valid hashes
+# directory of the packed block hash prefix files served by getvalidhashes
+HASH_INDEX_DIR = os.path.join(BASE_DIR, "hash_index")
+# heights rewritten on each update to pick up new blocks and shallow reorgs
+HASH_INDEX_REWRITE_DEPTH = 100
+# recent heights each process can resolve a sent hash to without a query
+HASH_INDEX_MAP_DEPTH = 100000
+# block hashes loaded per query when rewriting the file
+HASH_INDEX_CHUNK_SIZE = 10000
+
+# Address history
+ADDRESS_HISTORY_PAGE_SIZE = 50
+ADDRESS_HISTORY_MAX_PAGE_SIZE = 500
+
+# Range validation
+# number of block headers loaded per query
+VALIDATION_WINDOW = 10000
+# processes used to hash headers. 1 hashes in the calling process
+VALIDATION_PROCESSES = 1
+
+# Repair scheduling
+# how long scheduled repair work is treated as pending before it can be sent again
+REPAIR_PENDING_SECONDS = 60 * 30
+# how long finished repair work is skipped before it can be sent again
+REPAIR_COOLDOWN_SECONDS = 60 * 5
+# scheduled repair tasks allowed in the queues at once per chain
+REPAIR_MAX_IN_FLIGHT = 10000
+
+# Circulating supply
+# seconds to wait for each exchange balance query
+EXCHANGE_BALANCE_TIMEOUT = 10
+# exchange balance queries run at once
+EXCHANGE_BALANCE_WORKERS = 8
+
+# Info retention
+# (age in days, bucket seconds). Info older than each age is compacted into one
+# row per unit per bucket. Newer rows are kept at full resolution
+INFO_RETENTION = [(7, 60 * 60), (90, 60 * 60 * 24)]
+# how far before each age the periodic compaction looks for rows to compact
+INFO_COMPACTION_LOOKBACK_HOURS = 24
+# the least time between periodic compactions
+INFO_COMPACTION_INTERVAL_SECONDS = 60 * 60
+
+# Health
+# days of daily rollups shown on the health page
+HEALTH_SERIES_DAYS = 30
+# how long the health snapshot is cached
+HEALTH_CACHE_SECONDS = 60
 
 CELERY_TASK_ROUTES = {
     "blocks.tasks.network.*": {"queue": "network"},
     "blocks.tasks.blocks.*": {"queue": "blocks"},
     "blocks.tasks.transactions.*": {"queue": "transactions"},
+    "blocks.tasks.sync.*": {"queue": "sync"},
+    "blocks.tasks.tip.*": {"queue": "tip"},
 }